@@ -3,12 +3,16 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 
-from .models import Competition, CompetitionMatch, CompetitionTeam, Player
+from .models import (
+    Competition, CompetitionMatch, CompetitionTeam, Player, CompetitionStandingSnapshot,
+)
 from .serializers import (
     CompetitionMatchSerializer,
     CompetitionListSerializer,
 )
-from .services.standings import calculate_competition_standings
+from .services.standings import cached_competition_standings
+from .services.standings_history import snapshot_table
+from stats.stamps import conditional_view, competition_key
 
 
 # =====================================================
@@ -71,6 +75,7 @@ def competition_matches_api(request, competition_id):
 # CLASSEMENT (AVEC FORM + PENALTY)
 # =====================================================
 
+@conditional_view(lambda request, competition_id: competition_key(competition_id))
 @api_view(["GET"])
 def competition_standings_api(request, competition_id):
     competition = get_object_or_404(
@@ -79,16 +84,26 @@ def competition_standings_api(request, competition_id):
         is_active=True
     )
 
-    table = calculate_competition_standings(competition)
+    # ?as_of_matchday=N : classement après la journée N (snapshot précalculé)
+    as_of = request.query_params.get("as_of_matchday")
+    if as_of is not None:
+        try:
+            as_of = int(as_of)
+        except (TypeError, ValueError):
+            return Response({"detail": "as_of_matchday doit être un entier."}, status=400)
+        return _competition_standings_as_of(request, competition, as_of)
+
+    table = cached_competition_standings(
+        competition, getattr(request, "change_stamps", None), request=request
+    )["table"]
 
     standings = []
-    position = 1
 
     for row in table:
         team = row["team"]
 
         standings.append({
-            "position": position,
+            "position": row["position"],
             "team": {
                 "id": team.id,
                 "name": team.name,
@@ -110,7 +125,44 @@ def competition_standings_api(request, competition_id):
             "form": row.get("form", []),
         })
 
-        position += 1
+    return Response({
+        "competition": {
+            "id": competition.id,
+            "name": competition.name,
+            "season": competition.season,
+        },
+        "standings": standings
+    })
+
+
+def _competition_standings_as_of(request, competition, as_of):
+    matchday, rows = snapshot_table(competition.id, as_of)
+
+    standings = []
+    for snap in rows:
+        team = snap.team
+        standings.append({
+            "position": snap.position,
+            "team": {
+                "id": team.id,
+                "name": team.name,
+                "logo": (
+                    request.build_absolute_uri(team.logo.url)
+                    if getattr(team, "logo", None)
+                    else None
+                ),
+            },
+            "played": snap.played,
+            "wins": snap.wins,
+            "draws": snap.draws,
+            "losses": snap.losses,
+            "goals_for": snap.goals_for,
+            "goals_against": snap.goals_against,
+            "goal_difference": snap.goals_for - snap.goals_against,
+            "points": snap.points,
+            "penalty_points": snap.penalty_points,
+            "form": [],
+        })
 
     return Response({
         "competition": {
@@ -118,10 +170,42 @@ def competition_standings_api(request, competition_id):
             "name": competition.name,
             "season": competition.season,
         },
+        "as_of_matchday": matchday,
         "standings": standings
     })
 
 
+# =====================================================
+# ÉVOLUTION DU CLASSEMENT D'UN CLUB
+# =====================================================
+
+@conditional_view(lambda request, competition_id, club_id: competition_key(competition_id))
+@api_view(["GET"])
+def competition_club_positions_api(request, competition_id, club_id):
+    competition = get_object_or_404(
+        Competition,
+        id=competition_id,
+        is_active=True
+    )
+
+    history = (
+        CompetitionStandingSnapshot.objects
+        .filter(competition=competition, team_id=club_id)
+        .order_by("matchday")
+        .values("matchday", "position", "points", "played", "goals_for", "goals_against")
+    )
+
+    return Response({
+        "competition": {
+            "id": competition.id,
+            "name": competition.name,
+            "season": competition.season,
+        },
+        "team_id": club_id,
+        "history": list(history),
+    })
+
+
 # =====================================================
 # CLUBS
 # =====================================================
@@ -181,25 +265,20 @@ def competition_club_detail_api(request, competition_id, club_id):
         is_active=True
     )
 
-    # 🔥 On récupère le classement pour trouver les stats du club
-    table = calculate_competition_standings(competition)
+    # 🔥 Ligne du club lue dans le classement précalculé (cache par version)
+    row = cached_competition_standings(competition, request=request)["by_team"].get(club.id)
 
     stats_data = None
-    position = 1
-
-    for row in table:
-        if row["team"].id == club.id:
-            stats_data = {
-                "position": position,
-                "played": row["played"],
-                "wins": row["wins"],
-                "draws": row["draws"],
-                "losses": row["losses"],
-                "goal_difference": row["goal_difference"],
-                "points": row["points"],
-            }
-            break
-        position += 1
+    if row:
+        stats_data = {
+            "position": row["position"],
+            "played": row["played"],
+            "wins": row["wins"],
+            "draws": row["draws"],
+            "losses": row["losses"],
+            "goal_difference": row["goal_difference"],
+            "points": row["points"],
+        }
 
     return Response({
         "club": {
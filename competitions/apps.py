@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CompetitionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'competitions'
+
+    def ready(self):
+        # snapshots de classement par journée (signaux)
+        from .services import standings_history  # noqa: F401
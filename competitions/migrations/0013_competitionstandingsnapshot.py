@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_snapshots(apps, schema_editor):
+    """Calcule l'historique des classements des compétitions existantes."""
+    from competitions.services.standings_history import refresh_snapshots
+
+    Competition = apps.get_model("competitions", "Competition")
+    for competition_id in Competition.objects.values_list("id", flat=True):
+        refresh_snapshots(competition_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0012_rename_started_at_competitionmatch_phase_start_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='competitionmatch',
+            name='phase_offset',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='CompetitionStandingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matchday', models.PositiveIntegerField()),
+                ('position', models.PositiveIntegerField()),
+                ('played', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('goals_for', models.IntegerField(default=0)),
+                ('goals_against', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('penalty_points', models.IntegerField(default=0)),
+                ('competition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standing_snapshots', to='competitions.competition')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standing_snapshots', to='competitions.competitionteam')),
+            ],
+            options={
+                'verbose_name': 'Classement par journée',
+                'verbose_name_plural': 'Classements par journée',
+                'ordering': ['competition', 'matchday', 'position'],
+                'indexes': [models.Index(fields=['competition', 'team', 'matchday'], name='competition_competi_38268b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('competition', 'matchday', 'team'), name='uniq_competition_snapshot_team')],
+            },
+        ),
+        migrations.RunPython(fill_snapshots, migrations.RunPython.noop),
+    ]
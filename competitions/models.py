@@ -250,6 +250,56 @@ class CompetitionPenalty(models.Model):
     def __str__(self):
         sign = "+" if self.points > 0 else ""
         return f"{self.team.name} {sign}{self.points} pts"
+
+
+# =====================================================
+# CLASSEMENT APRÈS CHAQUE JOURNÉE (SNAPSHOTS)
+# =====================================================
+
+class CompetitionStandingSnapshot(models.Model):
+    """
+    Classement d'une équipe APRÈS la journée `matchday` (matchs FT uniquement,
+    pénalités comprises). Recalculé à partir de la journée modifiée
+    (competitions/services/standings_history.py).
+    """
+    competition = models.ForeignKey(
+        Competition,
+        on_delete=models.CASCADE,
+        related_name="standing_snapshots",
+    )
+    team = models.ForeignKey(
+        CompetitionTeam,
+        on_delete=models.CASCADE,
+        related_name="standing_snapshots",
+    )
+    matchday = models.PositiveIntegerField()
+
+    position = models.PositiveIntegerField()
+    played = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    goals_for = models.IntegerField(default=0)
+    goals_against = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+    penalty_points = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["competition", "matchday", "position"]
+        verbose_name = "Classement par journée"
+        verbose_name_plural = "Classements par journée"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["competition", "matchday", "team"],
+                name="uniq_competition_snapshot_team",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["competition", "team", "matchday"]),
+        ]
+
+    def __str__(self):
+        return f"{self.competition} J{self.matchday} • {self.position}. {self.team}"
 # =====================================================
 # JOUEURS
 # =====================================================
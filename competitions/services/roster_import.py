@@ -0,0 +1,107 @@
+from competitions.models import CompetitionTeam, Player
+from players.aliases import fill_bulk_pks, normalize_name
+from players.importer import RosterImport, RowError, clamp, parse_int
+from stats.stamps import bump, competition_key
+
+# =====================================================
+# IMPORT DES EFFECTIFS D'UNE COMPÉTITION
+# =====================================================
+#
+# Même pipeline que players.importer (lecture en flux, lots, index en
+# mémoire, rapport par ligne) pour competitions.Player : club = équipe de la
+# compétition (nom ou id), numéro et poste obligatoires, numéro unique parmi
+# les joueurs actifs de l'équipe.
+
+POSITION_ALIASES = {
+    "gk": "GK", "g": "GK", "gardien": "GK", "goalkeeper": "GK",
+    "def": "DEF", "d": "DEF", "df": "DEF", "defenseur": "DEF", "defender": "DEF",
+    "mid": "MID", "m": "MID", "mf": "MID", "milieu": "MID", "midfielder": "MID",
+    "att": "ATT", "a": "ATT", "fw": "ATT", "attaquant": "ATT", "forward": "ATT",
+}
+_POSITIONS = {code for code, _ in Player.POSITION_CHOICES}
+
+
+class CompetitionPlayerImport(RosterImport):
+    """Joueurs d'une compétition (competitions.Player) ; club = CompetitionTeam."""
+
+    model = Player
+    club_model = CompetitionTeam
+    key_fields = ("club_id", "name", "number")
+
+    def __init__(self, competition, **kwargs):
+        self.competition = competition
+        super().__init__(**kwargs)
+
+    def load_clubs(self):
+        for team in CompetitionTeam.objects.filter(competition=self.competition).only("id", "name", "short_name"):
+            self.clubs_by_id[team.pk] = team
+            self.clubs_by_name[normalize_name(team.name)] = team
+            if team.short_name:
+                self.clubs_by_name.setdefault(normalize_name(team.short_name), team)
+
+    def new_clubs(self, names):
+        created = CompetitionTeam.objects.bulk_create([
+            CompetitionTeam(competition=self.competition, name=clamp(CompetitionTeam, "name", n))
+            for n in names
+        ])
+        # bulk_create ne renvoie pas les pk sur MySQL : relecture par nom dans la compétition
+        fill_bulk_pks(CompetitionTeam, created, ("competition_id", "name"))
+        bump(competition_key(self.competition.pk))
+        return created
+
+    def roster_queryset(self, club_ids):
+        return Player.objects.filter(club_id__in=club_ids, is_active=True).order_by("id")
+
+    def player_name(self, player):
+        return player.name
+
+    def build(self, raw, club, existing):
+        name = self._display_name(raw)
+        errors = []
+        if not name:
+            errors.append("Nom du joueur manquant.")
+
+        number = None
+        try:
+            number = parse_int(raw.get("number"), "Numéro", required=existing is None)
+        except RowError as e:
+            errors += e.errors
+
+        position = None
+        if raw.get("position") not in (None, ""):
+            key = normalize_name(raw["position"])
+            position = POSITION_ALIASES.get(key) or (key.upper() if key.upper() in _POSITIONS else None)
+            if position is None:
+                errors.append(f"Poste invalide : {raw['position']!r} (GK, DEF, MID, ATT).")
+        elif existing is None:
+            errors.append("Poste manquant.")
+
+        values = {"name": clamp(Player, "name", name)}
+        for key, label in (("age", "Âge"), ("height", "Taille")):
+            if key in raw:
+                try:
+                    values[key] = parse_int(raw[key], label)
+                except RowError as e:
+                    errors += e.errors
+        if "nationality" in raw:
+            values["nationality"] = clamp(Player, "nationality", raw["nationality"])
+        if errors:
+            raise RowError(*errors)
+        if number is not None:
+            values["number"] = number
+        if position:
+            values["position"] = position
+
+        self.check_number(club, values.get("number"), existing)
+
+        if existing is None:
+            player = Player(club_id=club.pk, **values)
+            self.claim_number(player)
+            return player, None
+
+        old_number = existing.number
+        changed = [k for k, v in values.items() if getattr(existing, k) != v]
+        for k in changed:
+            setattr(existing, k, values[k])
+        self.claim_number(existing, old_number)
+        return existing, changed
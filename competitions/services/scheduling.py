@@ -0,0 +1,102 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from competitions.models import CompetitionMatch, CompetitionTeam
+from matches.scheduling import berger_rounds, plan_schedule
+
+# =====================================================
+# CALENDRIER D'UNE COMPÉTITION
+# =====================================================
+#
+# Même moteur que le championnat (matches/scheduling.py) : aller/retour
+# équilibré, exempts, créneaux, conflits de dates. Les équipes de compétition
+# n'ont pas de stade : `same_city_venue=True` traite chaque ville comme un
+# stade partagé (deux équipes de la même ville ne reçoivent pas au même créneau).
+
+
+def team_busy_days(competition_id, team_ids):
+    """{team_id: {dates}} des matchs déjà programmés dans la compétition (1 requête)."""
+    team_ids = set(team_ids)
+    busy = defaultdict(set)
+    for home, away, dt in (
+        CompetitionMatch.objects.filter(competition_id=competition_id)
+        .filter(Q(home_team_id__in=team_ids) | Q(away_team_id__in=team_ids))
+        .values_list("home_team_id", "away_team_id", "datetime")
+    ):
+        day = timezone.localtime(dt).date() if timezone.is_aware(dt) else dt.date()
+        busy[home].add(day)
+        busy[away].add(day)
+    return busy
+
+
+def plan_competition(
+    competition,
+    *,
+    start_date,
+    kickoffs,
+    spacing_days=7,
+    double=True,
+    blackout_dates=(),
+    same_city_venue=False,
+    replace=False,
+):
+    """
+    Plan (voir matches.scheduling.plan_schedule) pour les équipes actives.
+    Sans `replace`, les journées suivent la dernière journée existante et les
+    jours où une équipe joue déjà sont évités. 2 à 3 requêtes.
+    """
+    teams = list(
+        CompetitionTeam.objects.filter(competition=competition, is_active=True)
+        .order_by("name").values_list("id", "city")
+    )
+    team_ids = [tid for tid, _ in teams]
+    venues = {tid: (city or "").strip() for tid, city in teams} if same_city_venue else {}
+
+    first_matchday, busy = 1, {}
+    if not replace:
+        first_matchday = (
+            CompetitionMatch.objects.filter(competition=competition)
+            .aggregate(m=Max("matchday"))["m"] or 0
+        ) + 1
+        busy = team_busy_days(competition.pk, team_ids)
+
+    return plan_schedule(
+        berger_rounds(team_ids, double=double),
+        start_date=start_date,
+        kickoffs=kickoffs,
+        spacing_days=spacing_days,
+        venues=venues,
+        blackout_dates=blackout_dates,
+        team_blackouts=busy,
+        first_matchday=first_matchday,
+    )
+
+
+@transaction.atomic
+def write_competition_schedule(competition, plan, *, replace=False):
+    """
+    Insère toute la saison en un bulk_create (une transaction).
+    replace : supprime d'abord les matchs de la compétition.
+    Renvoie le nombre de matchs créés.
+    """
+    from stats.stamps import bump, competition_key
+
+    if replace:
+        CompetitionMatch.objects.filter(competition=competition).delete()
+
+    created = CompetitionMatch.objects.bulk_create([
+        CompetitionMatch(
+            competition=competition,
+            home_team_id=f["home"], away_team_id=f["away"],
+            matchday=f["matchday"], datetime=f["datetime"],
+            status="SCHEDULED",
+        )
+        for f in plan["fixtures"]
+    ], batch_size=1000)
+
+    # bulk_create n'émet pas post_save : version de la compétition à la main
+    bump(competition_key(competition.pk))
+    return len(created)
@@ -1,9 +1,18 @@
+from profootgn.cache import AGGREGATES, SingleFlight
+
 from competitions.models import (
     Competition,
     CompetitionMatch,
     CompetitionTeam,
     CompetitionPenalty,
 )
+from stats.stamps import competition_key, get_stamps, mark_flight_state
+
+# filet de sécurité : la clé change déjà à chaque écriture
+STANDINGS_TTL = 60 * 60
+
+# un seul recalcul par nouvelle version ; les autres lecteurs servent l'ancienne
+STANDINGS_FLIGHT = SingleFlight("competition-standings", alias=AGGREGATES, timeout=STANDINGS_TTL)
 
 # =====================================================
 # CALCUL DU CLASSEMENT D’UNE COMPÉTITION
@@ -139,3 +148,37 @@ def calculate_competition_standings(competition: Competition):
     )
 
     return table
+
+
+# =====================================================
+# CLASSEMENT EN CACHE (PAR VERSION DE COMPÉTITION)
+# =====================================================
+
+def cached_competition_standings(competition: Competition, stamps=None, request=None):
+    """
+    Classement mis en cache par version de la compétition (stats.stamps) :
+    toute écriture CompetitionMatch / CompetitionPenalty / CompetitionTeam
+    change la version ; les lectures suivantes partagent UN seul recalcul,
+    même pendant une journée avec beaucoup de mises à jour LIVE (pendant ce
+    recalcul, les autres lecteurs reçoivent le classement précédent).
+
+    stamps  : versions déjà lues par conditional_view (évite une requête).
+    request : marquée si le classement servi est le précédent (X-Cache-Stale).
+    Renvoie {"table": [...lignes avec "position"], "by_team": {team_id: ligne}}.
+    """
+    key = competition_key(competition.id)
+    if not stamps or key not in stamps:
+        stamps = get_stamps([key])
+
+    def build():
+        table = calculate_competition_standings(competition)
+        for position, row in enumerate(table, start=1):
+            row["position"] = position
+        return {
+            "table": table,
+            "by_team": {row["team"].id: row for row in table},
+        }
+
+    data, state = STANDINGS_FLIGHT.get([competition.id], stamps[key], build)
+    mark_flight_state(request, state)
+    return data
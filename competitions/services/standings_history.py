@@ -0,0 +1,217 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Abs
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from competitions.models import (
+    CompetitionMatch,
+    CompetitionTeam,
+    CompetitionPenalty,
+    CompetitionStandingSnapshot,
+)
+
+# =====================================================
+# CLASSEMENTS PAR JOURNÉE (TIME-TRAVEL)
+# =====================================================
+#
+# Une ligne CompetitionStandingSnapshot par (compétition, journée, équipe) :
+# classement cumulé après la journée N, matchs FT uniquement.
+# Quand un résultat de la journée N est finalisé / corrigé / annulé, on ne
+# recalcule que les journées >= N. Les pénalités (non datées) s'appliquent à
+# toutes les journées : en ajouter une recalcule tout l'historique.
+
+COUNTED_STATUS = "FT"
+COUNTERS = ("played", "wins", "draws", "losses", "goals_for", "goals_against", "points")
+_STATE_FIELDS = ("status", "matchday", "home_team_id", "away_team_id", "home_score", "away_score")
+
+
+def _apply(row_h, row_a, hs, as_):
+    row_h["played"] += 1
+    row_a["played"] += 1
+    row_h["goals_for"] += hs
+    row_h["goals_against"] += as_
+    row_a["goals_for"] += as_
+    row_a["goals_against"] += hs
+
+    if hs > as_:
+        row_h["wins"] += 1
+        row_h["points"] += 3
+        row_a["losses"] += 1
+    elif hs < as_:
+        row_a["wins"] += 1
+        row_a["points"] += 3
+        row_h["losses"] += 1
+    else:
+        row_h["draws"] += 1
+        row_a["draws"] += 1
+        row_h["points"] += 1
+        row_a["points"] += 1
+
+
+def refresh_snapshots(competition_id, from_matchday=1):
+    """
+    Réécrit les snapshots des journées >= from_matchday.
+    3 lectures (équipes, pénalités, matchs FT) + 1 suppression + 1 bulk insert.
+    """
+    from_matchday = max(1, int(from_matchday or 1))
+
+    team_ids = list(
+        CompetitionTeam.objects
+        .filter(competition_id=competition_id, is_active=True)
+        .values_list("id", flat=True)
+    )
+    # comme calculate_competition_standings : points += somme, penalty_points = somme des valeurs absolues
+    penalties = {
+        tid: (total, shown)
+        for tid, total, shown in (
+            CompetitionPenalty.objects
+            .filter(competition_id=competition_id)
+            .values("team_id")
+            .annotate(total=Sum("points"), shown=Sum(Abs("points")))
+            .values_list("team_id", "total", "shown")
+        )
+    }
+    by_day = defaultdict(list)
+    for md, h, a, hs, as_ in (
+        CompetitionMatch.objects
+        .filter(competition_id=competition_id, status=COUNTED_STATUS)
+        .values_list("matchday", "home_team_id", "away_team_id", "home_score", "away_score")
+    ):
+        by_day[md].append((h, a, int(hs or 0), int(as_ or 0)))
+
+    last_day = max(by_day) if by_day else 0
+    totals = {tid: dict.fromkeys(COUNTERS, 0) for tid in team_ids}
+    to_create = []
+
+    for md in range(1, last_day + 1):
+        for h, a, hs, as_ in by_day.get(md, ()):
+            if h in totals and a in totals:
+                _apply(totals[h], totals[a], hs, as_)
+        if md < from_matchday:
+            continue
+
+        table = []
+        for tid in team_ids:
+            row = dict(totals[tid])
+            row["points"] += penalties.get(tid, (0, 0))[0]
+            table.append((tid, row))
+        # même tri que calculate_competition_standings (stable sur l'ordre des équipes)
+        table.sort(
+            key=lambda x: (
+                x[1]["points"],
+                x[1]["goals_for"] - x[1]["goals_against"],
+                x[1]["goals_for"],
+            ),
+            reverse=True,
+        )
+        for position, (tid, row) in enumerate(table, start=1):
+            to_create.append(CompetitionStandingSnapshot(
+                competition_id=competition_id,
+                team_id=tid,
+                matchday=md,
+                position=position,
+                penalty_points=penalties.get(tid, (0, 0))[1],
+                **row,
+            ))
+
+    with transaction.atomic():
+        CompetitionStandingSnapshot.objects.filter(
+            competition_id=competition_id, matchday__gte=from_matchday
+        ).delete()
+        CompetitionStandingSnapshot.objects.bulk_create(to_create)
+    return len(to_create)
+
+
+def _schedule_refresh(competition_id, from_matchday=1):
+    """
+    Un seul recalcul par compétition et par transaction, depuis la plus petite
+    journée demandée (ex. write_competition_schedule(replace=True) supprime N
+    matchs FT : N post_delete, 1 recalcul).
+    """
+    connection = transaction.get_connection()
+    pending = connection.__dict__.setdefault("_snapshot_refreshes", {})
+    entry = pending.get(competition_id)
+    # même liste de callbacks = même transaction (elle est remplacée au commit / rollback)
+    if entry and entry[0] is connection.run_on_commit:
+        entry[1] = min(entry[1], from_matchday)
+        return
+    entry = pending[competition_id] = [connection.run_on_commit, from_matchday]
+
+    def run():
+        if pending.get(competition_id) is entry:
+            del pending[competition_id]
+        refresh_snapshots(competition_id, entry[1])
+
+    transaction.on_commit(run)
+
+
+# =========================
+# LECTURE
+# =========================
+
+def snapshot_table(competition_id, as_of_matchday):
+    """
+    Classement après la journée `as_of_matchday` (ou la dernière journée
+    disponible avant). Renvoie (journée effective, [snapshots avec team]).
+    """
+    md = (
+        CompetitionStandingSnapshot.objects
+        .filter(competition_id=competition_id, matchday__lte=as_of_matchday)
+        .order_by("-matchday")
+        .values_list("matchday", flat=True)
+        .first()
+    )
+    if md is None:
+        return None, []
+    rows = (
+        CompetitionStandingSnapshot.objects
+        .filter(competition_id=competition_id, matchday=md)
+        .select_related("team")
+        .order_by("position")
+    )
+    return md, list(rows)
+
+
+# =========================
+# SIGNAUX
+# =========================
+
+@receiver(pre_save, sender=CompetitionMatch)
+def _remember_previous(sender, instance, raw=False, **kwargs):
+    instance._snapshot_prev = None
+    if raw or not instance.pk:
+        return
+    instance._snapshot_prev = (
+        CompetitionMatch.objects.filter(pk=instance.pk).values_list(*_STATE_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=CompetitionMatch)
+def _match_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    prev = getattr(instance, "_snapshot_prev", None)
+    new = tuple(getattr(instance, f) for f in _STATE_FIELDS)
+    if prev == new:
+        return
+    # journées dont le résultat compté change
+    days = [st[1] for st in (prev, new) if st and st[0] == COUNTED_STATUS]
+    if days:
+        _schedule_refresh(instance.competition_id, min(days))
+
+
+@receiver(post_delete, sender=CompetitionMatch)
+def _match_deleted(sender, instance, **kwargs):
+    if instance.status == COUNTED_STATUS:
+        _schedule_refresh(instance.competition_id, instance.matchday)
+
+
+@receiver([post_save, post_delete], sender=CompetitionPenalty)
+@receiver([post_save, post_delete], sender=CompetitionTeam)
+def _full_refresh(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _schedule_refresh(instance.competition_id)
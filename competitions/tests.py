@@ -1,3 +1,121 @@
+from unittest.mock import patch
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from profootgn.cache import clear_all
+from .models import (
+    Competition, CompetitionMatch, CompetitionPenalty, CompetitionStandingSnapshot, CompetitionTeam,
+)
+from .services import standings as standings_service
+from .services.standings import calculate_competition_standings
+from .services.standings_history import refresh_snapshots
+
+
+class CompetitionTestCase(TestCase):
+    """Une compétition à trois équipes ; résultats saisis un par un (signaux exécutés)."""
+
+    def setUp(self):
+        clear_all()
+        self.client = APIClient()
+        self.competition = Competition.objects.create(
+            name="Ligue 1", short_name="L1", slug="ligue-1", type="league", category="masculin", season="2025",
+        )
+        # un recalcul par compétition et par transaction : celui des équipes doit s'exécuter
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teams = [
+                CompetitionTeam.objects.create(competition=self.competition, name=name)
+                for name in ("Horoya", "Hafia", "Kaloum")
+            ]
+
+    def _result(self, matchday, home, away, hs, as_):
+        with self.captureOnCommitCallbacks(execute=True):
+            return CompetitionMatch.objects.create(
+                competition=self.competition, matchday=matchday, datetime=timezone.now(),
+                home_team=home, away_team=away, home_score=hs, away_score=as_, status="FT",
+            )
+
+    def _url(self, suffix):
+        return f"/api/competitions/{self.competition.id}/{suffix}"
+
+
+class CompetitionSnapshotTests(CompetitionTestCase):
+    """Classement par journée (time-travel) et évolution des positions d'une équipe."""
+
+    def test_as_of_matchday_and_positions(self):
+        horoya, hafia, kaloum = self.teams
+        self._result(1, horoya, hafia, 2, 0)
+        self._result(2, hafia, kaloum, 1, 0)
+        self._result(3, kaloum, horoya, 3, 0)
+
+        res = self.client.get(self._url("standings/"), {"as_of_matchday": 1})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["as_of_matchday"], 1)
+        self.assertEqual([r["team"]["id"] for r in res.data["standings"]][0], horoya.id)
+        self.assertEqual(res.data["standings"][0]["points"], 3)
+
+        # journée sans snapshot : la dernière disponible avant
+        res = self.client.get(self._url("standings/"), {"as_of_matchday": 9})
+        self.assertEqual(res.data["as_of_matchday"], 3)
+        self.assertEqual(self.client.get(self._url("standings/"), {"as_of_matchday": "x"}).status_code, 400)
+
+        res = self.client.get(self._url(f"clubs/{horoya.id}/positions/"))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            [(h["matchday"], h["position"], h["points"]) for h in res.data["history"]],
+            [(1, 1, 3), (2, 1, 3), (3, 2, 3)],
+        )
+
+    def test_penalties_match_live_table(self):
+        horoya, hafia, kaloum = self.teams
+        self._result(1, horoya, hafia, 1, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            CompetitionPenalty.objects.create(competition=self.competition, team=horoya, points=-3)
+            CompetitionPenalty.objects.create(competition=self.competition, team=horoya, points=1)
+
+        live = {r["team"].id: r for r in calculate_competition_standings(self.competition)}
+        snaps = {s.team_id: s for s in CompetitionStandingSnapshot.objects.filter(matchday=1)}
+        self.assertEqual(snaps[horoya.id].points, live[horoya.id]["points"])
+        self.assertEqual(snaps[horoya.id].penalty_points, live[horoya.id]["penalty_points"])
+        self.assertEqual(snaps[horoya.id].penalty_points, 4)
+
+    def test_one_refresh_per_competition_per_transaction(self):
+        horoya, hafia, kaloum = self.teams
+        for md, (h, a) in enumerate([(horoya, hafia), (hafia, kaloum), (kaloum, horoya)], start=1):
+            self._result(md, h, a, 1, 0)
+
+        target = "competitions.services.standings_history.refresh_snapshots"
+        with patch(target, wraps=refresh_snapshots) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                CompetitionMatch.objects.filter(competition=self.competition, matchday__gte=2).delete()
+        refresh.assert_called_once_with(self.competition.id, 2)
+        self.assertEqual(set(CompetitionStandingSnapshot.objects.values_list("matchday", flat=True)), {1})
+
+
+class CompetitionStandingsCacheTests(CompetitionTestCase):
+    """Classement partagé par version de compétition : un recalcul par écriture, pas par lecture."""
+
+    def test_cached_until_a_result_changes(self):
+        horoya, hafia, kaloum = self.teams
+        self._result(1, horoya, hafia, 1, 0)
+        calc = patch.object(
+            standings_service, "calculate_competition_standings", wraps=calculate_competition_standings,
+        )
+        with calc as spy:
+            first = self.client.get(self._url("standings/")).json()["standings"]
+            detail = self.client.get(self._url(f"clubs/{horoya.id}/")).json()["stats"]
+            self.client.get(self._url("standings/"))
+            self.assertEqual(spy.call_count, 1)
+            self.assertEqual((first[0]["team"]["id"], first[0]["points"]), (horoya.id, 3))
+            self.assertEqual((detail["position"], detail["points"]), (1, 3))
 
-# Create your tests here.
+            # résultat corrigé : nouvelle version, un seul recalcul
+            match = CompetitionMatch.objects.get(home_team=horoya)
+            match.home_score, match.away_score = 0, 2
+            match.save()
+            after = self.client.get(self._url("standings/")).json()["standings"]
+            detail = self.client.get(self._url(f"clubs/{hafia.id}/")).json()["stats"]
+            self.assertEqual(spy.call_count, 2)
+        self.assertEqual((after[0]["team"]["id"], after[0]["points"]), (hafia.id, 3))
+        self.assertEqual((detail["position"], detail["points"]), (1, 3))
@@ -7,6 +7,7 @@ from .api_views import (
     competition_club_detail_api,
     competition_club_matches_api,
     competition_standings_api,
+    competition_club_positions_api,
     competition_club_players_api,
     competition_match_detail,
     competition_player_detail_api,
@@ -94,6 +95,13 @@ urlpatterns = [
         name="api_competition_club_detail",
     ),
 
+    # Évolution du classement d'un club (journée par journée)
+    path(
+        "api/competitions/<int:competition_id>/clubs/<int:club_id>/positions/",
+        competition_club_positions_api,
+        name="api_competition_club_positions",
+    ),
+
     # Matchs d'un club
     path(
         "api/competitions/<int:competition_id>/clubs/<int:club_id>/matches/",
@@ -1,8 +1,12 @@
+from datetime import date as date_cls, time as time_cls
+
 from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
 
 from .models import Competition, CompetitionTeam, CompetitionMatch
+from .services.scheduling import plan_competition, write_competition_schedule
 
 
 @staff_member_required
@@ -55,6 +59,54 @@ def competition_matches_view(request, competition_id):
             )
             return redirect(request.path)
 
+        # 📅 GÉNÉRER TOUTE LA SAISON (aller/retour, un seul lot)
+        if action == "generate_schedule":
+            try:
+                start_date = date_cls.fromisoformat(request.POST.get("start_date", ""))
+                kickoffs = [
+                    time_cls.fromisoformat(k.strip())
+                    for k in request.POST.get("kickoffs", "16:00").split(",") if k.strip()
+                ]
+                blackout = [
+                    date_cls.fromisoformat(d.strip())
+                    for d in request.POST.get("blackout", "").split(",") if d.strip()
+                ]
+                spacing = max(1, int(request.POST.get("spacing_days") or 7))
+            except ValueError:
+                messages.error(request, "Date, créneau ou intervalle invalide.")
+                return redirect(request.path)
+            if not kickoffs:
+                messages.error(request, "Au moins un créneau est requis.")
+                return redirect(request.path)
+
+            replace = bool(request.POST.get("replace"))
+            plan = plan_competition(
+                competition,
+                start_date=start_date,
+                kickoffs=kickoffs,
+                spacing_days=spacing,
+                double=bool(request.POST.get("double")),
+                blackout_dates=blackout,
+                same_city_venue=bool(request.POST.get("same_city_venue")),
+                replace=replace,
+            )
+            if not plan["fixtures"]:
+                messages.error(request, "Il faut au moins 2 équipes actives.")
+                return redirect(request.path)
+            created = write_competition_schedule(competition, plan, replace=replace)
+            messages.success(
+                request,
+                f"Calendrier généré : {created} matchs sur {len(plan['days'])} journées, "
+                f"{len(plan['byes'])} exempt(s).",
+            )
+            if plan["conflicts"]:
+                messages.warning(
+                    request,
+                    f"{len(plan['conflicts'])} match(s) sans jour/créneau libre, "
+                    "laissés au jour de leur journée.",
+                )
+            return redirect(request.path)
+
         # 🔄 ACTIONS SUR MATCH EXISTANT
         match_id = request.POST.get("match_id")
         if match_id:
@@ -14,7 +14,11 @@ import re
 
 from clubs.models import Club
 from players.models import Player
+from players.aliases import RosterResolver, resolve_player_name, split_name
 from .models import Match, Round, Goal, Card, Lineup, TeamInfoPerMatch
+from .utils.events import EventIngest
+from .signals import coalesce_match_changes
+from .utils.lineups import import_lineups
 
 
 # ======================================
@@ -267,15 +271,17 @@ def _resolve_player_from_kind(kind: str, value, club=None):
         return Player.objects.filter(pk=int(value), club=club).first()
 
     if kind == "name":
-        parts = str(value).split()
-        if len(parts) >= 2:
-            first = parts[0]; last = " ".join(parts[1:])
-            pl = qs.filter(Q(first_name__iexact=first) & Q(last_name__iexact=last)).first()
-            if pl: return pl
-        pl = qs.filter(Q(first_name__iexact=str(value)) | Q(last_name__iexact=str(value))).first()
-        if pl: return pl
-        if AUTO_CREATE_PLAYERS and club:
-            first = parts[0]; last = " ".join(parts[1:]) if len(parts) > 1 else ""
+        # index d'alias du club (accents / casse / ordre prénom-nom ignorés)
+        pid = resolve_player_name(club.id, value) if club else None
+        if pid: return Player.objects.filter(pk=pid).first()
+        if not club:
+            parts = str(value).split()
+            if len(parts) >= 2:
+                pl = qs.filter(Q(first_name__iexact=parts[0]) & Q(last_name__iexact=" ".join(parts[1:]))).first()
+                if pl: return pl
+            return qs.filter(Q(first_name__iexact=str(value)) | Q(last_name__iexact=str(value))).first()
+        if AUTO_CREATE_PLAYERS:
+            first, last = split_name(value)
             return Player.objects.create(first_name=first, last_name=last, club=club)
         return None
 
@@ -428,40 +434,59 @@ def quick_events(request):
             messages.error(request, "Sélectionne un club du match.")
             return redirect("admin_quick_events")
 
-        created_goals, created_cards = 0, 0
-        with transaction.atomic():
-            for line in goals_text.splitlines():
-                parsed = _parse_goal_line(line)
-                if not parsed: continue
-                minute = parsed.get("minute", 0)
-                scorer = _resolve_player_from_kind(parsed.get("player_kind"), parsed.get("player_value"), club=club)
-                if not scorer: continue
-                assist_player = None
-                ak, av = parsed.get("assist_kind"), parsed.get("assist_value")
-                if ak: assist_player = _resolve_player_from_kind(ak, av, club=club)
-                is_pen = bool(parsed.get("is_penalty")); is_og = bool(parsed.get("is_own_goal"))
-
-                goal_kwargs = dict(match=match, club=club, minute=minute, player=scorer)
-                if assist_player:
-                    if _model_has_field(Goal, "assist"): goal_kwargs["assist"] = assist_player
-                    elif _model_has_field(Goal, "assist_player"): goal_kwargs["assist_player"] = assist_player
-                goal_kwargs = _set_goal_type_kwargs(goal_kwargs, is_pen, is_og, clear_when_false=True)
-                goal_kwargs = _ensure_csc_fallback_kwargs(goal_kwargs, is_og)
-                Goal.objects.create(**goal_kwargs); created_goals += 1
-
-            for line in cards_text.splitlines():
-                parsed = _parse_card_line(line)
-                if not parsed: continue
-                minute = parsed.get("minute", 0); color = parsed.get("color", "Y")
-                pl = _resolve_player_from_kind(parsed.get("player_kind"), parsed.get("player_value"), club=club)
-                if not pl: continue
-                card_kwargs = dict(match=match, club=club, minute=minute, player=pl)
-                card_kwargs = _set_card_color_kwargs(card_kwargs, color)
-                Card.objects.create(**card_kwargs); created_cards += 1
-
-        messages.success(request, f"Événements enregistrés: {created_goals} but(s), {created_cards} carton(s).")
+        # phase 1 : parsing de toutes les lignes (aucune requête)
+        records, skipped = [], []
+        for line in goals_text.splitlines():
+            parsed = _parse_goal_line(line)
+            if not parsed: continue
+            if not parsed.get("player_kind"): skipped.append(line.strip()); continue
+            is_pen = bool(parsed.get("is_penalty")); is_og = bool(parsed.get("is_own_goal"))
+            records.append({
+                "kind": "goal", "club_id": club.id, "minute": parsed.get("minute", 0),
+                "player": (parsed.get("player_kind"), parsed.get("player_value")),
+                "assist": (parsed.get("assist_kind"), parsed.get("assist_value")) if parsed.get("assist_kind") else None,
+                "type": _set_goal_type_kwargs({}, is_pen, is_og).get("type", ""),
+                "line": line.strip(),
+            })
+        for line in cards_text.splitlines():
+            parsed = _parse_card_line(line)
+            if not parsed: continue
+            if not parsed.get("player_kind"): skipped.append(line.strip()); continue
+            records.append({
+                "kind": "card", "club_id": club.id, "minute": parsed.get("minute", 0),
+                "player": (parsed.get("player_kind"), parsed.get("player_value")),
+                "type": _normalize_card_color(parsed.get("color", "Y")),
+                "line": line.strip(),
+            })
+
+        # phase 2 : résolution groupée (joueurs, alias) puis écriture en bulk
+        ingest = EventIngest(match, auto_create=AUTO_CREATE_PLAYERS)
+        plan = ingest.plan(records)
+        plan["skipped"] = skipped + plan["skipped"]
+
+        if request.POST.get("dry_run"):
+            ctx = _quick_events_context(request)
+            ctx.update({
+                "preview": plan,
+                "posted": {"match_id": match.id, "club_id": club.id,
+                           "goals_text": goals_text, "cards_text": cards_text},
+            })
+            return render(request, "admin/events/quick_events.html", ctx)
+
+        done = ingest.apply(plan)
+        msg = f"Événements enregistrés: {done['goals']} but(s), {done['cards']} carton(s)."
+        if done["players"]: msg += f" {done['players']} joueur(s) créé(s)."
+        messages.success(request, msg)
+        if plan["skipped"]:
+            messages.warning(request, "Lignes ignorées : " + " | ".join(plan["skipped"]))
+        if plan["ambiguous"]:
+            messages.warning(request, "Noms ambigus (plusieurs joueurs du club) : " + " | ".join(plan["ambiguous"]))
         return redirect("admin_quick_events")
 
+    return render(request, "admin/events/quick_events.html", _quick_events_context(request))
+
+
+def _quick_events_context(request):
     matches = (Match.objects.select_related("home_club","away_club","round").order_by("-id")[:100])
     ctx = {
         "STATUSES": ADMIN_STATUSES,
@@ -469,7 +494,7 @@ def quick_events(request):
         "matches": matches, "clubs": Club.objects.order_by("name"),
     }
     ctx.update(admin.site.each_context(request))
-    return render(request, "admin/events/quick_events.html", ctx)
+    return ctx
 
 
 # ======================================
@@ -712,13 +737,23 @@ def quick_lineups(request):
         away_rows = _parse_lineup_block(away_xi)
         away_rows_bench = _parse_lineup_block(away_bench)
 
-        created = 0
-        with transaction.atomic():
-            if replace:
-                Lineup.objects.filter(match=match).delete()
+        sides = [
+            (home_rows, match.home_club, True), (home_rows_bench, match.home_club, False),
+            (away_rows, match.away_club, True), (away_rows_bench, match.away_club, False),
+        ]
+        all_rows = [(club.id, r) for rows, club, _ in sides for r in rows]
+
+        to_create, unknown = [], []
+        with transaction.atomic(), coalesce_match_changes():
+            # effectifs des deux clubs chargés une fois ; un joueur introuvable
+            # n'est pas créé : la ligne garde le nom saisi et est signalée
+            roster = RosterResolver(
+                [match.home_club_id, match.away_club_id],
+                names=[r["name"] for _, r in all_rows if r["player_kind"] == "name"],
+                ids=[r["player_value"] for _, r in all_rows if r["player_kind"] == "id"],
+            )
 
             def _upsert_side(rows, club, is_starting=True):
-                nonlocal created
                 order = 0
 
                 def hasf(name: str) -> bool:
@@ -731,22 +766,10 @@ def quick_lineups(request):
                 for r in rows:
                     order += 1
                     pk, pv = r["player_kind"], r["player_value"]
-                    player = None
-                    if pk == "id" and pv:
-                        player = Player.objects.filter(id=pv).first()
-                    elif pk == "number" and pv is not None:
-                        player = Player.objects.filter(club=club, number=pv).first()
-                    elif pk == "name" and r["name"]:
-                        name = r["name"]
-                        player = Player.objects.filter(club=club, name__iexact=name).first()
-                        if not player:
-                            parts = name.split()
-                            if len(parts) >= 2:
-                                player = Player.objects.filter(
-                                    club=club,
-                                    first_name__iexact=parts[0],
-                                    last_name__iexact=" ".join(parts[1:])
-                                ).first()
+                    player = roster.resolve(club.id, pk, r["name"] if pk == "name" else pv)
+                    if not player and pk:
+                        label = r["name"] if pk == "name" else (f"#{pv}" if pk == "number" else f"id:{pv}")
+                        unknown.append(f"{club.name} : {label}")
 
                     kwargs = {"match": match, "club": club}
                     if hasf("player"): kwargs["player"] = player
@@ -766,12 +789,13 @@ def quick_lineups(request):
                     if hasf("order"): kwargs["order"] = order
                     elif hasf("sort_order"): kwargs["sort_order"] = order
 
-                    Lineup.objects.create(**kwargs); created += 1
+                    to_create.append(Lineup(**kwargs))
+
+            for rows, club, is_starting in sides:
+                _upsert_side(rows, club, is_starting=is_starting)
 
-            _upsert_side(home_rows, match.home_club, is_starting=True)
-            _upsert_side(home_rows_bench, match.home_club, is_starting=False)
-            _upsert_side(away_rows, match.away_club, is_starting=True)
-            _upsert_side(away_rows_bench, match.away_club, is_starting=False)
+            # verrou du match + seq calculés en mémoire + un seul bulk_create
+            created = len(import_lineups(match, to_create, replace=replace))
 
             if TeamInfoPerMatch is not None:
                 thi, _ = TeamInfoPerMatch.objects.get_or_create(match=match, club=match.home_club)
@@ -782,6 +806,8 @@ def quick_lineups(request):
                     tai.formation = away_form; tai.coach_name = away_coach; tai.save()
 
         messages.success(request, f"Compositions enregistrées ({created} lignes).")
+        if unknown:
+            messages.warning(request, "Joueurs introuvables (non créés) : " + " | ".join(unknown))
         return redirect("admin_quick_lineups")
 
     ctx = {"matches": matches}
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 class MatchesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'matches'
+
+    def ready(self):
+        # branche les receivers (signaux match_changed, snapshots, réveil du flux SSE,
+        # classement matérialisé)
+        from . import signals, snapshots, live_stream, standings  # noqa: F401
@@ -0,0 +1,312 @@
+# matches/live_stream.py
+"""
+Flux SSE (Server-Sent Events) des matchs en direct : GET /api/matches/live/stream/
+
+Remplace le polling de /matches/live toutes les 5 s :
+- UN diffuseur par process (LiveBroadcaster) lit la base, N abonnés reçoivent
+  les mêmes deltas → le coût DB ne dépend pas du nombre de clients.
+- La base n'est relue que si un match a changé (signal match_changed du même
+  process) ou toutes les LIVE_STREAM_RESYNC secondes (écritures faites par un
+  autre worker). Entre deux lectures, seule la minute est recalculée.
+- Aucun broker externe : tout est en mémoire, dans la boucle asyncio du serveur ASGI.
+
+Événements envoyés (format SSE `event:` / `data:` JSON) :
+  snapshot       -> {"matches": [...]} état complet à la connexion (ou après resync)
+  match          -> {"id", + champs modifiés parmi home_score/away_score/status/minute}
+  match_end      -> {"id"} le match n'est plus en direct
+  goal / card    -> nouvel événement (compact)
+  goal_removed / card_removed -> {"id", "match"}
+
+Sous WSGI (pas de boucle asyncio longue), on renvoie un unique snapshot puis on
+ferme : EventSource se reconnecte après `retry` ms (dégradé en polling).
+"""
+import asyncio
+import contextvars
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, transaction
+from django.db.models import Prefetch
+from django.dispatch import receiver
+from django.http import StreamingHttpResponse
+
+from .models import Match, Goal, Card
+from .serializers import current_minute_for
+from .signals import match_changed
+
+LIVE_STATUSES = ("LIVE", "HT", "PAUSED")
+
+TICK = getattr(settings, "LIVE_STREAM_TICK", 1.0)            # recalcul minute (s)
+RESYNC = getattr(settings, "LIVE_STREAM_RESYNC", 5.0)        # relecture DB forcée (s)
+KEEPALIVE = getattr(settings, "LIVE_STREAM_KEEPALIVE", 15.0)  # commentaire ": ping" (s)
+RETRY_MS = getattr(settings, "LIVE_STREAM_RETRY_MS", 3000)
+QUEUE_SIZE = 200
+
+
+# ----------------------------------------------------
+# Lecture DB (sync) -> état compact
+# ----------------------------------------------------
+def _player_label(p):
+    if not p:
+        return None
+    return f"{p.first_name or ''} {p.last_name or ''}".strip() or None
+
+
+def _read_live_state(extra_ids=()):
+    """
+    Une lecture = 3 requêtes (matchs + buts + cartons), quel que soit le nombre
+    d'abonnés. `extra_ids` : matchs en direct au tour précédent, relus pour
+    détecter leur fin (passage FT, suspension...).
+    """
+    qs_goals = Goal.objects.select_related("player").order_by("minute", "id")
+    qs_cards = Card.objects.select_related("player").order_by("minute", "id")
+    filt = Match.objects.filter(status__in=LIVE_STATUSES)
+    if extra_ids:
+        filt = filt | Match.objects.filter(id__in=list(extra_ids))
+    rows = (
+        filt.select_related("home_club", "away_club")
+        .prefetch_related(
+            Prefetch("goals", queryset=qs_goals),
+            Prefetch("cards", queryset=qs_cards),
+        )
+        .order_by("-datetime", "-id")
+    )
+
+    state = {}
+    for m in rows:
+        state[m.id] = {
+            "match": m,  # gardé pour recalculer la minute sans relire la base
+            "info": {
+                "id": m.id,
+                "home_name": m.home_club.name,
+                "away_name": m.away_club.name,
+                "home_score": m.home_score,
+                "away_score": m.away_score,
+                "status": m.status,
+                "minute": current_minute_for(m),
+            },
+            "goals": {
+                g.id: {"id": g.id, "match": m.id, "club": g.club_id, "minute": g.minute,
+                       "player": _player_label(g.player), "type": g.type or ""}
+                for g in m.goals.all()
+            },
+            "cards": {
+                c.id: {"id": c.id, "match": m.id, "club": c.club_id, "minute": c.minute,
+                       "player": _player_label(c.player), "type": c.type}
+                for c in m.cards.all()
+            },
+        }
+    return state
+
+
+def _read_live_state_detached(extra_ids=()):
+    # lecture hors requête : personne d'autre ne recycle la connexion
+    close_old_connections()
+    try:
+        return _read_live_state(extra_ids)
+    finally:
+        close_old_connections()
+
+
+def _is_live(entry):
+    return (entry["info"]["status"] or "").upper() in LIVE_STATUSES
+
+
+def _snapshot_payload(state):
+    out = []
+    for entry in state.values():
+        if not _is_live(entry):
+            continue
+        out.append({
+            **entry["info"],
+            "goals": list(entry["goals"].values()),
+            "cards": list(entry["cards"].values()),
+        })
+    return {"matches": out}
+
+
+def _diff(old, new):
+    """
+    Renvoie la liste [(event, data)] pour passer de `old` à `new`.
+    match_end n'est émis qu'une fois, au tour où le match quitte le direct :
+    un match déjà terminé dans `old` qui disparaît ensuite n'en émet pas d'autre.
+    """
+    events = []
+    for mid, entry in new.items():
+        info = entry["info"]
+        live = _is_live(entry)
+        prev = old.get(mid)
+
+        if prev is None:
+            if live:
+                events.append(("match", dict(info)))
+                for g in entry["goals"].values():
+                    events.append(("goal", g))
+                for c in entry["cards"].values():
+                    events.append(("card", c))
+            continue
+
+        changed = {k: v for k, v in info.items() if prev["info"].get(k) != v}
+        if changed:
+            events.append(("match", {"id": mid, **changed}))
+
+        for kind in ("goals", "cards"):
+            label = kind[:-1]
+            for eid, ev in entry[kind].items():
+                if prev[kind].get(eid) != ev:
+                    events.append((label, ev))
+            for eid in prev[kind].keys() - entry[kind].keys():
+                events.append((f"{label}_removed", {"id": eid, "match": mid}))
+
+        if not live and _is_live(prev):
+            events.append(("match_end", {"id": mid}))
+
+    for mid in old.keys() - new.keys():
+        if _is_live(old[mid]):
+            events.append(("match_end", {"id": mid}))
+    return events
+
+
+def _format(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+# ----------------------------------------------------
+# Diffuseur in-process
+# ----------------------------------------------------
+class LiveBroadcaster:
+    def __init__(self):
+        self.loop = None
+        self.subscribers = set()
+        self.state = {}
+        self.last_read = 0.0
+        self.reads = 0  # nb de lectures DB (debug / tests)
+        self._dirty = None
+        self._task = None
+
+    # --- appelé depuis n'importe quel thread (receivers de signaux) ---
+    def mark_dirty(self):
+        loop = self.loop
+        if loop is None or loop.is_closed() or self._dirty is None:
+            return
+        loop.call_soon_threadsafe(self._dirty.set)
+
+    # --- côté boucle asyncio ---
+    async def subscribe(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # nouvelle boucle (rechargement / tests) : on repart de zéro
+            self.loop = loop
+            self._dirty = asyncio.Event()
+            self._task = None
+            self.state = {}
+            self.last_read = 0.0
+
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        if not self.state or time.monotonic() - self.last_read >= RESYNC:
+            await self._refresh()
+        queue.put_nowait(_format("snapshot", _snapshot_payload(self.state)))
+        self.subscribers.add(queue)
+
+        if self._task is None or self._task.done():
+            # contexte vierge : la tâche survit à la requête qui l'a lancée
+            self._task = loop.create_task(self._run(), context=contextvars.Context())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    async def _refresh(self):
+        old = self.state
+        extra = [mid for mid, e in old.items() if _is_live(e)]
+        new = await sync_to_async(_read_live_state_detached)(extra)
+        self.state = new
+        self.last_read = time.monotonic()
+        self.reads += 1
+        return _diff(old, new)
+
+    def _tick_minutes(self):
+        events = []
+        for mid, entry in self.state.items():
+            minute = current_minute_for(entry["match"])
+            if minute != entry["info"]["minute"]:
+                entry["info"]["minute"] = minute
+                events.append(("match", {"id": mid, "minute": minute}))
+        return events
+
+    def _publish(self, events):
+        if not events:
+            return
+        chunk = "".join(_format(ev, data) for ev, data in events)
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(chunk)
+            except asyncio.QueueFull:
+                # client trop lent : on vide et on lui renvoie un état complet
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_format("snapshot", _snapshot_payload(self.state)))
+
+    async def _run(self):
+        while self.subscribers:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=TICK)
+            except asyncio.TimeoutError:
+                pass
+            dirty = self._dirty.is_set()
+            self._dirty.clear()
+            try:
+                if dirty or time.monotonic() - self.last_read >= RESYNC:
+                    events = await self._refresh()
+                else:
+                    events = self._tick_minutes()
+            except Exception:
+                # base indisponible un instant : on réessaie au prochain tour
+                continue
+            self._publish(events)
+        self._task = None
+
+
+broadcaster = LiveBroadcaster()
+
+
+@receiver(match_changed)
+def _wake_broadcaster(sender, match_id, **kwargs):
+    # après le commit : relu avant, le delta attendrait la prochaine resynchro
+    transaction.on_commit(broadcaster.mark_dirty)
+
+
+# ----------------------------------------------------
+# Vue
+# ----------------------------------------------------
+def _sse_response(stream):
+    resp = StreamingHttpResponse(stream, content_type="text/event-stream")
+    resp["Cache-Control"] = "no-cache"
+    resp["X-Accel-Buffering"] = "no"  # nginx/Render : ne pas bufferiser
+    return resp
+
+
+async def live_stream(request):
+    if not isinstance(request, ASGIRequest):
+        # WSGI : un snapshot puis fermeture (EventSource se reconnecte après RETRY_MS)
+        state = await sync_to_async(_read_live_state)()
+        body = f"retry: {RETRY_MS}\n\n" + _format("snapshot", _snapshot_payload(state))
+        return _sse_response(iter([body]))
+
+    queue = await broadcaster.subscribe()
+
+    async def events():
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return _sse_response(events())
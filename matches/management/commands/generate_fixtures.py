@@ -3,14 +3,26 @@ from __future__ import annotations
 
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
-from django.db import transaction, IntegrityError
-from django.db.models import F, Q
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 
-from datetime import date as date_cls, time as time_cls, datetime, timedelta
+from datetime import date as date_cls, time as time_cls, timedelta
+import json
 import re
+import time
 
 from clubs.models import Club
-from matches.models import Round, Match
+from competitions.models import Competition
+from competitions.services.scheduling import plan_competition, write_competition_schedule
+from matches.models import Round
+from matches.scheduling import (
+    berger_rounds,
+    club_busy_days,
+    club_venues,
+    next_round_number,
+    plan_schedule,
+    write_league_schedule,
+)
 
 
 def parse_iso_date(s: str) -> date_cls:
@@ -28,57 +40,6 @@ def parse_hhmm(s: str) -> time_cls:
         raise CommandError("Format invalide pour --kickoff. Utilise HH:MM (ex: 16:00).")
 
 
-def make_aware(dt: datetime) -> datetime:
-    # Protéger contre les datetimes naïfs.
-    if timezone.is_naive(dt):
-        return timezone.make_aware(dt, timezone.get_current_timezone())
-    return dt
-
-
-def round_robin_pairs(teams):
-    """
-    Algorithme "circle method".
-    Retourne une liste de journées ; chaque journée = liste de paires (home, away).
-    Si nombre d'équipes impair, on ajoute un BYE (None) qui sera ignoré.
-    """
-    teams = list(teams)
-    if len(teams) % 2 == 1:
-        teams.append(None)
-
-    n = len(teams)
-    half = n // 2
-    rounds = []
-
-    cur = teams[:]  # on travaille sur une copie
-
-    for r in range(n - 1):
-        pairs = []
-        for i in range(half):
-            t1 = cur[i]
-            t2 = cur[n - 1 - i]
-            if t1 is None or t2 is None:
-                # journée de repos (BYE)
-                continue
-
-            # Petite alternance home/away pour équilibrer
-            if i == 0 and (r % 2 == 1):
-                pairs.append((t2, t1))
-            else:
-                pairs.append((t1, t2))
-
-        rounds.append(pairs)
-
-        # rotation (en conservant le premier fixe)
-        cur = [cur[0]] + [cur[-1]] + cur[1:-1]
-
-    return rounds
-
-
-def mirror_rounds(rounds):
-    """Crée le retour (inversion domicile/extérieur) à partir de l'aller."""
-    return [[(b, a) for (a, b) in day] for day in rounds]
-
-
 def max_existing_round_number() -> int:
     """
     Détecte le plus grand numéro de journée existante de type "J<number>".
@@ -95,8 +56,26 @@ def max_existing_round_number() -> int:
     return max(nums) if nums else 0
 
 
+def parse_kickoffs(s: str):
+    return [parse_hhmm(part.strip()) for part in str(s).split(",") if part.strip()]
+
+
+def parse_dates(s: str):
+    out = []
+    for part in str(s or "").split(","):
+        if part.strip():
+            try:
+                out.append(date_cls.fromisoformat(part.strip()))
+            except Exception:
+                raise CommandError(f"Date invalide pour --blackout : {part!r} (YYYY-MM-DD).")
+    return out
+
+
 class Command(BaseCommand):
-    help = "Génère un calendrier (journées + matches) en round-robin pour les clubs existants."
+    help = (
+        "Génère un calendrier aller/retour équilibré (exempts, créneaux, conflits de "
+        "stade et de dates) pour le championnat ou une compétition, inséré en un lot."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -106,111 +85,173 @@ class Command(BaseCommand):
         )
         parser.add_argument(
             "--start-date",
-            required=True,
             help="Date de départ des journées (YYYY-MM-DD), ex: 2025-10-01",
         )
         parser.add_argument(
             "--kickoff",
             default="16:00",
-            help="Heure de coup d'envoi pour tous les matches (HH:MM). Défaut: 16:00",
+            help="Créneau(x) de coup d'envoi HH:MM, séparés par des virgules (ex: 15:00,17:30). Défaut: 16:00",
         )
         parser.add_argument(
             "--spacing-days",
             type=int,
             default=7,
-            help="Nombre de jours entre deux journées (défaut: 7).",
+            help="Nombre de jours entre deux journées (défaut: 7) ; un match peut glisser dans cette fenêtre.",
         )
         parser.add_argument(
             "--double",
             action="store_true",
             help="Génère aller + retour (double round-robin).",
         )
+        parser.add_argument(
+            "--blackout",
+            default="",
+            help="Dates sans match, séparées par des virgules (YYYY-MM-DD,...).",
+        )
+        parser.add_argument(
+            "--no-venues",
+            action="store_true",
+            help="Ignore les stades des clubs (pas de contrainte un match par stade et par créneau).",
+        )
+        parser.add_argument(
+            "--competition",
+            type=int,
+            help="Génère les CompetitionMatch de cette compétition au lieu du championnat.",
+        )
+        parser.add_argument(
+            "--same-city-venue",
+            action="store_true",
+            help="(--competition) Deux équipes de la même ville ne reçoivent pas au même créneau.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Calcule et affiche le plan sans rien écrire.",
+        )
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            metavar="N",
+            help="Mesure la génération d'une saison aller/retour à N équipes (écritures annulées).",
+        )
 
-    @transaction.atomic
     def handle(self, *args, **opts):
-        # Récupérer et parser les options
+        if opts.get("benchmark"):
+            return self._benchmark(opts)
+
+        if not opts.get("start_date"):
+            raise CommandError("--start-date est requis.")
         start_date = parse_iso_date(opts["start_date"])
-        kickoff = parse_hhmm(opts["kickoff"])
+        kickoffs = parse_kickoffs(opts["kickoff"])
+        if not kickoffs:
+            raise CommandError("Au moins un créneau --kickoff est requis.")
         spacing = int(opts["spacing_days"])
         make_double = bool(opts["double"])
         do_reset = bool(opts["reset"])
+        blackout = parse_dates(opts["blackout"])
+
+        if opts.get("competition"):
+            return self._competition(opts, start_date, kickoffs, spacing, make_double, do_reset, blackout)
 
-        # Sécurité : y a-t-il des clubs ?
-        clubs = list(Club.objects.order_by("id"))
-        if len(clubs) < 2:
+        club_ids = list(Club.objects.order_by("id").values_list("id", flat=True))
+        if len(club_ids) < 2:
             raise CommandError("Il faut au moins 2 clubs pour générer un calendrier.")
 
-        # Reset si demandé
+        rounds = berger_rounds(club_ids, double=make_double)
+        # fenêtre couverte par la saison : matchs déjà programmés ces jours-là évités
+        end_date = start_date + timedelta(days=max(1, spacing) * (len(rounds) + 1))
+        busy = {} if do_reset else club_busy_days(club_ids, start_date, end_date)
+        venues = {} if opts["no_venues"] else club_venues(club_ids)
+
+        plan = plan_schedule(
+            rounds, start_date=start_date, kickoffs=kickoffs, spacing_days=spacing,
+            venues=venues, blackout_dates=blackout, team_blackouts=busy,
+        )
+        self._report(plan)
+        if opts["dry_run"]:
+            self.stdout.write(self.style.WARNING("Simulation : rien n'a été écrit."))
+            return
+
         if do_reset:
             self.stdout.write(self.style.WARNING("→ Réinitialisation demandée : suppression rounds + matches…"))
-            # Matches en premier (supprime aussi Goals/Cards via CASCADE), puis Rounds
-            Match.objects.all().delete()
-            Round.objects.all().delete()
-            self.stdout.write(self.style.SUCCESS("✓ Base vidée (rounds & matches)."))
-
-        # Calcule l'indice de départ des journées (si on ne reset pas, on continue)
-        start_number = 1 if do_reset else (max_existing_round_number() + 1)
-
-        # Construire l'aller
-        fixtures = round_robin_pairs(clubs)
-        if make_double:
-            fixtures = fixtures + mirror_rounds(fixtures)
-
-        total_days = len(fixtures)
-        self.stdout.write(f"→ Génération de {total_days} journée(s)…")
-
-        created_rounds = 0
-        created_matches = 0
-        skipped_matches = 0
-
-        for day_index, pairs in enumerate(fixtures, start=0):
-            round_number = start_number + day_index
-            round_name = f"J{round_number}"
-
-            # Date de la journée
-            day_date = start_date + timedelta(days=spacing * day_index)
-            round_obj, r_created = Round.objects.get_or_create(
-                name=round_name,
-                defaults={"date": day_date},
-            )
-            if not r_created:
-                # Met à jour la date si non renseignée
-                if not round_obj.date:
-                    round_obj.date = day_date
-                    round_obj.save(update_fields=["date"])
-            created_rounds += int(r_created)
-
-            # Datetime du coup d'envoi (même heure pour tous)
-            dt = make_aware(datetime.combine(day_date, kickoff))
-
-            for home, away in pairs:
-                # Unicité garantie par ta contrainte (round, home_club, away_club)
-                try:
-                    match, m_created = Match.objects.get_or_create(
-                        round=round_obj,
-                        home_club=home,
-                        away_club=away,
-                        defaults={
-                            "datetime": dt,
-                            "home_score": 0,
-                            "away_score": 0,
-                            "status": "SCHEDULED",
-                            "minute": 0,
-                            "venue": "",
-                            "buteur": "",
-                        },
-                    )
-                except IntegrityError:
-                    # Si contrainte d'unicité déclenchée : match déjà présent → on ignore
-                    m_created = False
-                    match = None
-
-                if m_created:
-                    created_matches += 1
-                else:
-                    skipped_matches += 1
-
+        first_number = 1 if do_reset else max(next_round_number(), max_existing_round_number() + 1)
+        created_rounds, created_matches = write_league_schedule(
+            plan, replace=do_reset, first_number=first_number
+        )
         self.stdout.write(self.style.SUCCESS(
-            f"✓ Terminé. Journées créées: {created_rounds} • "
-            f"Matches créés: {created_matches} • Ignorés (déjà existants): {skipped_matches}"
+            f"✓ Terminé. Journées créées: {created_rounds} • Matches créés: {created_matches}"
         ))
+
+    # ---------- compétition ----------
+    def _competition(self, opts, start_date, kickoffs, spacing, make_double, do_reset, blackout):
+        competition = Competition.objects.filter(pk=opts["competition"]).first()
+        if not competition:
+            raise CommandError(f"Compétition {opts['competition']} introuvable.")
+        plan = plan_competition(
+            competition, start_date=start_date, kickoffs=kickoffs, spacing_days=spacing,
+            double=make_double, blackout_dates=blackout,
+            same_city_venue=opts["same_city_venue"], replace=do_reset,
+        )
+        if not plan["fixtures"]:
+            raise CommandError("Il faut au moins 2 équipes actives pour générer un calendrier.")
+        self._report(plan)
+        if opts["dry_run"]:
+            self.stdout.write(self.style.WARNING("Simulation : rien n'a été écrit."))
+            return
+        created = write_competition_schedule(competition, plan, replace=do_reset)
+        self.stdout.write(self.style.SUCCESS(f"✓ Terminé. Matches créés: {created}"))
+
+    def _report(self, plan):
+        self.stdout.write(
+            f"→ {len(plan['days'])} journée(s), {len(plan['fixtures'])} match(s), "
+            f"{len(plan['byes'])} exempt(s), {len(plan['conflicts'])} conflit(s)."
+        )
+        for c in plan["conflicts"]:
+            self.stdout.write(self.style.WARNING(
+                f"  ! J{c['matchday']} {c['home']} - {c['away']} : aucun jour/créneau libre, "
+                f"laissé au {c['date']:%Y-%m-%d}"
+            ))
+
+    # ---------- benchmark ----------
+    def _benchmark(self, opts):
+        n = int(opts["benchmark"])
+        if n < 2:
+            raise CommandError("--benchmark attend au moins 2 équipes.")
+        kickoffs = parse_kickoffs(opts["kickoff"]) or [time_cls(16, 0)]
+        start_date = parse_iso_date(opts["start_date"]) if opts.get("start_date") else timezone.localdate()
+
+        result = {}
+        with transaction.atomic():
+            Club.objects.bulk_create([
+                Club(name=f"__bench_{i}", stadium=f"Stade {i // 2}") for i in range(n)
+            ])
+            # bulk_create ne renvoie pas les pk sur MySQL : relecture par nom
+            club_ids = list(
+                Club.objects.filter(name__in=[f"__bench_{i}" for i in range(n)])
+                .order_by("id").values_list("id", flat=True)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                t0 = time.perf_counter()
+                plan = plan_schedule(
+                    berger_rounds(club_ids, double=True), start_date=start_date,
+                    kickoffs=kickoffs, spacing_days=int(opts["spacing_days"]),
+                    venues=club_venues(club_ids),
+                )
+                t1 = time.perf_counter()
+                created_rounds, created_matches = write_league_schedule(
+                    plan, first_number=next_round_number()
+                )
+                t2 = time.perf_counter()
+            result = {
+                "teams": n,
+                "rounds": created_rounds,
+                "matches": created_matches,
+                "conflicts": len(plan["conflicts"]),
+                "plan_ms": round((t1 - t0) * 1000, 1),
+                "write_ms": round((t2 - t1) * 1000, 1),
+                "total_ms": round((t2 - t0) * 1000, 1),
+                "queries": len(queries),
+            }
+            # rien ne reste en base
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps(result))
@@ -0,0 +1,68 @@
+# matches/management/commands/generate_league.py
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from profootgn.synthetic import DEFAULT_PREFIX, delete_synthetic, generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère une ligue synthétique (clubs, effectifs, saisons aller/retour, buts, cartons, "
+        "compos de 18 notées, direct, compétitions, pubs) pour mesurer l'API à l'échelle. "
+        "Affiche un résumé JSON. À ne pas lancer sur la base de production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clubs", type=int, default=16, help="Clubs du championnat (défaut: 16).")
+        parser.add_argument("--squad-size", type=int, default=25, help="Joueurs par club / équipe (défaut: 25).")
+        parser.add_argument("--seasons", type=int, default=1, help="Saisons successives (défaut: 1).")
+        parser.add_argument(
+            "--played", type=float, default=2 / 3,
+            help="Part jouée de la dernière saison, entre 0 et 1 (défaut: 0.67).",
+        )
+        parser.add_argument("--live", type=int, default=2, help="Matchs en direct (défaut: 2).")
+        parser.add_argument("--competitions", type=int, default=1, help="Compétitions (défaut: 1).")
+        parser.add_argument("--competition-teams", type=int, default=12, help="Équipes par compétition (défaut: 12).")
+        parser.add_argument("--ads", type=int, default=5, help="Publicités (défaut: 5).")
+        parser.add_argument("--ad-events", type=int, default=200, help="Impressions / clics par pub (défaut: 200).")
+        parser.add_argument("--spacing-days", type=int, default=7, help="Jours entre deux journées (défaut: 7).")
+        parser.add_argument("--seed", type=int, help="Graine aléatoire (même graine = mêmes données).")
+        parser.add_argument(
+            "--prefix", default=DEFAULT_PREFIX,
+            help=f"Préfixe des noms générés (défaut: {DEFAULT_PREFIX}) ; sert à --reset.",
+        )
+        parser.add_argument(
+            "--reset", action="store_true",
+            help="Supprime d'abord les données déjà générées avec ce préfixe.",
+        )
+        parser.add_argument(
+            "--delete", action="store_true",
+            help="Supprime les données générées avec ce préfixe, sans rien générer.",
+        )
+
+    def handle(self, *args, **opts):
+        prefix = opts["prefix"].strip()
+        if not prefix:
+            raise CommandError("--prefix ne peut pas être vide.")
+        if not 0 <= opts["played"] <= 1:
+            raise CommandError("--played attend une valeur entre 0 et 1.")
+
+        t0 = time.perf_counter()
+        result = {}
+        if opts["reset"] or opts["delete"]:
+            result["deleted"] = delete_synthetic(prefix)
+        if not opts["delete"]:
+            try:
+                result.update(generate(
+                    clubs=opts["clubs"], squad_size=opts["squad_size"], seasons=opts["seasons"],
+                    played=opts["played"], live=opts["live"], competitions=opts["competitions"],
+                    competition_teams=opts["competition_teams"], ads=opts["ads"],
+                    ad_events=opts["ad_events"], spacing_days=opts["spacing_days"],
+                    prefix=prefix, seed=opts["seed"],
+                ))
+            except ValueError as e:
+                raise CommandError(str(e))
+        result["seconds"] = round(time.perf_counter() - t0, 2)
+        self.stdout.write(json.dumps(result, ensure_ascii=False))
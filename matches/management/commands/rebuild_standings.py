@@ -0,0 +1,34 @@
+# matches/management/commands/rebuild_standings.py
+from django.core.management.base import BaseCommand, CommandError
+
+from matches.standings import rebuild_standings, verify_standings
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit le classement matérialisé (matches.StandingRow) depuis les matchs "
+        "terminés. --verify : compare seulement, sans rien écrire (code retour ≠ 0 si écart)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Vérifie le classement stocké contre un recalcul complet, sans l'écrire.",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["verify"]:
+            diffs = verify_standings()
+            if not diffs:
+                self.stdout.write(self.style.SUCCESS("✅ Classement stocké conforme."))
+                return
+            for club_id, field, have, expected in diffs:
+                self.stdout.write(f"club #{club_id} {field}: stocké={have} attendu={expected}")
+            raise CommandError(f"{len(diffs)} écart(s) — lancer rebuild_standings sans --verify.")
+
+        n = rebuild_standings()
+        self.stdout.write(self.style.SUCCESS(f"✅ Classement reconstruit ({n} clubs)."))
+        diffs = verify_standings()
+        if diffs:
+            raise CommandError(f"{len(diffs)} écart(s) après reconstruction.")
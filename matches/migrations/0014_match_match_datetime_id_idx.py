@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0003_alter_club_logo_alter_staffmember_photo'),
+        ('matches', '0013_alter_lineup_options_lineup_seq_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['datetime', 'id'], name='match_datetime_id_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_standings(apps, schema_editor):
+    """Remplit le classement matérialisé à partir des matchs déjà joués."""
+    from matches.standings import compute_rows, COUNTERS
+
+    Club = apps.get_model("clubs", "Club")
+    Match = apps.get_model("matches", "Match")
+    StandingRow = apps.get_model("matches", "StandingRow")
+
+    computed = compute_rows(match_model=Match)
+    StandingRow.objects.bulk_create([
+        StandingRow(club_id=cid, **computed.get(cid, dict.fromkeys(COUNTERS, 0)))
+        for cid in Club.objects.values_list("id", flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0003_alter_club_logo_alter_staffmember_photo'),
+        ('matches', '0014_match_match_datetime_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandingRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('played', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('goals_for', models.IntegerField(default=0)),
+                ('goals_against', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('club', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='standing', to='clubs.club')),
+            ],
+            options={
+                'verbose_name': 'Ligne de classement',
+                'verbose_name_plural': 'Classement (matérialisé)',
+            },
+        ),
+        migrations.RunPython(fill_standings, migrations.RunPython.noop),
+    ]
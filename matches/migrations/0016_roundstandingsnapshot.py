@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_snapshots(apps, schema_editor):
+    """Calcule l'historique des classements par journée déjà jouée."""
+    from matches.standings import refresh_round_snapshots
+
+    refresh_round_snapshots()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0003_alter_club_logo_alter_staffmember_photo'),
+        ('matches', '0015_standingrow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoundStandingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('round_number', models.PositiveIntegerField()),
+                ('position', models.PositiveIntegerField()),
+                ('played', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('goals_for', models.IntegerField(default=0)),
+                ('goals_against', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('club', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standing_snapshots', to='clubs.club')),
+            ],
+            options={
+                'verbose_name': 'Classement par journée',
+                'verbose_name_plural': 'Classements par journée',
+                'ordering': ['round_number', 'position'],
+                'indexes': [models.Index(fields=['club', 'round_number'], name='matches_rou_club_id_0222d3_idx')],
+                'constraints': [models.UniqueConstraint(fields=('round_number', 'club'), name='uniq_round_snapshot_club')],
+            },
+        ),
+        migrations.RunPython(fill_snapshots, migrations.RunPython.noop),
+    ]
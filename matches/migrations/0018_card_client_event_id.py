@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-16 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0003_alter_club_logo_alter_staffmember_photo'),
+        ('matches', '0017_goal_client_event_id'),
+        ('players', '0004_playeralias'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='client_event_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='card',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_event_id__isnull', False)), fields=('match', 'client_event_id'), name='uniq_card_client_event'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db.models import Max
@@ -99,6 +99,10 @@ class Match(models.Model):
 
     class Meta:
         ordering = ["datetime"]
+        indexes = [
+            # pagination keyset / export (datetime, id)
+            models.Index(fields=["datetime", "id"], name="match_datetime_id_idx"),
+        ]
         constraints = [
             # Interdit home == away
             models.CheckConstraint(
@@ -112,6 +116,12 @@ class Match(models.Model):
             ),
         ]
 
+    def save(self, *args, **kwargs):
+        # pre_save (état précédent verrouillé) et post_save (deltas du classement)
+        # dans la même transaction : cf. matches/standings.py
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     # -------- Helpers utiles pour debug / admin rapide --------
     def is_live_now(self):
         """
@@ -194,6 +204,19 @@ class Goal(models.Model):
     # Champs facultatifs pour tags (penalty/CSC) si tes serializers les utilisent
     type = models.CharField(max_length=12, blank=True, default="")  # "PEN", "OG", etc.
 
+    # Identifiant fourni par le client (saisie bord terrain) : un envoi rejoué
+    # met à jour le même but au lieu de le dupliquer (cf. GoalViewSet.bulk)
+    client_event_id = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["match", "client_event_id"],
+                condition=models.Q(client_event_id__isnull=False),
+                name="uniq_goal_client_event",
+            ),
+        ]
+
     def __str__(self):
         who = self.player or self.assist_name or f"#{self.pk}"
         return f"{who} {self.minute}'"
@@ -212,6 +235,18 @@ class Card(models.Model):
     # L'admin/serializer peuvent mapper "color"/"card_type" -> type
     type = models.CharField(max_length=1, choices=CARD_TYPES)
 
+    # cf. Goal.client_event_id
+    client_event_id = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["match", "client_event_id"],
+                condition=models.Q(client_event_id__isnull=False),
+                name="uniq_card_client_event",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.player} {self.get_type_display()} {self.minute}'"
 
@@ -333,3 +368,70 @@ class Lineup(models.Model):
         )
         tag = "XI" if self.is_starting else "SUB"
         return f"{self.match_id}:{self.club_id} {tag} {name} (seq={self.seq})"
+
+
+# -----------------------------------
+# Classement matérialisé (matchs terminés uniquement)
+# -----------------------------------
+class StandingRow(models.Model):
+    """
+    Une ligne par club, tenue à jour par deltas (matches/standings.py) à chaque
+    changement de score/statut d'un match. Seuls les matchs FT/FINISHED comptent ;
+    le direct est superposé à la lecture (include_live).
+    Reconstruction / vérification : `manage.py rebuild_standings [--verify]`.
+    """
+    club = models.OneToOneField(Club, on_delete=models.CASCADE, related_name="standing")
+    played = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    goals_for = models.IntegerField(default=0)
+    goals_against = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Ligne de classement"
+        verbose_name_plural = "Classement (matérialisé)"
+
+    @property
+    def goal_diff(self):
+        return self.goals_for - self.goals_against
+
+    def __str__(self):
+        return f"{self.club} • {self.points} pts"
+
+
+class RoundStandingSnapshot(models.Model):
+    """
+    Classement d'un club APRÈS la journée `round_number` (Round.number),
+    matchs terminés uniquement. Recalculé à partir de la journée modifiée.
+    """
+    round_number = models.PositiveIntegerField()
+    club = models.ForeignKey(Club, on_delete=models.CASCADE, related_name="standing_snapshots")
+    position = models.PositiveIntegerField()
+    played = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    goals_for = models.IntegerField(default=0)
+    goals_against = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["round_number", "position"]
+        verbose_name = "Classement par journée"
+        verbose_name_plural = "Classements par journée"
+        constraints = [
+            models.UniqueConstraint(fields=["round_number", "club"], name="uniq_round_snapshot_club"),
+        ]
+        indexes = [
+            models.Index(fields=["club", "round_number"]),
+        ]
+
+    @property
+    def goal_diff(self):
+        return self.goals_for - self.goals_against
+
+    def __str__(self):
+        return f"J{self.round_number} • {self.position}. {self.club}"
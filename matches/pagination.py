@@ -0,0 +1,100 @@
+# matches/pagination.py
+"""
+Pagination « keyset » (curseur) des matchs sur (datetime, id).
+
+Contrairement à LIMIT/OFFSET, chaque page coûte le même prix quelle que soit
+sa profondeur (index matches_match(datetime, id)) et reste stable si des
+matchs sont ajoutés pendant la navigation.
+
+    GET /api/matches/                            -> 1ère page (DEFAULT_PAGE_SIZE matchs)
+    GET /api/matches/?page_size=50&cursor=<next> -> page suivante
+    GET /api/matches/?ordering=datetime&...      -> ordre chronologique (défaut : plus récents d'abord)
+    GET /api/matches/?stream=1                   -> tout, en tableau streamé (export)
+
+Réponse : {"next": <url|null>, "results": [...]}
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(dt, pk):
+    raw = json.dumps([dt.isoformat(), pk], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token.encode("ascii"))
+        iso, pk = json.loads(raw)
+        dt = parse_datetime(iso)
+        if dt is None:
+            raise ValueError
+        return dt, int(pk)
+    except Exception:
+        raise NotFound("Curseur invalide.")
+
+
+def descending(request):
+    # seul l'ordre par date est compatible avec le curseur ; défaut : décroissant
+    return str(request.query_params.get("ordering", "")).strip() != "datetime"
+
+
+def keyset_order(qs, desc=True):
+    return qs.order_by("-datetime", "-id") if desc else qs.order_by("datetime", "id")
+
+
+def keyset_after(qs, dt, pk, desc=True):
+    """Lignes strictement après (dt, pk) dans l'ordre choisi."""
+    if desc:
+        return qs.filter(Q(datetime__lt=dt) | Q(datetime=dt, id__lt=pk))
+    return qs.filter(Q(datetime__gt=dt) | Q(datetime=dt, id__gt=pk))
+
+
+class MatchKeysetPagination(BasePagination):
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, DEFAULT_PAGE_SIZE))
+        except (TypeError, ValueError):
+            size = DEFAULT_PAGE_SIZE
+        return max(1, min(size, MAX_PAGE_SIZE))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        desc = descending(request)
+        size = self.get_page_size(request)
+
+        qs = keyset_order(queryset, desc)
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            qs = keyset_after(qs, *decode_cursor(token), desc=desc)
+
+        # une ligne de plus pour savoir s'il existe une page suivante
+        rows = list(qs[: size + 1])
+        self.has_next = len(rows) > size
+        rows = rows[:size]
+        self.last = rows[-1] if rows else None
+        return rows
+
+    def get_next_link(self):
+        if not (self.has_next and self.last):
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, encode_cursor(self.last.datetime, self.last.pk)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
@@ -0,0 +1,251 @@
+# matches/scheduling.py
+"""
+Moteur de calendrier (championnat aller / retour), commun au championnat
+(Match / Round) et aux compétitions (CompetitionMatch, voir
+competitions/services/scheduling.py).
+
+1. berger_rounds(teams, double=True) : journées par la méthode du cercle.
+   - nombre impair : une équipe exempte par journée (listée dans `byes`) ;
+   - domicile / extérieur alternés : au plus un écart d'un match à domicile
+     sur l'aller, exactement n-1 sur la saison (le retour est le miroir) ;
+2. plan_schedule(...) : date + créneau de chaque match, en mémoire :
+   - journée i le `start + spacing * i`, décalée si la date est interdite ;
+   - créneaux (kickoffs) répartis ; un stade ne reçoit qu'un match par
+     créneau et par jour ;
+   - équipe indisponible ce jour-là (date interdite, déjà un match) : le match
+     glisse au jour suivant, sans sortir de la fenêtre de la journée ;
+   - conflit insoluble : match laissé au jour de la journée et listé dans `conflicts`.
+3. write_league_schedule(...) : Round + Match en une transaction (2 bulk_create).
+
+    teams = list(Club.objects.values_list("id", flat=True))
+    plan = plan_schedule(berger_rounds(teams), start_date=date(2025, 10, 4),
+                         kickoffs=[time(15), time(17, 30)], venues=club_venues(teams))
+    write_league_schedule(plan)
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from clubs.models import Club
+from .models import Match, Round
+from .signals import coalesce_match_changes
+
+BYE = None
+
+
+# =========================
+# Journées (méthode du cercle)
+# =========================
+def berger_rounds(teams, double=True):
+    """
+    [[(home, away), ...], ...] : une liste de paires par journée.
+    Le dernier élément reste fixe, les autres tournent ; le sens des paires
+    alterne pour minimiser les enchaînements domicile/domicile.
+    """
+    teams = list(teams)
+    if len(teams) % 2 == 1:
+        teams.append(BYE)
+    n = len(teams)
+    if n < 2:
+        return []
+
+    m = n - 1
+    first_leg = []
+    for r in range(m):
+        day = [(teams[r], teams[m]) if r % 2 == 0 else (teams[m], teams[r])]
+        for k in range(1, n // 2):
+            a, b = teams[(r + k) % m], teams[(r - k) % m]
+            day.append((a, b) if k % 2 == 1 else (b, a))
+        first_leg.append(day)
+
+    rounds = first_leg
+    if double:
+        rounds = first_leg + [[(b, a) for a, b in day] for day in first_leg]
+    return rounds
+
+
+def split_byes(rounds):
+    """(journées sans paires BYE, {indice de journée: équipe exempte})."""
+    clean, byes = [], {}
+    for i, day in enumerate(rounds):
+        kept = []
+        for home, away in day:
+            if home is BYE or away is BYE:
+                byes[i] = away if home is BYE else home
+            else:
+                kept.append((home, away))
+        clean.append(kept)
+    return clean, byes
+
+
+# =========================
+# Dates / créneaux
+# =========================
+def _aware(day, kickoff):
+    dt = datetime.combine(day, kickoff)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt, timezone.get_current_timezone())
+    return dt
+
+
+def plan_schedule(
+    rounds,
+    *,
+    start_date,
+    kickoffs,
+    spacing_days=7,
+    venues=None,
+    blackout_dates=(),
+    team_blackouts=None,
+    first_matchday=1,
+):
+    """
+    rounds         : sortie de berger_rounds (paires BYE comprises)
+    kickoffs       : heures de coup d'envoi (datetime.time), au moins une
+    venues         : {équipe: stade} (absent / vide = pas de contrainte de stade)
+    blackout_dates : dates sans aucun match
+    team_blackouts : {équipe: {dates}} (indisponibilités, matchs déjà programmés)
+
+    Renvoie {"fixtures": [{"matchday", "home", "away", "datetime", "venue"}],
+             "byes": {matchday: équipe}, "conflicts": [{...}], "days": {matchday: date}}.
+    Aucune requête.
+    """
+    kickoffs = list(kickoffs) or []
+    if not kickoffs:
+        raise ValueError("Au moins un créneau (kickoff) est requis.")
+    venues = venues or {}
+    blackout = set(blackout_dates or ())
+    busy = defaultdict(set)
+    for team, days in (team_blackouts or {}).items():
+        busy[team].update(days)
+
+    rounds, byes = split_byes(rounds)
+    window = max(1, int(spacing_days or 1))
+    used_slots = set()  # (stade, jour, créneau)
+
+    fixtures, conflicts, days = [], [], {}
+    prev_day = None
+    for i, pairs in enumerate(rounds):
+        matchday = first_matchday + i
+        day = start_date + timedelta(days=window * i)
+        if prev_day is not None and day <= prev_day:
+            day = prev_day + timedelta(days=1)
+        while day in blackout:
+            day += timedelta(days=1)
+        days[matchday] = prev_day = day
+        candidates = [day + timedelta(days=d) for d in range(window)]
+
+        for j, (home, away) in enumerate(pairs):
+            venue = venues.get(home) or ""
+            placed = None
+            for d in candidates:
+                if d in blackout or d in busy[home] or d in busy[away]:
+                    continue
+                # créneaux répartis : chaque match commence à un créneau différent
+                for s in range(len(kickoffs)):
+                    slot = kickoffs[(j + s) % len(kickoffs)]
+                    if venue and (venue, d, slot) in used_slots:
+                        continue
+                    placed = (d, slot)
+                    break
+                if placed:
+                    break
+            if placed is None:
+                placed = (day, kickoffs[j % len(kickoffs)])
+                conflicts.append({
+                    "matchday": matchday, "home": home, "away": away,
+                    "date": day, "venue": venue,
+                })
+            d, slot = placed
+            if venue:
+                used_slots.add((venue, d, slot))
+            busy[home].add(d)
+            busy[away].add(d)
+            fixtures.append({
+                "matchday": matchday, "home": home, "away": away,
+                "datetime": _aware(d, slot), "venue": venue,
+            })
+
+    return {
+        "fixtures": fixtures,
+        "byes": {first_matchday + i: t for i, t in byes.items()},
+        "conflicts": conflicts,
+        "days": days,
+    }
+
+
+# =========================
+# Championnat (Match / Round)
+# =========================
+def club_venues(club_ids):
+    """{club_id: stade} (1 requête)."""
+    return {
+        cid: (stadium or "").strip()
+        for cid, stadium in Club.objects.filter(id__in=club_ids).values_list("id", "stadium")
+    }
+
+
+def club_busy_days(club_ids, start_date, end_date):
+    """{club_id: {dates}} des matchs déjà programmés sur la période (1 requête)."""
+    club_ids = set(club_ids)
+    busy = defaultdict(set)
+    for home, away, dt in (
+        Match.objects.filter(datetime__date__gte=start_date, datetime__date__lte=end_date)
+        .filter(Q(home_club_id__in=club_ids) | Q(away_club_id__in=club_ids))
+        .values_list("home_club_id", "away_club_id", "datetime")
+    ):
+        day = timezone.localtime(dt).date() if timezone.is_aware(dt) else dt.date()
+        for cid in (home, away):
+            if cid in club_ids:
+                busy[cid].add(day)
+    return busy
+
+
+def next_round_number():
+    return (Round.objects.aggregate(m=Max("number"))["m"] or 0) + 1
+
+
+@transaction.atomic
+def write_league_schedule(plan, *, replace=False, first_number=None):
+    """
+    Insère les journées (Round) puis les matchs en 2 bulk_create.
+    replace      : supprime d'abord tous les matchs et journées (comme --reset).
+    first_number : numéro de la 1re journée créée (défaut : après la dernière existante).
+    Renvoie (journées créées, matchs créés).
+    """
+    from stats.stamps import bump, model_key, MATCHES, STANDINGS
+
+    if replace:
+        # suppressions : une notification par match, pas une par but / carton
+        with coalesce_match_changes():
+            Match.objects.all().delete()
+            Round.objects.all().delete()
+
+    if first_number is None:
+        first_number = next_round_number()
+    offset = first_number - min(plan["days"], default=1)
+    rounds = Round.objects.bulk_create([
+        Round(name=f"J{md + offset}", number=md + offset, date=day)
+        for md, day in sorted(plan["days"].items())
+    ])
+    # bulk_create ne renvoie pas les pk sur MySQL : relecture par numéro (unique)
+    round_ids = dict(
+        Round.objects.filter(number__in=[r.number for r in rounds]).values_list("number", "id")
+    )
+
+    matches = Match.objects.bulk_create([
+        Match(
+            round_id=round_ids[f["matchday"] + offset],
+            home_club_id=f["home"], away_club_id=f["away"],
+            datetime=f["datetime"], venue=f["venue"][:120],
+            status="SCHEDULED",
+        )
+        for f in plan["fixtures"]
+    ], batch_size=1000)
+
+    # bulk_create n'émet pas post_save : versions (ETag, caches) à la main
+    bump(MATCHES, STANDINGS, model_key(Round))
+    return len(rounds), len(matches)
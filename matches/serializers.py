@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.utils import timezone
 
+from profootgn.cache import media_url
+
 from .models import (
     Match, Goal, Card, Round,
     Lineup, TeamInfoPerMatch,
@@ -9,6 +11,7 @@ from .models import (
 # Managers inverses dynamiques (goals/cards)
 GOALS_REL_NAME = Goal._meta.get_field("match").remote_field.get_accessor_name()
 CARDS_REL_NAME = Card._meta.get_field("match").remote_field.get_accessor_name()
+TEAM_INFOS_REL_NAME = TeamInfoPerMatch._meta.get_field("match").remote_field.get_accessor_name()
 
 
 # ---------- Helpers ----------
@@ -19,21 +22,11 @@ def _abs_any(request, value):
     - str (URLField) -> renvoyé tel quel si absolu, sinon absolutisé
     Renvoie None si pas exploitable.
     """
-    if not value:
+    # .url (FieldFile, mémorisée par nom de fichier) ou chaîne
+    url = media_url(value)
+    if not url:
         return None
 
-    # Essayer d'obtenir .url (FieldFile)
-    try:
-        url = value.url
-    except Exception:
-        url = None
-
-    # Sinon traiter 'value' comme string
-    if url is None:
-        url = str(value).strip()
-        if not url:
-            return None
-
     # Absolutiser si besoin
     if url.startswith("http://") or url.startswith("https://"):
         return url
@@ -70,6 +63,145 @@ def _get_attr(obj, name, default=None):
     return getattr(obj, name, default)
 
 
+def _prefetched(obj, rel_name):
+    """
+    Renvoie les objets préchargés (prefetch_related) pour `rel_name`,
+    ou None si la relation n'a pas été préchargée.
+    Important : ne PAS rechaîner .select_related()/.order_by() sur le manager,
+    sinon Django ignore le prefetch et relance une requête par match.
+    """
+    cache = getattr(obj, "_prefetched_objects_cache", None)
+    if not cache or rel_name not in cache:
+        return None
+    return getattr(obj, rel_name).all()
+
+
+# ---------- Fieldsets (?fields= / ?expand=) ----------
+# Groupes « coûteux » (prefetch + SerializerMethodField) activables via ?expand=
+EXPANSIONS = {
+    "goals": ("goals",),
+    "cards": ("cards",),
+    "lineups": ("lineups",),
+    "team_info": ("home_formation", "away_formation", "home_coach_name", "away_coach_name"),
+}
+# rendu historique quand ni fields= ni expand= ne sont fournis
+DEFAULT_EXPAND = frozenset({"goals", "cards", "team_info"})
+
+
+def _csv(raw):
+    return [x.strip() for x in str(raw).split(",") if x.strip()]
+
+
+class MatchFieldset:
+    """
+    Sélection des champs d'un payload match.
+    - fields : champs simples gardés (None = tous) ; "id" toujours présent
+    - expand : groupes de EXPANSIONS à calculer
+
+    ?expand=goals,cards        -> champs simples + buts + cartons
+    ?fields=id,datetime,status -> uniquement ces champs (aucune expansion)
+    ?fields=id,goals           -> une expansion citée dans fields est activée
+    """
+
+    def __init__(self, fields=None, expand=DEFAULT_EXPAND):
+        self.fields = frozenset(fields) if fields is not None else None
+        self.expand = frozenset(expand)
+
+    @classmethod
+    def from_query(cls, params):
+        raw_fields = params.get("fields")
+        raw_expand = params.get("expand")
+        fields = set(_csv(raw_fields)) if raw_fields is not None else None
+
+        if raw_expand is not None:
+            expand = {e for e in _csv(raw_expand) if e in EXPANSIONS}
+        elif fields is not None:
+            expand = {
+                name for name, cols in EXPANSIONS.items()
+                if name in fields or fields.intersection(cols)
+            }
+        else:
+            expand = DEFAULT_EXPAND
+        return cls(fields, expand)
+
+    def allows(self, name):
+        for group, cols in EXPANSIONS.items():
+            if name in cols:
+                return group in self.expand
+        return self.fields is None or name == "id" or name in self.fields
+
+    def signature(self):
+        """Identifiant stable (clé de cache des snapshots)."""
+        f = "*" if self.fields is None else ",".join(sorted(self.fields))
+        return f"{f}|{','.join(sorted(self.expand))}"
+
+
+# ---------- Minute serveur ----------
+def current_minute_for(obj):
+    """
+    Renvoie un ENTIER représentant la minute actuelle du match.
+    On fait en sorte de TOUJOURS retourner un entier stable.
+
+    Règles d'affichage foot:
+      - HT / PAUSED       => 45
+      - FT / FINISHED     => 90
+      - LIVE 2e MT        => max(46, 45 + floor((now - kickoff_2)/60)), clamp à 90
+      - LIVE 1ère MT      => max(0, floor((now - kickoff_1)/60)), clamp à 90
+      - sinon             => minute manuelle (ou 0)
+    """
+    status = (getattr(obj, "status", "") or "").upper()
+    now = timezone.now()
+
+    # Mi-temps / pause
+    if status in ["HT", "PAUSED"]:
+        return 45
+
+    # Terminé
+    if status in ["FT", "FINISHED"]:
+        return 90
+
+    if status == "LIVE":
+        kickoff_2 = getattr(obj, "kickoff_2", None)
+        kickoff_1 = getattr(obj, "kickoff_1", None)
+
+        # 2e mi-temps
+        if kickoff_2:
+            diff_seconds = (now - kickoff_2).total_seconds()
+            raw_minute = 45 + int(diff_seconds // 60)
+
+            if raw_minute < 46:
+                raw_minute = 46
+            if raw_minute > 90:
+                raw_minute = 90
+
+            return raw_minute
+
+        # 1ère mi-temps
+        if kickoff_1:
+            diff_seconds = (now - kickoff_1).total_seconds()
+            raw_minute = int(diff_seconds // 60)
+
+            if raw_minute < 0:
+                raw_minute = 0
+            if raw_minute > 90:
+                raw_minute = 90
+
+            return raw_minute
+
+        # LIVE mais pas de kickoff_* (match créé à la main sans transition correcte)
+        # -> fallback minute manuelle ou 0
+        try:
+            return int(getattr(obj, "minute", 0) or 0)
+        except Exception:
+            return 0
+
+    # pas LIVE : fallback minute manuelle
+    try:
+        return int(getattr(obj, "minute", 0) or 0)
+    except Exception:
+        return 0
+
+
 # ---------- ROUND ----------
 class RoundSerializer(serializers.ModelSerializer):
     class Meta:
@@ -248,16 +380,9 @@ class LineupSerializer(serializers.ModelSerializer):
         ]
 
     def _abs_any_local(self, request, value):
-        if not value:
+        url = media_url(value)
+        if not url:
             return None
-        try:
-            url = value.url
-        except Exception:
-            url = None
-        if url is None:
-            url = str(value).strip()
-            if not url:
-                return None
         if url.startswith("http://") or url.startswith("https://"):
             return url
         return request.build_absolute_uri(url) if request else url
@@ -525,8 +650,13 @@ class TeamLineupSerializer(serializers.Serializer):
 
 # ---------- MATCH ----------
 class MatchSerializer(serializers.ModelSerializer):
+    """
+    context["fieldset"] (MatchFieldset) retire les champs non demandés :
+    les SerializerMethodField correspondants ne sont alors jamais appelés.
+    """
     goals = serializers.SerializerMethodField()
     cards = serializers.SerializerMethodField()
+    lineups = serializers.SerializerMethodField()
 
     round_name    = serializers.CharField(source="round.name", read_only=True)
     round_number  = serializers.IntegerField(source="round.number", read_only=True)
@@ -558,9 +688,16 @@ class MatchSerializer(serializers.ModelSerializer):
             "current_minute",
             "home_formation", "away_formation",
             "home_coach_name", "away_coach_name",
-            "goals", "cards",
+            "goals", "cards", "lineups",
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fieldset = self.context.get("fieldset") or MatchFieldset()
+        for name in list(self.fields):
+            if not fieldset.allows(name):
+                self.fields.pop(name)
+
     # logos clubs
     def get_home_club_logo(self, obj):
         request = self.context.get("request")
@@ -576,14 +713,8 @@ class MatchSerializer(serializers.ModelSerializer):
 
     # events
     def get_goals(self, obj):
-        mgr = getattr(obj, GOALS_REL_NAME, None)
-        if mgr is not None and hasattr(mgr, "all"):
-            qs = (
-                mgr.all()
-                .select_related("player", "club", "assist_player")
-                .order_by("minute", "id")
-            )
-        else:
+        qs = _prefetched(obj, GOALS_REL_NAME)
+        if qs is None:
             qs = (
                 Goal.objects.filter(match=obj)
                 .select_related("player", "club", "assist_player")
@@ -592,10 +723,8 @@ class MatchSerializer(serializers.ModelSerializer):
         return GoalSerializer(qs, many=True, context=self.context).data
 
     def get_cards(self, obj):
-        mgr = getattr(obj, CARDS_REL_NAME, None)
-        if mgr is not None and hasattr(mgr, "all"):
-            qs = mgr.all().select_related("player", "club").order_by("minute", "id")
-        else:
+        qs = _prefetched(obj, CARDS_REL_NAME)
+        if qs is None:
             qs = (
                 Card.objects.filter(match=obj)
                 .select_related("player", "club")
@@ -603,17 +732,30 @@ class MatchSerializer(serializers.ModelSerializer):
             )
         return CardSerializer(qs, many=True, context=self.context).data
 
+    def get_lineups(self, obj):
+        qs = _prefetched(obj, "lineups")
+        if qs is None:
+            qs = (
+                Lineup.objects.filter(match=obj)
+                .select_related("player", "club")
+                .order_by("club_id", "-is_starting", "seq", "id")
+            )
+        return LineupSerializer(qs, many=True, context=self.context).data
+
     # team info (formation / coach)
     def _team_info_map(self, obj):
         """
         Cache local pour éviter 2 requêtes TeamInfoPerMatch.
+        Utilise `team_infos` préchargé si disponible (0 requête).
         """
         cache_key = f"_ti_cache_{id(obj)}"
         ctx = self.context
         if cache_key in ctx:
             return ctx[cache_key]
 
-        infos = TeamInfoPerMatch.objects.filter(match=obj)
+        infos = _prefetched(obj, TEAM_INFOS_REL_NAME)
+        if infos is None:
+            infos = TeamInfoPerMatch.objects.filter(match=obj)
         mapping = {ti.club_id: ti for ti in infos}
         ctx[cache_key] = mapping
         return mapping
@@ -640,65 +782,4 @@ class MatchSerializer(serializers.ModelSerializer):
 
     # minute dynamique serveur
     def get_current_minute(self, obj):
-        """
-        Renvoie un ENTIER représentant la minute actuelle du match.
-        On fait en sorte de TOUJOURS retourner un entier stable.
-
-        Règles d'affichage foot:
-          - HT / PAUSED       => 45
-          - FT / FINISHED     => 90
-          - LIVE 2e MT        => max(46, 45 + floor((now - kickoff_2)/60)), clamp à 90
-          - LIVE 1ère MT      => max(0, floor((now - kickoff_1)/60)), clamp à 90
-          - sinon             => minute manuelle (ou 0)
-        """
-        status = (getattr(obj, "status", "") or "").upper()
-        now = timezone.now()
-
-        # Mi-temps / pause
-        if status in ["HT", "PAUSED"]:
-            return 45
-
-        # Terminé
-        if status in ["FT", "FINISHED"]:
-            return 90
-
-        if status == "LIVE":
-            kickoff_2 = getattr(obj, "kickoff_2", None)
-            kickoff_1 = getattr(obj, "kickoff_1", None)
-
-            # 2e mi-temps
-            if kickoff_2:
-                diff_seconds = (now - kickoff_2).total_seconds()
-                raw_minute = 45 + int(diff_seconds // 60)
-
-                if raw_minute < 46:
-                    raw_minute = 46
-                if raw_minute > 90:
-                    raw_minute = 90
-
-                return raw_minute
-
-            # 1ère mi-temps
-            if kickoff_1:
-                diff_seconds = (now - kickoff_1).total_seconds()
-                raw_minute = int(diff_seconds // 60)
-
-                if raw_minute < 0:
-                    raw_minute = 0
-                if raw_minute > 90:
-                    raw_minute = 90
-
-                return raw_minute
-
-            # LIVE mais pas de kickoff_* (match créé à la main sans transition correcte)
-            # -> fallback minute manuelle ou 0
-            try:
-                return int(getattr(obj, "minute", 0) or 0)
-            except Exception:
-                return 0
-
-        # pas LIVE : fallback minute manuelle
-        try:
-            return int(getattr(obj, "minute", 0) or 0)
-        except Exception:
-            return 0
+        return current_minute_for(obj)
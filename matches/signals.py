@@ -0,0 +1,66 @@
+# matches/signals.py
+"""
+Signaux « données d'un match modifiées ».
+
+Tout ce qui change le rendu d'un match (le match lui-même, ses buts, cartons,
+compositions, infos d'équipe) finit par émettre `match_changed(match_id=...)`.
+Les caches (snapshots sérialisés, etc.) s'y abonnent pour s'invalider.
+
+⚠️ bulk_create / QuerySet.update n'émettent PAS post_save :
+après ce type d'écriture, appeler `notify_match_changed(match_id)` à la main.
+
+Écritures en lot : `with coalesce_match_changes(): ...` retient les
+notifications et n'en émet qu'une par (sender, match) à la sortie du bloc
+(ex. supprimer 30 buts d'un match = 1 rafraîchissement au lieu de 30).
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .models import Match, Goal, Card, Lineup, TeamInfoPerMatch
+
+# kwargs: match_id
+match_changed = Signal()
+
+
+_local = threading.local()
+
+
+def notify_match_changed(match_id, sender=Match):
+    if not match_id:
+        return
+    pending = getattr(_local, "pending", None)
+    if pending is not None:
+        pending[(sender, match_id)] = None  # dict : dédoublonné, ordre conservé
+        return
+    match_changed.send(sender=sender, match_id=match_id)
+
+
+@contextmanager
+def coalesce_match_changes():
+    """Regroupe les notifications du bloc (imbriquable) ; rien n'est émis si le bloc lève."""
+    if getattr(_local, "pending", None) is not None:
+        yield
+        return
+    _local.pending = pending = {}
+    try:
+        yield
+    finally:
+        _local.pending = None
+    for sender, match_id in pending:
+        match_changed.send(sender=sender, match_id=match_id)
+
+
+@receiver([post_save, post_delete], sender=Match)
+def _match_saved(sender, instance, **kwargs):
+    notify_match_changed(instance.pk, sender=sender)
+
+
+@receiver([post_save, post_delete], sender=Goal)
+@receiver([post_save, post_delete], sender=Card)
+@receiver([post_save, post_delete], sender=Lineup)
+@receiver([post_save, post_delete], sender=TeamInfoPerMatch)
+def _match_child_saved(sender, instance, **kwargs):
+    notify_match_changed(instance.match_id, sender=sender)
@@ -0,0 +1,175 @@
+# matches/snapshots.py
+"""
+Cache « snapshot » par match de la sortie de MatchSerializer.
+
+- Clé = id du match + version du match + base d'URL (les logos/photos sont absolus).
+- La version est remplacée à chaque `match_changed` (save/delete de Match, Goal,
+  Card, Lineup, TeamInfoPerMatch) : l'ancien snapshot devient inatteignable.
+- Seuls les champs « horloge » (current_minute, live_phase_*) sont recalculés
+  à chaque requête, à partir des colonnes du match.
+- Un snapshot par sélection de champs (?fields= / ?expand=, cf. MatchFieldset).
+"""
+import hashlib
+import json
+import time
+from types import SimpleNamespace
+
+from profootgn.cache import LIVE, get_cache
+from stats.metrics import count_cache
+from django.db import transaction
+from django.dispatch import receiver
+from rest_framework.renderers import JSONRenderer
+
+from .serializers import MatchSerializer, MatchFieldset, current_minute_for
+from .signals import match_changed
+
+# filet de sécurité : un club/joueur renommé finit par se propager
+SNAPSHOT_TTL = 60 * 60
+
+# colonnes suffisantes pour retrouver les snapshots, recalculer l'horloge
+# et poser le curseur de pagination (datetime, id)
+CLOCK_FIELDS = ("id", "datetime", "status", "minute", "kickoff_1", "kickoff_2")
+
+
+def _cache():
+    # alias partagé entre workers (cf. settings.CACHES)
+    return get_cache(LIVE)
+
+
+def _version_key(match_id):
+    return f"match-snap-ver:{match_id}"
+
+
+def _new_version():
+    return str(time.time_ns())
+
+
+def bump_match_version(match_id):
+    _cache().set(_version_key(match_id), _new_version(), None)
+
+
+@receiver(match_changed)
+def _invalidate_snapshot(sender, match_id, **kwargs):
+    # après le commit : un lecteur concurrent ne doit pas remettre en cache
+    # l'état d'avant sous la nouvelle version
+    transaction.on_commit(lambda: bump_match_version(match_id))
+
+
+def _versions(match_ids):
+    cache = _cache()
+    keys = {_version_key(mid): mid for mid in match_ids}
+    found = cache.get_many(keys.keys())
+    out = {keys[k]: v for k, v in found.items()}
+    for mid in match_ids:
+        if mid not in out:
+            # version inconnue (cache vidé / nouveau process) : on en pose une neuve
+            # plutôt que « 0 », pour ne jamais relire un vieux snapshot orphelin.
+            cache.add(_version_key(mid), _new_version(), None)
+            out[mid] = cache.get(_version_key(mid))
+    return out
+
+
+def _url_base(request):
+    if request is None:
+        return "-"
+    base = request.build_absolute_uri("/")
+    return hashlib.md5(base.encode("utf-8")).hexdigest()[:10]
+
+
+def _fieldset_sig(fieldset):
+    return hashlib.md5(fieldset.signature().encode("utf-8")).hexdigest()[:8]
+
+
+def _snapshot_key(match_id, version, base, sig):
+    return f"match-snap:{match_id}:{version}:{base}:{sig}"
+
+
+def clock_payload(m):
+    """
+    Champs volatils recalculés à chaque requête (jamais mis en cache).
+    - live_phase_start: début de la phase en cours (kickoff_1 / kickoff_2)
+    - live_phase_offset: 0 en 1ère MT, 45 en 2ème MT
+    """
+    st = (getattr(m, "status", "") or "").upper()
+    start = offset = None
+    if st == "LIVE":
+        if getattr(m, "kickoff_2", None):
+            start, offset = m.kickoff_2.isoformat(), 45
+        elif getattr(m, "kickoff_1", None):
+            start, offset = m.kickoff_1.isoformat(), 0
+    return {
+        "current_minute": current_minute_for(m),
+        "live_phase_start": start,
+        "live_phase_offset": offset,
+    }
+
+
+def _to_plain(data):
+    # ReturnDict -> dict JSON pur (dates en str), sérialisable par tout backend de cache
+    return json.loads(JSONRenderer().render(data))
+
+
+def snapshot_pairs(matches, request, load_full, fieldset=None):
+    """
+    [(colonnes horloge, snapshot sans horloge)] dans l'ordre de `matches`.
+    Sérialisable tel quel (cf. SingleFlight de /matches/live/) : l'horloge
+    est réappliquée à chaque réponse par with_clock().
+    """
+    matches = list(matches)
+    if not matches:
+        return []
+
+    fieldset = fieldset or MatchFieldset()
+    ids = [m.pk for m in matches]
+    versions = _versions(ids)
+    base = _url_base(request)
+    sig = _fieldset_sig(fieldset)
+    keys = {mid: _snapshot_key(mid, versions[mid], base, sig) for mid in ids}
+
+    cache = _cache()
+    found = cache.get_many(keys.values())
+    snaps = {mid: found[k] for mid, k in keys.items() if k in found}
+
+    missing = [mid for mid in ids if mid not in snaps]
+    count_cache("match-snapshots", "hit", len(ids) - len(missing))
+    count_cache("match-snapshots", "miss", len(missing))
+    if missing:
+        fresh = {}
+        for full in load_full(missing):
+            ctx = {"request": request, "fieldset": fieldset}
+            data = _to_plain(MatchSerializer(full, context=ctx).data)
+            snaps[full.pk] = data
+            fresh[keys[full.pk]] = data
+        if fresh:
+            cache.set_many(fresh, SNAPSHOT_TTL)
+
+    return [
+        ({f: getattr(m, f, None) for f in CLOCK_FIELDS}, snaps[m.pk])
+        for m in matches
+        if m.pk in snaps  # supprimé entre-temps sinon
+    ]
+
+
+def with_clock(pairs, fieldset=None):
+    """Snapshots + champs horloge calculés maintenant."""
+    fieldset = fieldset or MatchFieldset()
+    out = []
+    for clock, data in pairs:
+        item = dict(data)
+        item.update({
+            k: v for k, v in clock_payload(SimpleNamespace(**clock)).items()
+            if fieldset.allows(k)
+        })
+        out.append(item)
+    return out
+
+
+def serialized_matches(matches, request, load_full, fieldset=None):
+    """
+    matches   : itérable de Match (au minimum les CLOCK_FIELDS chargés), dans l'ordre voulu
+    load_full : callable(ids) -> queryset Match (prefetch adaptés au fieldset) pour les absents
+    fieldset  : MatchFieldset (défaut : payload complet historique)
+    Renvoie la liste des dicts prêts à répondre.
+    """
+    fieldset = fieldset or MatchFieldset()
+    return with_clock(snapshot_pairs(matches, request, load_full, fieldset), fieldset)
@@ -0,0 +1,352 @@
+# matches/standings.py
+"""
+Classement du championnat (app matches) matérialisé dans StandingRow.
+
+- Seuls les matchs terminés (FT/FINISHED) sont stockés.
+- pre_save mémorise l'état précédent du match, post_save applique
+  « nouvelle contribution − ancienne contribution » aux deux clubs
+  (donc corriger un score ou repasser un match en LIVE annule l'ancien résultat).
+  La ligne du match est verrouillée (select_for_update) jusqu'à la fin de la
+  transaction de Match.save : deux enregistrements concurrents du même match
+  lisent chacun l'état laissé par l'autre, le delta n'est jamais appliqué deux fois.
+- post_delete retire la contribution du match supprimé (état relu et verrouillé
+  en pre_delete, pas celui de l'instance éventuellement périmée).
+- Le direct (LIVE/HT/PAUSED) est superposé à la lecture, sans écriture.
+- RoundStandingSnapshot garde le classement après chaque journée (Round.number) :
+  un résultat modifié en journée N ne recalcule que les journées >= N.
+
+⚠️ QuerySet.update() sur Match ne passe pas par les signaux :
+lancer ensuite `manage.py rebuild_standings`.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from clubs.models import Club
+from .models import Match, Round, StandingRow, RoundStandingSnapshot
+
+FINISHED = ("FT", "FINISHED")
+LIVEISH = ("LIVE", "HT", "PAUSED")
+
+COUNTERS = ("played", "wins", "draws", "losses", "goals_for", "goals_against", "points")
+_STATE_FIELDS = ("status", "home_club_id", "away_club_id", "home_score", "away_score")
+
+
+# =========================
+# Contribution d'un match
+# =========================
+def contribution(status, home_id, away_id, hs, as_, statuses=FINISHED):
+    """{club_id: {compteur: delta}} apporté par un match (vide s'il ne compte pas)."""
+    if (status or "").upper() not in statuses or not home_id or not away_id:
+        return {}
+    hs, as_ = int(hs or 0), int(as_ or 0)
+    h = {"played": 1, "goals_for": hs, "goals_against": as_}
+    a = {"played": 1, "goals_for": as_, "goals_against": hs}
+    if hs > as_:
+        h.update(wins=1, points=3)
+        a.update(losses=1)
+    elif hs < as_:
+        a.update(wins=1, points=3)
+        h.update(losses=1)
+    else:
+        h.update(draws=1, points=1)
+        a.update(draws=1, points=1)
+    return {home_id: h, away_id: a}
+
+
+def _state(obj):
+    return tuple(getattr(obj, f) for f in _STATE_FIELDS)
+
+
+def _merge(target, contrib, sign=1):
+    for club_id, counters in contrib.items():
+        row = target[club_id]
+        for k, v in counters.items():
+            row[k] += sign * v
+
+
+# =========================
+# Écriture par deltas
+# =========================
+def compute_rows(club_ids=None, match_model=Match):
+    """Recalcul complet depuis les matchs terminés : {club_id: {compteur: valeur}}."""
+    rows = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    qs = match_model.objects.filter(status__in=FINISHED)
+    if club_ids is not None:
+        qs = qs.filter(Q(home_club_id__in=club_ids) | Q(away_club_id__in=club_ids))
+    for st in qs.values_list(*_STATE_FIELDS):
+        _merge(rows, contribution(*st))
+    if club_ids is not None:
+        return {cid: rows[cid] for cid in club_ids}
+    return dict(rows)
+
+
+def apply_delta(delta):
+    """
+    delta : {club_id: {compteur: +/-n}}. Mise à jour atomique (F()) ;
+    un club sans ligne est recalculé entièrement (le match courant est déjà en base).
+    """
+    delta = {cid: d for cid, d in delta.items() if any(d.values())}
+    if not delta:
+        return
+    with transaction.atomic():
+        existing = set(StandingRow.objects.filter(club_id__in=delta).values_list("club_id", flat=True))
+        for club_id, d in delta.items():
+            if club_id in existing:
+                StandingRow.objects.filter(club_id=club_id).update(
+                    **{k: F(k) + v for k, v in d.items() if v}
+                )
+        missing = [cid for cid in delta if cid not in existing]
+        if missing:
+            for club_id, values in compute_rows(missing).items():
+                StandingRow.objects.update_or_create(club_id=club_id, defaults=values)
+
+
+def _locked_state(pk):
+    """(état, round_id) du match en base, ligne verrouillée jusqu'à la fin de la transaction."""
+    return (
+        Match.objects.select_for_update()
+        .filter(pk=pk).values_list(*_STATE_FIELDS, "round_id").first()
+    )
+
+
+@receiver(pre_save, sender=Match)
+def _remember_previous(sender, instance, raw=False, **kwargs):
+    instance._standing_prev = None
+    instance._standing_prev_round = None
+    if raw or not instance.pk:
+        return
+    prev = _locked_state(instance.pk)
+    if prev:
+        instance._standing_prev = prev[:-1]
+        instance._standing_prev_round = prev[-1]
+
+
+@receiver(post_save, sender=Match)
+def _apply_match_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    prev = getattr(instance, "_standing_prev", None)
+    prev_round = getattr(instance, "_standing_prev_round", None)
+    new = _state(instance)
+    if prev == new and prev_round == instance.round_id:
+        return
+    delta = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    if prev:
+        _merge(delta, contribution(*prev), sign=-1)
+    _merge(delta, contribution(*new))
+    apply_delta(delta)
+
+    # journées dont le résultat compté change
+    round_ids = [
+        rid for st, rid in ((prev, prev_round), (new, instance.round_id))
+        if st and rid and (st[0] or "").upper() in FINISHED
+    ]
+    _schedule_snapshots_from_rounds(round_ids)
+
+
+@receiver(pre_delete, sender=Match)
+def _remember_deleted(sender, instance, **kwargs):
+    # Collector.delete tourne dans une transaction : le verrou tient jusqu'au post_delete
+    instance._standing_prev = _locked_state(instance.pk)
+
+
+@receiver(post_delete, sender=Match)
+def _apply_match_deleted(sender, instance, **kwargs):
+    prev = getattr(instance, "_standing_prev", None) or (*_state(instance), instance.round_id)
+    state, round_id = prev[:-1], prev[-1]
+    delta = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    _merge(delta, contribution(*state), sign=-1)
+    apply_delta(delta)
+    if round_id and (state[0] or "").upper() in FINISHED:
+        _schedule_snapshots_from_rounds([round_id])
+
+
+# =========================
+# Snapshots par journée
+# =========================
+def _sort_key(name, r):
+    return (-r["points"], -(r["goals_for"] - r["goals_against"]), -r["goals_for"], (name or "").lower())
+
+
+def refresh_round_snapshots(from_number=1):
+    """
+    Réécrit les snapshots des journées >= from_number. Le cumul repart du
+    dernier snapshot stocké avant from_number : seuls les matchs des journées
+    suivantes sont relus.
+    4 lectures (clubs, journée de départ, snapshot de départ, matchs terminés)
+    + 1 suppression + 1 bulk insert.
+    """
+    from_number = max(1, int(from_number or 1))
+    names = dict(Club.objects.values_list("id", "name"))
+
+    totals = {cid: dict.fromkeys(COUNTERS, 0) for cid in names}
+    base = (
+        RoundStandingSnapshot.objects.filter(round_number__lt=from_number)
+        .order_by("-round_number")
+        .values_list("round_number", flat=True)
+        .first()
+    ) or 0
+    if base:
+        for club_id, *values in (
+            RoundStandingSnapshot.objects.filter(round_number=base)
+            .values_list("club_id", *COUNTERS)
+        ):
+            if club_id in totals:
+                totals[club_id] = dict(zip(COUNTERS, values))
+
+    by_round = defaultdict(list)
+    for number, *st in (
+        Match.objects.filter(status__in=FINISHED, round__number__gt=base)
+        .values_list("round__number", *_STATE_FIELDS)
+    ):
+        by_round[number].append(st)
+
+    to_create = []
+    for number in sorted(by_round):
+        for st in by_round[number]:
+            for club_id, d in contribution(*st).items():
+                if club_id in totals:
+                    for k, v in d.items():
+                        totals[club_id][k] += v
+        if number < from_number:
+            continue
+        ordered = sorted(totals.items(), key=lambda x: _sort_key(names[x[0]], x[1]))
+        for position, (club_id, row) in enumerate(ordered, start=1):
+            to_create.append(RoundStandingSnapshot(
+                round_number=number, club_id=club_id, position=position, **row
+            ))
+
+    with transaction.atomic():
+        RoundStandingSnapshot.objects.filter(round_number__gte=from_number).delete()
+        RoundStandingSnapshot.objects.bulk_create(to_create)
+    return len(to_create)
+
+
+def _schedule_snapshots_from_rounds(round_ids):
+    round_ids = [rid for rid in round_ids if rid]
+    if not round_ids:
+        return
+    numbers = [
+        n for n in Round.objects.filter(id__in=round_ids).values_list("number", flat=True)
+        if n is not None
+    ]
+    if numbers:
+        start = min(numbers)
+        transaction.on_commit(lambda: refresh_round_snapshots(start))
+
+
+@receiver([post_save, post_delete], sender=Round)
+def _round_changed(sender, instance, raw=False, **kwargs):
+    # numéro de journée modifié / supprimé : tout l'historique peut bouger
+    if not raw:
+        transaction.on_commit(refresh_round_snapshots)
+
+
+def snapshot_rows(as_of_round):
+    """
+    Classement après la journée `as_of_round` (ou la dernière disponible avant),
+    au même format que standings_rows. Renvoie (journée effective, rows).
+    """
+    number = (
+        RoundStandingSnapshot.objects.filter(round_number__lte=as_of_round)
+        .order_by("-round_number")
+        .values_list("round_number", flat=True)
+        .first()
+    )
+    if number is None:
+        return None, []
+    rows = []
+    for snap in (
+        RoundStandingSnapshot.objects.filter(round_number=number)
+        .select_related("club")
+        .order_by("position")
+    ):
+        rows.append({
+            "club": snap.club,
+            "position": snap.position,
+            **{k: getattr(snap, k) for k in COUNTERS},
+            "goal_diff": snap.goal_diff,
+        })
+    return number, rows
+
+
+# =========================
+# Lecture
+# =========================
+def standings_rows(include_live=False, live_fallback=False):
+    """
+    Lignes (dicts) de tous les clubs, non triées : compteurs stockés
+    (+ matchs en direct si include_live). 2 requêtes maximum.
+
+    live_fallback : si aucun match terminé n'est compté, superpose quand même
+    le direct (comportement historique de standings_view en début de saison).
+    Renvoie (rows, live_counted) ; chaque ligne garde l'objet club sous "club".
+    """
+    rows = {}
+    for club in Club.objects.select_related("standing").order_by("name"):
+        st = getattr(club, "standing", None)
+        rows[club.id] = {
+            "club": club,
+            **{k: (getattr(st, k) if st else 0) for k in COUNTERS},
+        }
+
+    any_finished = any(r["played"] for r in rows.values())
+    live_counted = 0
+    if include_live or (live_fallback and not any_finished):
+        live = (
+            Match.objects.filter(status__in=LIVEISH)
+            .values_list(*_STATE_FIELDS)
+        )
+        overlay = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        for st in live:
+            _merge(overlay, contribution(*st, statuses=LIVEISH))
+            live_counted += 1
+        for club_id, d in overlay.items():
+            if club_id in rows:
+                for k, v in d.items():
+                    rows[club_id][k] += v
+
+    for r in rows.values():
+        r["goal_diff"] = r["goals_for"] - r["goals_against"]
+    return list(rows.values()), live_counted
+
+
+# =========================
+# Reconstruction / vérification
+# =========================
+def rebuild_standings():
+    """
+    Réécrit StandingRow (et les snapshots par journée) depuis zéro.
+    Renvoie le nombre de clubs écrits.
+    """
+    computed = compute_rows()
+    club_ids = list(Club.objects.values_list("id", flat=True))
+    with transaction.atomic():
+        StandingRow.objects.all().delete()
+        StandingRow.objects.bulk_create([
+            StandingRow(club_id=cid, **computed.get(cid, dict.fromkeys(COUNTERS, 0)))
+            for cid in club_ids
+        ])
+    refresh_round_snapshots()
+    return len(club_ids)
+
+
+def verify_standings():
+    """Liste des écarts [(club_id, compteur, stocké, attendu)] (vide = OK)."""
+    computed = compute_rows()
+    stored = {
+        r["club_id"]: r
+        for r in StandingRow.objects.values("club_id", *COUNTERS)
+    }
+    diffs = []
+    for cid in Club.objects.values_list("id", flat=True):
+        expected = computed.get(cid, dict.fromkeys(COUNTERS, 0))
+        have = stored.get(cid, dict.fromkeys(COUNTERS, 0))
+        for k in COUNTERS:
+            if have[k] != expected[k]:
+                diffs.append((cid, k, have[k], expected[k]))
+    return diffs
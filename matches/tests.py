@@ -0,0 +1,579 @@
+import asyncio
+import json
+from datetime import time, timedelta
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync, sync_to_async
+from profootgn.cache import clear_all
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from clubs.models import Club
+from players.models import Player
+from .live_stream import QUEUE_SIZE, LiveBroadcaster, _diff, _read_live_state, _snapshot_payload
+from .models import Match, Goal, Card, Lineup, Round, RoundStandingSnapshot, StandingRow, TeamInfoPerMatch
+from .scheduling import berger_rounds, plan_schedule, split_byes, write_league_schedule
+from .signals import match_changed
+from .standings import COUNTERS, rebuild_standings, refresh_round_snapshots, verify_standings
+
+
+class MatchListQueryCountTests(TestCase):
+    """
+    Les listes de matchs doivent coûter un nombre FIXE de requêtes,
+    quel que soit le nombre de matchs renvoyés (pas de N+1).
+    """
+
+    # cache froid : liste légère + matchs complets (+ clubs/round via JOIN)
+    #               + buts + cartons + infos d'équipe
+    LIST_QUERIES = 5
+    # /live/ : + versions (ETag) + horaires des matchs en direct (cache froid)
+    LIVE_QUERIES = 7
+    # cache chaud : seulement la liste légère (snapshots en cache)
+    WARM_QUERIES = 1
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.round = Round.objects.create(name="J1", number=1)
+        cls.clubs = [Club.objects.create(name=f"Club {i}") for i in range(8)]
+        cls.players = {
+            c.id: [
+                Player.objects.create(first_name=f"P{c.id}", last_name=str(n), club=c, number=n)
+                for n in range(1, 4)
+            ]
+            for c in cls.clubs
+        }
+
+    def setUp(self):
+        clear_all()
+
+    def _make_matches(self, count, status="FT"):
+        now = timezone.now()
+        for i in range(count):
+            home = self.clubs[(2 * i) % len(self.clubs)]
+            away = self.clubs[(2 * i + 1) % len(self.clubs)]
+            m = Match.objects.create(
+                datetime=now - timedelta(days=i + 1),
+                home_club=home,
+                away_club=away,
+                home_score=1,
+                away_score=1,
+                status=status,
+                kickoff_1=now - timedelta(minutes=30) if status == "LIVE" else None,
+            )
+            hp = self.players[home.id]
+            ap = self.players[away.id]
+            Goal.objects.create(match=m, club=home, player=hp[0], assist_player=hp[1], minute=10)
+            Goal.objects.create(match=m, club=away, player=ap[0], assist_name="Libre", minute=70)
+            Card.objects.create(match=m, club=home, player=hp[2], minute=30, type="Y")
+            TeamInfoPerMatch.objects.create(match=m, club=home, formation="4-3-3", coach_name="A")
+            TeamInfoPerMatch.objects.create(match=m, club=away, formation="4-4-2", coach_name="B")
+
+    def _count(self, url):
+        client = APIClient()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx.captured_queries), resp.json()
+
+    def test_list_query_count_is_constant(self):
+        self._make_matches(2)
+        small, data = self._count("/api/matches/")
+        self.assertEqual(len(data["results"]), 2)
+
+        self._make_matches(6)
+        big, data = self._count("/api/matches/")
+        data = data["results"]
+        self.assertEqual(len(data), 8)
+
+        self.assertEqual(small, big)
+        self.assertEqual(big, self.LIST_QUERIES)
+
+        warm, _ = self._count("/api/matches/")
+        self.assertEqual(warm, self.WARM_QUERIES)
+
+        # contenu toujours correct avec les données préchargées
+        m = data[0]
+        self.assertEqual(len(m["goals"]), 2)
+        self.assertEqual(len(m["cards"]), 1)
+        self.assertEqual(m["home_formation"], "4-3-3")
+        self.assertEqual(m["away_coach_name"], "B")
+        self.assertEqual(m["goals"][0]["minute"], 10)
+        self.assertTrue(m["goals"][0]["assist_name"])
+
+    def test_fields_and_expand_shape_the_payload(self):
+        self._make_matches(3)
+        n, data = self._count("/api/matches/?fields=id,datetime,status")
+        self.assertEqual(set(data["results"][0]), {"id", "datetime", "status"})
+        # liste légère + matchs, sans buts / cartons / infos d'équipe
+        self.assertEqual(n, 2)
+
+        clear_all()
+        _, data = self._count("/api/matches/?expand=goals")
+        m = data["results"][0]
+        self.assertEqual(len(m["goals"]), 2)
+        self.assertNotIn("cards", m)
+        self.assertNotIn("home_formation", m)
+        self.assertIn("home_club_name", m)
+
+        # une expansion citée dans fields est activée en entier
+        _, data = self._count("/api/matches/?fields=id,cards,home_formation")
+        self.assertEqual(
+            set(data["results"][0]),
+            {"id", "cards", "home_formation", "away_formation", "home_coach_name", "away_coach_name"},
+        )
+
+    def test_list_is_paginated_by_cursor(self):
+        self._make_matches(5)
+        client = APIClient()
+        seen, url = [], "/api/matches/?page_size=2"
+        while url:
+            page = client.get(url).json()
+            self.assertLessEqual(len(page["results"]), 2)
+            seen += [m["id"] for m in page["results"]]
+            url = page["next"]
+        expected = list(Match.objects.order_by("-datetime", "-id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+        with patch("matches.pagination.DEFAULT_PAGE_SIZE", 3):
+            page = client.get("/api/matches/").json()
+        self.assertEqual(len(page["results"]), 3)
+        self.assertIsNotNone(page["next"])
+        self.assertEqual(client.get("/api/matches/?cursor=nope").status_code, 404)
+
+    def test_stream_exports_everything_on_request(self):
+        self._make_matches(5)
+        with patch("matches.views.STREAM_BATCH", 2):
+            resp = APIClient().get("/api/matches/?stream=1&ordering=datetime")
+            body = b"".join(resp.streaming_content)
+        self.assertEqual(resp.status_code, 200)
+        data = json.loads(body)
+        expected = list(Match.objects.order_by("datetime", "id").values_list("id", flat=True))
+        self.assertEqual([m["id"] for m in data], expected)
+        self.assertEqual(len(data[0]["goals"]), 2)
+
+    def test_recent_query_count_is_constant(self):
+        self._make_matches(8)
+        n, data = self._count("/api/matches/recent/?limit=8")
+        self.assertEqual(len(data), 8)
+        self.assertEqual(n, self.LIST_QUERIES)
+
+    def test_live_query_count_is_constant(self):
+        self._make_matches(7, status="LIVE")
+        n, data = self._count("/api/matches/live/")
+        self.assertEqual(len(data), 7)
+        self.assertEqual(n, self.LIVE_QUERIES)
+
+
+class MatchSnapshotInvalidationTests(TestCase):
+    def setUp(self):
+        clear_all()
+        self.home = Club.objects.create(name="Home")
+        self.away = Club.objects.create(name="Away")
+        self.match = Match.objects.create(
+            datetime=timezone.now(), home_club=self.home, away_club=self.away, status="LIVE",
+            kickoff_1=timezone.now() - timedelta(minutes=12),
+        )
+
+    def test_snapshot_refreshed_on_event_write(self):
+        client = APIClient()
+        url = f"/api/matches/{self.match.id}/"
+        first = client.get(url).json()
+        self.assertEqual(first["goals"], [])
+        self.assertEqual(first["current_minute"], 12)
+
+        # la version change au commit (on_commit), pas pendant la transaction
+        with self.captureOnCommitCallbacks(execute=True):
+            Goal.objects.create(match=self.match, club=self.home, minute=11)
+        second = client.get(url).json()
+        self.assertEqual(len(second["goals"]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.match.home_score = 1
+            self.match.save()
+        self.assertEqual(client.get(url).json()["home_score"], 1)
+
+
+class GoalBulkTests(TestCase):
+    def setUp(self):
+        clear_all()
+        self.home = Club.objects.create(name="Home")
+        self.away = Club.objects.create(name="Away")
+        self.match = Match.objects.create(
+            datetime=timezone.now(), home_club=self.home, away_club=self.away, status="LIVE",
+        )
+        Player.objects.create(first_name="Abdou", last_name="Diallo", club=self.home)
+        Player.objects.create(first_name="Sekou", last_name="Diallo", club=self.home)
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("admin", password="x", is_staff=True)
+        )
+
+    def _post(self, goals):
+        return self.client.post(
+            "/api/goals/bulk/", {"match": self.match.id, "goals": goals}, format="json",
+        )
+
+    def test_ambiguous_name_is_reported_not_created(self):
+        resp = self._post([
+            {"club": self.home.id, "minute": 12, "player_name": "Diallo"},
+            {"club": self.home.id, "minute": 30, "player_name": "Nouveau Venu"},
+        ])
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["ambiguous"], ["Diallo"])
+        self.assertEqual(Player.objects.filter(club=self.home, last_name="Diallo").count(), 2)
+        self.assertTrue(Player.objects.filter(club=self.home, last_name="Venu").exists())
+        goals = {g.minute: g for g in Goal.objects.filter(match=self.match)}
+        self.assertIsNone(goals[12].player_id)
+        self.assertEqual(goals[30].player.last_name, "Venu")
+
+    def test_resent_batch_is_idempotent_on_client_id(self):
+        goals = [{"club": self.home.id, "minute": 5, "player_name": "Abdou Diallo", "client_id": "g-1"}]
+        self.assertEqual(self._post(goals).json()["inserted"], 1)
+        again = self._post(goals).json()
+        self.assertEqual((again["inserted"], again["updated"]), (0, 1))
+        self.assertEqual(Goal.objects.filter(match=self.match).count(), 1)
+
+
+class QuickLineupsTests(TestCase):
+    def setUp(self):
+        self.home = Club.objects.create(name="Home")
+        self.away = Club.objects.create(name="Away")
+        self.match = Match.objects.create(
+            datetime=timezone.now(), home_club=self.home, away_club=self.away, status="SCHEDULED",
+        )
+        self.keeper = Player.objects.create(first_name="Aly", last_name="Keita", club=self.home, number=1)
+        self.client.force_login(
+            get_user_model().objects.create_user("admin", password="x", is_staff=True, is_superuser=True)
+        )
+
+    def test_unknown_rows_are_reported_not_created(self):
+        players = Player.objects.count()
+        resp = self.client.post("/admin/lineups/quick/", {
+            "match_id": self.match.id,
+            "home_xi": "#1 GK\nInconnu Total CB 4\n#9",
+            "away_xi": "Nouveau Venu ST",
+        })
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(Player.objects.count(), players)
+
+        lineups = {l.player_name or l.player_id: l for l in Lineup.objects.filter(match=self.match)}
+        self.assertEqual(len(lineups), 4)
+        self.assertEqual(lineups[self.keeper.id].player_id, self.keeper.id)
+        self.assertIsNone(lineups["Nouveau Venu"].player_id)
+
+        warnings = [str(m) for m in get_messages(resp.wsgi_request) if m.level_tag == "warning"]
+        self.assertEqual(len(warnings), 1)
+        for label in ("Home : Inconnu Total", "Home : #9", "Away : Nouveau Venu"):
+            self.assertIn(label, warnings[0])
+
+
+class StandingsDeltaTests(TestCase):
+    """Le classement tenu par deltas doit toujours égaler une reconstruction complète."""
+
+    def setUp(self):
+        self.clubs = [Club.objects.create(name=f"Club {i}") for i in range(4)]
+        self.rounds = [Round.objects.create(name=f"J{n}", number=n) for n in (1, 2)]
+        self.players = {c.id: Player.objects.create(first_name="P", last_name=c.name, club=c) for c in self.clubs}
+        a, b, c, d = self.clubs
+        self.m1 = self._match(self.rounds[0], a, b)
+        self.m2 = self._match(self.rounds[0], c, d)
+        self.m3 = self._match(self.rounds[1], a, c)
+
+    def _match(self, rnd, home, away):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Match.objects.create(
+                round=rnd, datetime=timezone.now(), home_club=home, away_club=away, status="SCHEDULED",
+            )
+
+    def _score_goal(self, match, club, minute):
+        """Un but saisi : Goal + score du match, comme la saisie admin."""
+        with self.captureOnCommitCallbacks(execute=True):
+            goal = Goal.objects.create(match=match, club=club, player=self.players[club.id], minute=minute)
+            if club.id == match.home_club_id:
+                match.home_score += 1
+            else:
+                match.away_score += 1
+            match.status = "FT"
+            match.save()
+        return goal
+
+    def _state(self):
+        # un club sans résultat n'a pas de ligne par delta ; la reconstruction en écrit une à zéro
+        rows = sorted(StandingRow.objects.exclude(played=0).values_list("club_id", *COUNTERS))
+        snaps = sorted(RoundStandingSnapshot.objects.values_list("round_number", "club_id", "position", *COUNTERS))
+        return rows, snaps
+
+    def assertMatchesRebuild(self):
+        self.assertEqual(verify_standings(), [])
+        incremental = self._state()
+        rebuild_standings()
+        self.assertEqual(incremental, self._state())
+
+    def test_goal_add_edit_delete(self):
+        a, b, c, d = self.clubs
+        g1 = self._score_goal(self.m1, a, 10)
+        self._score_goal(self.m2, d, 20)
+        self._score_goal(self.m3, c, 30)
+        self.assertMatchesRebuild()
+
+        # but réattribué à l'autre équipe (édition) : 0-1 au lieu de 1-0
+        with self.captureOnCommitCallbacks(execute=True):
+            g1.club = b
+            g1.save()
+            self.m1.home_score, self.m1.away_score = 0, 1
+            self.m1.save()
+        self.assertMatchesRebuild()
+
+        # but supprimé : 0-0
+        with self.captureOnCommitCallbacks(execute=True):
+            g1.delete()
+            self.m1.away_score = 0
+            self.m1.save()
+        self.assertMatchesRebuild()
+
+        # match repassé en direct puis supprimé
+        with self.captureOnCommitCallbacks(execute=True):
+            self.m2.status = "LIVE"
+            self.m2.save()
+        self.assertMatchesRebuild()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.m3.delete()
+        self.assertMatchesRebuild()
+
+    def test_round_snapshots_carry_forward_from_previous_round(self):
+        a, b, c, d = self.clubs
+        self._score_goal(self.m1, a, 10)
+        self._score_goal(self.m3, c, 30)
+        self.assertMatchesRebuild()
+        before = list(RoundStandingSnapshot.objects.filter(round_number=2).values_list("club_id", "points"))
+
+        # journée 1 modifiée sans signal : le recalcul depuis J2 repart du snapshot J1 stocké
+        Match.objects.filter(pk=self.m1.pk).update(home_score=0, away_score=5)
+        with CaptureQueriesContext(connection) as ctx:
+            refresh_round_snapshots(2)
+        reads = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+        self.assertEqual(len(reads), 4)
+        self.assertEqual(
+            list(RoundStandingSnapshot.objects.filter(round_number=2).values_list("club_id", "points")), before,
+        )
+
+    def test_stale_instances_do_not_double_apply(self):
+        """Deux copies du même match (deux requêtes concurrentes) : l'état de référence est celui de la base."""
+        a, b, c, d = self.clubs
+        first, second = Match.objects.get(pk=self.m1.pk), Match.objects.get(pk=self.m1.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.status, first.home_score = "FT", 1
+            first.save()
+            second.status, second.home_score = "FT", 2
+            second.save()
+        self.assertEqual(StandingRow.objects.get(club=a).points, 3)
+        self.assertEqual(StandingRow.objects.get(club=a).goals_for, 2)
+        self.assertMatchesRebuild()
+
+        # copie périmée (encore SCHEDULED en mémoire) supprimée : le résultat en base est retiré
+        stale = Match.objects.get(pk=self.m2.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            fresh = Match.objects.get(pk=self.m2.pk)
+            fresh.status, fresh.away_score = "FT", 1
+            fresh.save()
+            stale.delete()
+        self.assertEqual(StandingRow.objects.get(club=d).points, 0)
+        self.assertMatchesRebuild()
+
+
+class EventSyncTests(TestCase):
+    def setUp(self):
+        clear_all()
+        self.home = Club.objects.create(name="Home")
+        self.away = Club.objects.create(name="Away")
+        self.match = Match.objects.create(
+            datetime=timezone.now(), home_club=self.home, away_club=self.away, status="LIVE",
+        )
+        self.scorer = Player.objects.create(first_name="Abdou", last_name="Diallo", club=self.home)
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("admin", password="x", is_staff=True)
+        )
+        self.url = f"/api/matches/{self.match.id}/events/sync/"
+        self.payload = {
+            "goals": [
+                {"client_id": "g-1", "club": self.home.id, "minute": 12, "player": self.scorer.id},
+                {"client_id": "g-2", "club": self.away.id, "minute": 70, "player_name": "Nouveau Venu"},
+            ],
+            "cards": [{"client_id": "c-1", "club": self.home.id, "minute": 30, "player": self.scorer.id}],
+        }
+
+    def _sync(self, payload):
+        resp = self.client.post(self.url, payload, format="json")
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_resync_is_idempotent_on_client_event_id(self):
+        first = self._sync(self.payload)
+        self.assertEqual(first["goals"]["inserted"], 2)
+        ids = sorted(Goal.objects.filter(match=self.match).values_list("id", flat=True))
+        self.assertEqual(sorted(first["goals"]["inserted_ids"]), ids)
+
+        changes = []
+        match_changed.connect(lambda **kw: changes.append(kw["match_id"]), weak=False, dispatch_uid="t-sync")
+        try:
+            second = self._sync(self.payload)
+        finally:
+            match_changed.disconnect(dispatch_uid="t-sync")
+        self.assertFalse(second["changed"])
+        self.assertEqual(second["goals"]["unchanged"], 2)
+        self.assertEqual(second["cards"]["unchanged"], 1)
+        self.assertEqual(changes, [])
+        self.assertEqual(sorted(Goal.objects.filter(match=self.match).values_list("id", flat=True)), ids)
+        self.assertEqual(Player.objects.filter(last_name="Venu").count(), 1)
+
+        # même client_id, minute corrigée : mise à jour de la ligne existante
+        self.payload["goals"][0]["minute"] = 13
+        third = self._sync(self.payload)
+        self.assertEqual((third["goals"]["inserted"], third["goals"]["updated"]), (0, 1))
+        self.assertEqual(Goal.objects.get(match=self.match, client_event_id="g-1").minute, 13)
+        self.assertEqual(sorted(Goal.objects.filter(match=self.match).values_list("id", flat=True)), ids)
+
+
+class LeagueScheduleTests(TestCase):
+    def test_double_round_robin_pairs_once_per_leg(self):
+        for n in (2, 5, 6, 9, 16):
+            teams = list(range(1, n + 1))
+            rounds = berger_rounds(teams)
+            clean, byes = split_byes(rounds)
+            legs = (clean[:len(clean) // 2], clean[len(clean) // 2:])
+            for leg in legs:
+                pairs = [frozenset(p) for day in leg for p in day]
+                self.assertEqual(len(pairs), n * (n - 1) // 2)
+                self.assertEqual(len(set(pairs)), len(pairs))
+                for day in leg:
+                    # une équipe joue au plus une fois par journée
+                    playing = [t for p in day for t in p]
+                    self.assertEqual(len(playing), len(set(playing)))
+            # retour = aller inversé : chaque paire reçoit une fois de chaque côté
+            ordered = [p for day in clean for p in day]
+            self.assertEqual(len(set(ordered)), n * (n - 1))
+            homes = {t: sum(1 for h, _ in ordered if h == t) for t in teams}
+            self.assertEqual(set(homes.values()), {n - 1})
+            self.assertEqual(len(byes), len(clean) if n % 2 else 0)
+
+    def test_plan_respects_venues_and_blackouts(self):
+        start = timezone.localdate()
+        rounds = berger_rounds([1, 2, 3, 4])
+        plan = plan_schedule(
+            rounds, start_date=start, kickoffs=[time(15)], spacing_days=7,
+            venues={1: "Stade A", 2: "Stade A", 3: "Stade B", 4: "Stade C"},
+            blackout_dates={start}, team_blackouts={3: {start + timedelta(days=1)}},
+        )
+        self.assertEqual(plan["conflicts"], [])
+        slots = set()
+        for f in plan["fixtures"]:
+            day = timezone.localtime(f["datetime"]).date()
+            self.assertNotEqual(day, start)
+            if 3 in (f["home"], f["away"]):
+                self.assertNotEqual(day, start + timedelta(days=1))
+            key = (f["venue"], day, f["datetime"])
+            self.assertNotIn(key, slots)
+            slots.add(key)
+
+    def test_write_league_schedule_links_rounds(self):
+        clubs = [Club.objects.create(name=f"Club {i}") for i in range(4)]
+        plan = plan_schedule(
+            berger_rounds([c.id for c in clubs]), start_date=timezone.localdate(), kickoffs=[time(15)],
+        )
+        # MySQL : bulk_create ne renvoie pas les pk des journées
+        with patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False):
+            rounds, matches = write_league_schedule(plan)
+        self.assertEqual((rounds, matches), (6, 12))
+        self.assertFalse(Match.objects.filter(round__isnull=True).exists())
+        for rnd in Round.objects.all():
+            self.assertEqual(rnd.matches.count(), 2)
+
+
+# lecture dans la connexion du test : la version « détachée » fermerait la
+# connexion au milieu de la transaction de TestCase
+@patch("matches.live_stream._read_live_state_detached", _read_live_state)
+class LiveBroadcasterTests(TestCase):
+    def setUp(self):
+        self.home = Club.objects.create(name="Home")
+        self.away = Club.objects.create(name="Away")
+        self.scorer = Player.objects.create(first_name="Abdou", last_name="Diallo", club=self.home)
+        self.match = Match.objects.create(
+            datetime=timezone.now(), home_club=self.home, away_club=self.away, status="LIVE",
+            kickoff_1=timezone.now() - timedelta(minutes=20),
+        )
+
+    def test_diff_events(self):
+        old = _read_live_state()
+        goal = Goal.objects.create(match=self.match, club=self.home, player=self.scorer, minute=19)
+        self.match.home_score = 1
+        self.match.save()
+        new = _read_live_state(old)
+        events = _diff(old, new)
+        self.assertIn(("match", {"id": self.match.id, "home_score": 1}), events)
+        self.assertIn("goal", [ev for ev, _ in events])
+        self.assertEqual(_diff(new, _read_live_state(new)), [])
+
+        goal_id = goal.id
+        goal.delete()
+        self.match.status = "FT"
+        self.match.save()
+        final = _read_live_state(new)
+        events = _diff(new, final)
+        self.assertIn(("goal_removed", {"id": goal_id, "match": self.match.id}), events)
+        self.assertIn(("match_end", {"id": self.match.id}), events)
+        self.assertEqual(_snapshot_payload(final), {"matches": []})
+
+        # tour suivant : le match terminé sort de l'état sans 2e match_end
+        extra = [mid for mid, e in final.items() if e["info"]["status"] == "LIVE"]
+        after = _read_live_state(extra)
+        self.assertNotIn(self.match.id, after)
+        self.assertEqual(_diff(final, after), [])
+
+    def test_broadcaster_woken_after_commit(self):
+        with patch("matches.live_stream.broadcaster") as b:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                Goal.objects.create(match=self.match, club=self.home, player=self.scorer, minute=22)
+                # pas de relecture tant que l'écriture n'est pas validée
+                b.mark_dirty.assert_not_called()
+            self.assertTrue(callbacks)
+            for callback in callbacks:
+                callback()
+            b.mark_dirty.assert_called()
+
+    def test_subscribers_share_reads_and_receive_deltas(self):
+        async def scenario():
+            b = LiveBroadcaster()
+            q1, q2 = await b.subscribe(), await b.subscribe()
+            # 2 abonnés, 1 seule lecture de la base
+            self.assertEqual(b.reads, 1)
+            for q in (q1, q2):
+                self.assertTrue(q.get_nowait().startswith("event: snapshot"))
+
+            def write():
+                with self.captureOnCommitCallbacks(execute=True):
+                    Goal.objects.create(match=self.match, club=self.home, player=self.scorer, minute=21)
+
+            with patch("matches.live_stream.broadcaster", b):
+                await sync_to_async(write)()
+                chunks = [await asyncio.wait_for(q.get(), timeout=5) for q in (q1, q2)]
+            self.assertEqual(chunks[0], chunks[1])
+            self.assertIn("event: goal", chunks[0])
+            self.assertEqual(b.reads, 2)
+
+            # abonné trop lent : file vidée, un état complet à la place
+            for _ in range(QUEUE_SIZE + 1):
+                b._publish([("match", {"id": self.match.id})])
+            self.assertEqual(q1.qsize(), 1)
+            self.assertTrue(q1.get_nowait().startswith("event: snapshot"))
+
+            b.unsubscribe(q1)
+            b.unsubscribe(q2)
+            b._task.cancel()
+
+        async_to_sync(scenario)()
@@ -4,6 +4,7 @@ from rest_framework.routers import DefaultRouter
 
 # DRF (API publique / actions .py)
 from . import views as api
+from .live_stream import live_stream
 
 # ========= Admin rapides: import tolérant =========
 # On tente d'abord admin_views.py, sinon on retombe sur views.py si les fonctions y sont définies.
@@ -58,6 +59,9 @@ _safe_register(r"rounds",  "RoundViewSet",  "round")
 _safe_register(r"lineups", "LineupViewSet", "lineup")  # CRUD lineups (admin/public)
 
 urlpatterns = [
+    # Flux SSE du direct (avant le router : /matches/live/ reste l'action DRF)
+    path("matches/live/stream/", live_stream, name="matches_live_stream"),
+
     # API REST (DRF)
     path("", include(router.urls)),
 
@@ -76,6 +80,7 @@ urlpatterns = [
     path("stats/assists-leaders/",    api.assists_leaders,   name="assists_leaders"),  # ⬅️ AJOUT
     path("players/search/",           api.search_players,    name="players_search"),
     path("clubs/<int:club_id>/players-stats/", api.club_players_stats, name="club_players_stats"),
+    path("clubs/<int:club_id>/positions/",     api.club_positions,     name="club_positions"),
 ]
 
 # ========= Routes admin rapides (HTML + API JSON) =========
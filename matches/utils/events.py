@@ -1,10 +1,16 @@
 # matches/utils/events.py
 from __future__ import annotations
 import re
+from collections import defaultdict
+
 from django.db import transaction
 from clubs.models import Club
 from players.models import Player
+from players.aliases import (
+    AliasResolver, bulk_create_players, fill_bulk_pks, normalize_name, split_name,
+)
 from matches.models import Match, Goal, Card
+from matches.signals import coalesce_match_changes, notify_match_changed
 
 # Exemples acceptés :
 #   "Gaoussou Cisse 12'"
@@ -67,58 +73,431 @@ def _parse_cards_text(txt: str, club: Club) -> list[dict]:
         out.append({"club": club.id, "minute": minute, "player_name": name, "type": color})
     return out
 
-def _get_or_create_player_by_name(name: str, club: Club) -> Player | None:
-    name = (name or "").strip()
-    if not name:
+# =====================================================
+# Ingestion en 2 phases : plan (lectures groupées) puis écriture (bulk)
+# =====================================================
+#
+# Un enregistrement (record) = un but ou un carton déjà parsé :
+#   {"kind": "goal"|"card", "club_id", "minute",
+#    "player": (genre, valeur), "assist": (genre, valeur) | None,
+#    "type": "PEN"/"OG"/"" (but) ou "Y"/"R" (carton), "line": texte source}
+# genre : "id" | "number" | "name" (cf. admin_views._parse_actor_token).
+#
+# plan()  : 3 requêtes max (joueurs par id, par numéro, alias par nom),
+#           quel que soit le nombre de lignes.
+# apply() : 1 bulk_create joueurs manquants (+ leurs alias), 1 pour les buts,
+#           1 pour les cartons, puis une notification par match.
+
+class EventIngest:
+    def __init__(self, match, *, auto_create=True):
+        self.match = match
+        self.auto_create = auto_create
+        self.club_ids = {match.home_club_id, match.away_club_id}
+
+    # ---------- phase 1 : résolution ----------
+    def _actors(self, records):
+        for r in records:
+            yield r["club_id"], r.get("player")
+            if r.get("assist"):
+                yield r["club_id"], r["assist"]
+
+    def plan(self, records, *, replace=False):
+        records = [r for r in records if r.get("club_id") in self.club_ids]
+        actors = [(cid, a) for cid, a in self._actors(records) if a and a[0]]
+
+        ids = {v for _, (k, v) in actors if k == "id" and v is not None}
+        numbers = {v for _, (k, v) in actors if k == "number" and v is not None}
+        names = [v for _, (k, v) in actors if k == "name" and v]
+
+        by_id = dict(
+            Player.objects.filter(pk__in=ids).values_list("id", "club_id")
+        ) if ids else {}
+        by_number = {}
+        if numbers:
+            for pid, cid, num in (
+                Player.objects.filter(club_id__in=self.club_ids, number__in=numbers)
+                .order_by("id").values_list("id", "club_id", "number")
+            ):
+                by_number.setdefault((cid, num), pid)
+        resolver = AliasResolver(self.club_ids, names=names) if names else None
+
+        new_players = {}  # clé -> {"club_id", "first_name", "last_name", "number"}
+        ambiguous = set()  # (club_id, nom normalisé) désignant plusieurs joueurs
+
+        def resolve(club_id, actor):
+            """player_id, "new:<clé>" (joueur à créer) ou None."""
+            if not actor or not actor[0]:
+                return None
+            kind, value = actor
+            if kind == "id":
+                return value if by_id.get(value) == club_id else None
+            if kind == "number":
+                pid = by_number.get((club_id, value))
+                if pid or not self.auto_create:
+                    return pid
+                key = f"{club_id}:#{value}"
+                new_players.setdefault(key, {"club_id": club_id, "first_name": "", "last_name": "", "number": value})
+                return f"new:{key}"
+            if kind == "name":
+                pid = resolver.resolve(club_id, value) if resolver else None
+                if pid or not self.auto_create:
+                    return pid
+                normalized = normalize_name(value)
+                if resolver and resolver.is_ambiguous(club_id, value):
+                    # nom connu mais ambigu (deux "Diallo") : pas de 3e joueur
+                    ambiguous.add((club_id, normalized))
+                    return None
+                key = f"{club_id}:{normalized}"
+                first, last = split_name(value)
+                new_players.setdefault(key, {"club_id": club_id, "first_name": first, "last_name": last, "number": 0})
+                return f"new:{key}"
+            return None
+
+        plan = {"match": self.match.id, "replace": bool(replace), "create_players": [],
+                "goals": [], "cards": [], "skipped": [], "ambiguous": []}
+
+        for r in records:
+            player = resolve(r["club_id"], r.get("player"))
+            if r.get("player") and r["player"][0] and not player:
+                plan["skipped"].append(r.get("line") or "")
+                kind, value = r["player"]
+                if kind == "name" and (r["club_id"], normalize_name(value)) in ambiguous:
+                    plan["ambiguous"].append(r.get("line") or "")
+                continue
+            row = {"club_id": r["club_id"], "minute": r["minute"], "player": player, "type": r.get("type") or ""}
+            if r["kind"] == "goal":
+                row["assist"] = resolve(r["club_id"], r.get("assist"))
+                plan["goals"].append(row)
+            else:
+                row["type"] = row["type"] or "Y"
+                plan["cards"].append(row)
+
+        plan["create_players"] = [{"key": k, **v} for k, v in new_players.items()]
+        if replace:
+            # aperçu du remplacement : un joueur "new:" ne correspond à aucune ligne existante
+            plan["sync"] = diff_summary(diff_events(
+                self.match,
+                goals=[{"club_id": g["club_id"], "minute": g["minute"], "type": g["type"],
+                        "player_id": g["player"], "assist_player_id": g["assist"], "assist_name": ""}
+                       for g in plan["goals"]],
+                cards=[{"club_id": c["club_id"], "minute": c["minute"], "type": c["type"],
+                        "player_id": c["player"]} for c in plan["cards"]],
+            ))
+        return plan
+
+    # ---------- phase 2 : écriture ----------
+    @transaction.atomic
+    def apply(self, plan):
+        match = self.match
+        with coalesce_match_changes():
+            created = {}
+            if plan["create_players"]:
+                objs = bulk_create_players([
+                    Player(club_id=p["club_id"], first_name=p["first_name"],
+                           last_name=p["last_name"], number=p["number"])
+                    for p in plan["create_players"]
+                ])
+                created = {p["key"]: o.pk for p, o in zip(plan["create_players"], objs)}
+
+            def pid(ref):
+                if isinstance(ref, str) and ref.startswith("new:"):
+                    return created.get(ref[4:])
+                return ref
+
+            goals = [
+                {"club_id": g["club_id"], "minute": g["minute"], "type": g["type"],
+                 "player_id": pid(g["player"]), "assist_player_id": pid(g.get("assist")),
+                 "assist_name": ""}
+                for g in plan["goals"]
+            ]
+            cards = [
+                {"club_id": c["club_id"], "minute": c["minute"], "type": c["type"],
+                 "player_id": pid(c["player"])}
+                for c in plan["cards"]
+            ]
+            if plan.get("replace"):
+                # remplacement : seules les différences avec l'existant sont écrites
+                report = apply_diff(match, diff_events(match, goals=goals, cards=cards))
+                return {"goals": len(goals), "cards": len(cards), "players": len(created),
+                        "sync": report}
+            if goals:
+                Goal.objects.bulk_create([Goal(match=match, **g) for g in goals])
+                notify_match_changed(match.id, sender=Goal)
+            if cards:
+                Card.objects.bulk_create([Card(match=match, **c) for c in cards])
+                notify_match_changed(match.id, sender=Card)
+        return {"goals": len(goals), "cards": len(cards), "players": len(created)}
+
+
+# =====================================================
+# Lots JSON (API) : lecture + résolution groupée
+# =====================================================
+
+GOAL_FIELDS = ("club_id", "minute", "type", "player_id", "assist_player_id", "assist_name")
+CARD_FIELDS = ("club_id", "minute", "type", "player_id")
+
+
+class UnknownPlayers(Exception):
+    def __init__(self, ids):
+        super().__init__(f"Joueur(s) introuvable(s) : {ids}")
+        self.ids = ids
+
+
+def _int_or_none(v):
+    try:
+        return int(v)
+    except (TypeError, ValueError):
         return None
-    if hasattr(Player, "club"):
-        p = Player.objects.filter(name__iexact=name, club=club).first()
-        if p:
-            return p
-        p, _ = Player.objects.get_or_create(name=name, defaults={"club": club})
-        if getattr(p, "club_id", None) is None:
-            p.club = club
-            p.save(update_fields=["club"])
-        return p
-    # Modèle sans champ club
-    p, _ = Player.objects.get_or_create(name=name)
-    return p
+
+
+class EventPayload:
+    """
+    Lit un lot d'événements envoyé en JSON (buts et/ou cartons) :
+
+        goals : [{"id"?, "client_id"?, "club", "minute", "player" | "player_name",
+                  "assist_player" | "assist_name", "type"}]
+        cards : [{"id"?, "client_id"?, "club", "minute", "player" | "player_name", "type"}]
+
+    read()    : aucune requête (lignes hors clubs du match ignorées)
+    check()   : 1 requête (ids joueurs inconnus -> UnknownPlayers)
+    resolve() : 1 requête (alias) + 1 bulk_create des joueurs manquants ;
+                à appeler dans la transaction d'écriture. Renvoie les lignes
+                au format des champs du modèle (GOAL_FIELDS / CARD_FIELDS) ;
+                les noms ambigus sont listés dans `ambiguous`.
+    """
+
+    def __init__(self, match):
+        self.match = match
+        self.club_ids = {match.home_club_id, match.away_club_id}
+        self.goals = None
+        self.cards = None
+        self.ambiguous = []  # noms qui désignent plusieurs joueurs du club (cf. resolve)
+
+    def _common(self, i, raw):
+        if not isinstance(raw, dict):
+            return None
+        club_id = _int_or_none(raw.get("club"))
+        if club_id not in self.club_ids:
+            return None
+        return {
+            "id": _int_or_none(raw.get("id")),
+            "client_event_id": str(raw.get("client_id") or raw.get("event_id") or "").strip()[:64] or None,
+            "club_id": club_id,
+            "minute": max(0, _int_or_none(raw.get("minute")) or 0),
+            "player": raw.get("player") or None,
+            "player_name": str(raw.get("player_name") or "").strip(),
+            "_key": i,
+        }
+
+    @staticmethod
+    def _dedupe(rows):
+        # même client_id deux fois dans le lot : la dernière version gagne
+        out = {}
+        for r in rows:
+            out[r["client_event_id"] or f"#{r['_key']}"] = r
+        return list(out.values())
+
+    def read(self, goals_in=None, cards_in=None):
+        if goals_in is not None:
+            rows = []
+            for i, raw in enumerate(goals_in):
+                r = self._common(i, raw)
+                if r is None:
+                    continue
+                r["type"] = str(raw.get("type") or "").strip().upper()[:12]
+                r["assist"] = raw.get("assist_player") or None
+                r["assist_name"] = str(raw.get("assist_name") or raw.get("assist_player_name") or "").strip()
+                rows.append(r)
+            self.goals = self._dedupe(rows)
+        if cards_in is not None:
+            rows = []
+            for i, raw in enumerate(cards_in):
+                r = self._common(i, raw)
+                if r is None:
+                    continue
+                color = str(raw.get("type") or raw.get("color") or "Y").strip().upper()
+                r["type"] = "R" if color.startswith("R") else "Y"
+                rows.append(r)
+            self.cards = self._dedupe(rows)
+        return self
+
+    def _rows(self):
+        return (self.goals or []) + (self.cards or [])
+
+    def check(self):
+        refs = [v for r in self._rows() for v in (r["player"], r.get("assist")) if v]
+        bad = [v for v in refs if _int_or_none(v) is None]
+        wanted = {int(v) for v in refs if _int_or_none(v) is not None}
+        known = set(Player.objects.filter(pk__in=wanted).values_list("id", flat=True)) if wanted else set()
+        unknown = sorted(wanted - known) + bad
+        if unknown:
+            raise UnknownPlayers(unknown)
+        return self
+
+    def resolve(self, *, auto_create=True):
+        names = [
+            (r["club_id"], n)
+            for r in self._rows()
+            for v, n in ((r["player"], r["player_name"]), (r.get("assist"), r.get("assist_name", "")))
+            if not v and n
+        ]
+        resolver = AliasResolver(self.club_ids, names=[n for _, n in names]) if names else None
+        if resolver and auto_create:
+            # un nom ambigu (deux "Diallo") n'est pas recréé : il reste sans joueur
+            resolver.create_missing(names)
+        if resolver:
+            self.ambiguous = sorted({n for cid, n in names if resolver.is_ambiguous(cid, n)})
+
+        def pid(club_id, ref, name):
+            if ref:
+                return int(ref)
+            return resolver.resolve(club_id, name) if (name and resolver) else None
+
+        goals = cards = None
+        if self.goals is not None:
+            goals = []
+            for r in self.goals:
+                assist_id = pid(r["club_id"], r["assist"], r["assist_name"])
+                goals.append({
+                    "id": r["id"], "client_event_id": r["client_event_id"],
+                    "club_id": r["club_id"], "minute": r["minute"], "type": r["type"],
+                    "player_id": pid(r["club_id"], r["player"], r["player_name"]),
+                    "assist_player_id": assist_id,
+                    "assist_name": "" if assist_id else r["assist_name"],
+                })
+        if self.cards is not None:
+            cards = [{
+                "id": r["id"], "client_event_id": r["client_event_id"],
+                "club_id": r["club_id"], "minute": r["minute"], "type": r["type"],
+                "player_id": pid(r["club_id"], r["player"], r["player_name"]),
+            } for r in self.cards]
+        return goals, cards
+
+
+# =====================================================
+# Synchronisation par diff (au lieu de tout supprimer / recréer)
+# =====================================================
+#
+# On donne la liste COMPLÈTE voulue pour un match ; chaque ligne voulue est
+# rapprochée d'une ligne existante, dans cet ordre :
+#   1. par id serveur ("id"),
+#   2. par identifiant client (client_event_id),
+#   3. par contenu identique (club, minute, joueur, type...).
+# Lignes rapprochées et modifiées -> UPDATE ; non rapprochées -> INSERT ;
+# existantes restées seules -> DELETE. Les ids des buts inchangés sont conservés
+# et rien n'est notifié (caches, stats) si rien n'a changé.
+
+_SYNC_KINDS = (("goals", Goal, GOAL_FIELDS), ("cards", Card, CARD_FIELDS))
+
+
+def _diff_kind(model, fields, match, desired):
+    current = list(
+        model.objects.filter(match=match).order_by("id").values("id", "client_event_id", *fields)
+    )
+    by_id = {r["id"]: r for r in current}
+    by_client = {r["client_event_id"]: r for r in current if r["client_event_id"]}
+    matched, rest = {}, []
+
+    for d in desired:
+        r = by_id.get(d.get("id")) or by_client.get(d.get("client_event_id"))
+        if r and r["id"] not in matched:
+            matched[r["id"]] = (r, d)
+        else:
+            rest.append(d)
+
+    pool = defaultdict(list)
+    for r in current:
+        if r["id"] not in matched:
+            pool[tuple(r[f] for f in fields)].append(r)
+    inserts = []
+    for d in rest:
+        bucket = pool.get(tuple(d[f] for f in fields))
+        if bucket:
+            r = bucket.pop(0)
+            matched[r["id"]] = (r, d)
+        else:
+            inserts.append(d)
+
+    updates = []
+    for r, d in matched.values():
+        changed = [f for f in fields if d[f] != r[f]]
+        if d.get("client_event_id") and d["client_event_id"] != r["client_event_id"]:
+            changed.append("client_event_id")
+        if changed:
+            row = {**r, **{f: d[f] for f in changed}}
+            updates.append({"id": r["id"], "changed": changed, "row": row})
+
+    return {
+        "insert": inserts,
+        "update": updates,
+        "delete": [r["id"] for r in current if r["id"] not in matched],
+        "unchanged": len(matched) - len(updates),
+    }
+
+
+def diff_events(match, goals=None, cards=None):
+    """Plan de synchronisation (2 requêtes max, aucune écriture). None = type non synchronisé."""
+    diff = {}
+    for kind, model, fields in _SYNC_KINDS:
+        desired = goals if kind == "goals" else cards
+        if desired is not None:
+            diff[kind] = _diff_kind(model, fields, match, desired)
+    return diff
+
+
+def diff_summary(diff):
+    out = {"changed": False}
+    for kind, d in diff.items():
+        out[kind] = {
+            "inserted": len(d["insert"]), "updated": len(d["update"]),
+            "deleted": len(d["delete"]), "unchanged": d["unchanged"],
+        }
+        out["changed"] |= bool(d["insert"] or d["update"] or d["delete"])
+    return out
+
 
 @transaction.atomic
-def apply_events_from_text(
-    match: Match,
-    goals_home_txt: str | None,
-    goals_away_txt: str | None,
-    cards_home_txt: str | None,
-    cards_away_txt: str | None,
-    *,
-    replace: bool = False,
-):
-    """Crée/replace les buts & cartons à partir de 4 zones texte."""
-    if replace:
-        Goal.objects.filter(match=match).delete()
-        Card.objects.filter(match=match).delete()
-
-    # Buteurs home
-    for g in _parse_goals_text(goals_home_txt or "", match.home_club):
-        player = _get_or_create_player_by_name(g["player_name"], match.home_club)
-        Goal.objects.create(match=match, club=match.home_club, player=player, minute=g["minute"])
-
-    # Buteurs away
-    for g in _parse_goals_text(goals_away_txt or "", match.away_club):
-        player = _get_or_create_player_by_name(g["player_name"], match.away_club)
-        Goal.objects.create(match=match, club=match.away_club, player=player, minute=g["minute"])
-
-    # Cartons home
-    for c in _parse_cards_text(cards_home_txt or "", match.home_club):
-        player = _get_or_create_player_by_name(c["player_name"], match.home_club)
-        Card.objects.create(
-            match=match, club=match.home_club, player=player, minute=c["minute"], type=c["type"]
-        )
-
-    # Cartons away
-    for c in _parse_cards_text(cards_away_txt or "", match.away_club):
-        player = _get_or_create_player_by_name(c["player_name"], match.away_club)
-        Card.objects.create(
-            match=match, club=match.away_club, player=player, minute=c["minute"], type=c["type"]
-        )
+def apply_diff(match, diff):
+    """
+    Applique le plan : DELETE puis UPDATE (bulk_update) puis INSERT (bulk_create),
+    une notification par type modifié. Renvoie le résumé avec les ids touchés.
+    """
+    report = diff_summary(diff)
+    with coalesce_match_changes():
+        for kind, model, fields in _SYNC_KINDS:
+            d = diff.get(kind)
+            if not d:
+                continue
+            if d["delete"]:
+                model.objects.filter(match=match, id__in=d["delete"]).delete()
+            if d["update"]:
+                cols = sorted({f for u in d["update"] for f in u["changed"]})
+                # valeurs complètes de la ligne : les colonnes non modifiées gardent leur valeur
+                objs = [model(pk=u["id"], **{f: u["row"][f] for f in cols}) for u in d["update"]]
+                model.objects.bulk_update(objs, cols)
+            created = []
+            if d["insert"]:
+                created = model.objects.bulk_create([
+                    model(match=match, client_event_id=v.get("client_event_id"),
+                          **{f: v[f] for f in fields})
+                    for v in d["insert"]
+                ])
+                # bulk_create ne renvoie pas les pk sur MySQL : relecture par (match, client_event_id)
+                fill_bulk_pks(model, created, ("match_id", "client_event_id", *fields))
+            report[kind].update({
+                "inserted_ids": [o.pk for o in created],
+                "updated_ids": [u["id"] for u in d["update"]],
+                "deleted_ids": list(d["delete"]),
+            })
+            if d["insert"] or d["update"] or d["delete"]:
+                # bulk_create / bulk_update n'émettent pas post_save
+                notify_match_changed(match.id, sender=model)
+    return report
+
+
+def sync_events(match, goals=None, cards=None, *, dry_run=False):
+    """diff + application (ou seulement le résumé si dry_run)."""
+    diff = diff_events(match, goals=goals, cards=cards)
+    if dry_run:
+        return diff_summary(diff)
+    return apply_diff(match, diff)
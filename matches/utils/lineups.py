@@ -0,0 +1,69 @@
+# matches/utils/lineups.py
+"""
+Import de compositions en lot.
+
+Lineup.save() calcule seq = max(seq) + 1 à chaque insertion (1 agrégat par
+ligne) et deux admins simultanés peuvent obtenir le même seq. Ici :
+
+  1. verrou (select_for_update) sur le match, une seule fois pour le lot :
+     deux imports concurrents sur les mêmes (match, club) passent l'un après l'autre ;
+  2. max(seq) lu en 1 requête pour tous les clubs du lot (aucune si replace) ;
+  3. seq manquants attribués en mémoire, dans l'ordre du lot, club par club ;
+  4. un seul bulk_create, puis une seule notification match_changed (les
+     post_delete du remplacement sont regroupés, bulk_create n'émet pas post_save).
+"""
+from django.db import transaction
+from django.db.models import Max
+
+from matches.models import Match, Lineup
+from matches.signals import coalesce_match_changes, notify_match_changed
+from players.aliases import fill_bulk_pks
+
+
+def assign_seq(lineups, start):
+    """
+    Complète seq (None) à partir de start[club_id] + 1, dans l'ordre de la liste.
+    Un seq fourni est conservé et fait avancer le compteur du club.
+    """
+    last = dict(start)
+    for li in lineups:
+        cur = last.get(li.club_id) or 0
+        if li.seq is None:
+            li.seq = cur + 1
+        last[li.club_id] = max(cur, li.seq)
+    return lineups
+
+
+@transaction.atomic
+def import_lineups(match, lineups, *, replace=False):
+    """
+    lineups : instances Lineup non sauvegardées (club renseigné ; match forcé).
+    replace : supprime d'abord toutes les compositions du match.
+    Renvoie la liste des lignes créées (avec pk).
+    """
+    # suppressions (post_delete par ligne) + insertion : une seule notification
+    with coalesce_match_changes():
+        Match.objects.select_for_update().filter(pk=match.pk).first()
+
+        lineups = [li for li in lineups if li.club_id]
+        for li in lineups:
+            li.match = match
+
+        if replace:
+            Lineup.objects.filter(match=match).delete()
+            start = {}
+        else:
+            clubs = {li.club_id for li in lineups if li.seq is None}
+            start = dict(
+                Lineup.objects.filter(match=match, club_id__in=clubs)
+                .values("club_id").annotate(m=Max("seq"))
+                .values_list("club_id", "m")
+            ) if clubs else {}
+
+        assign_seq(lineups, start)
+        created = Lineup.objects.bulk_create(lineups) if lineups else []
+        # bulk_create ne renvoie pas les pk sur MySQL : relecture par (match, club, seq)
+        fill_bulk_pks(Lineup, created, ("match_id", "club_id", "seq"))
+        if created:
+            notify_match_changed(match.id, sender=Lineup)
+        return created
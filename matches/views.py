@@ -2,9 +2,9 @@
 from django.utils import timezone
 from django.utils.dateparse import parse_date, parse_datetime
 from django.db import transaction
-from django.db.models import Prefetch, Q, Max
+from django.db.models import Prefetch, Q
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.views.decorators.http import require_POST
 
 from rest_framework import viewsets, filters, permissions, status, mixins
@@ -16,7 +16,7 @@ from rest_framework.permissions import IsAdminUser
 
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .models import Match, Goal, Card, Round, Lineup, TeamInfoPerMatch
+from .models import Match, Goal, Card, Round, Lineup, TeamInfoPerMatch, RoundStandingSnapshot
 from .serializers import (
     MatchSerializer,
     GoalSerializer,
@@ -31,11 +31,26 @@ from players.models import Player
 from clubs.models import Club
 from collections import defaultdict
 
-from django.views.decorators.cache import cache_page
 from django.utils.decorators import method_decorator
 
+import json
+from types import SimpleNamespace
+from django.core.serializers.json import DjangoJSONEncoder
+from profootgn.cache import AGGREGATES, LIVE, SingleFlight, get_or_build, media_url
+
+from stats.stamps import conditional_view, flight_value, get_stamps, MATCHES, EVENTS, STANDINGS, CLUBS
+from stats.player_stats import leaders, player_totals, states as stat_states
+from .snapshots import CLOCK_FIELDS, serialized_matches, snapshot_pairs, with_clock
+from .signals import coalesce_match_changes, notify_match_changed
+from .utils.events import EventPayload, UnknownPlayers, GOAL_FIELDS, sync_events
+from .utils.lineups import import_lineups
+from .standings import standings_rows, snapshot_rows
+from .pagination import MatchKeysetPagination, descending, keyset_order, keyset_after
+from .serializers import current_minute_for, MatchFieldset, EXPANSIONS
+
 GOALS_REL_NAME = Goal._meta.get_field("match").remote_field.get_accessor_name()
 CARDS_REL_NAME = Card._meta.get_field("match").remote_field.get_accessor_name()
+TEAM_INFOS_REL_NAME = TeamInfoPerMatch._meta.get_field("match").remote_field.get_accessor_name()
 
 
 class ReadOnlyOrAdmin(permissions.IsAdminUser):
@@ -45,61 +60,167 @@ class ReadOnlyOrAdmin(permissions.IsAdminUser):
         return super().has_permission(request, view)
 
 
+# ----------------------------------------------------
+# Recalculs partagés entre workers : après un but, un seul worker recalcule,
+# les autres servent la version précédente (cf. profootgn.cache.SingleFlight)
+# ----------------------------------------------------
+LIVE_FLIGHT = SingleFlight("live", alias=LIVE, timeout=60 * 10)
+LIVE_LITE_FLIGHT = SingleFlight("live-lite", alias=LIVE, timeout=60 * 10)
+STANDINGS_FLIGHT = SingleFlight("standings", alias=AGGREGATES)
+ASSISTS_FLIGHT = SingleFlight("assists-leaders", alias=AGGREGATES, timeout=60 * 5)
+
+
 # ----------------------------------------------------
 # Horloge live envoyée au front
 # ----------------------------------------------------
-def _clock_payload_for_match(m: Match):
+def _clock_only(qs):
     """
-    Donne au front de quoi animer la minute localement.
-    - live_phase_start: timestamp ISO du début de la phase en cours
-      (kickoff_1 en 1ère MT, kickoff_2 en 2ème MT)
-    - live_phase_offset:
-        0 pour la 1ère MT
-        45 pour la 2ème MT
-    Si on ne peut pas animer (HT, FT, etc.), on renvoie None / None.
+    Même filtre/tri, mais sans JOIN ni prefetch : seulement les colonnes
+    utiles pour retrouver les snapshots et recalculer l'horloge.
     """
-    st = (getattr(m, "status", "") or "").upper()
-
-    if st == "LIVE":
-        # 2e mi-temps ?
-        if getattr(m, "kickoff_2", None):
-            return {
-                "live_phase_start": m.kickoff_2.isoformat(),
-                "live_phase_offset": 45,
-            }
-        # 1ère mi-temps ?
-        if getattr(m, "kickoff_1", None):
-            return {
-                "live_phase_start": m.kickoff_1.isoformat(),
-                "live_phase_offset": 0,
-            }
-        # LIVE mais sans kickoff connu
-        return {
-            "live_phase_start": None,
-            "live_phase_offset": None,
+    return qs.select_related(None).prefetch_related(None).only(*CLOCK_FIELDS)
+
+
+def _augment_matches_with_clock(matches, request):
+    """
+    Sérialise chaque match (via le cache de snapshots, cf. matches/snapshots.py)
+    + injecte current_minute / live_phase_start / live_phase_offset.
+    Important: on passe request pour avoir des URLs absolues.
+    Seuls les matchs absents du cache passent par MatchSerializer.
+    """
+    fieldset = MatchFieldset.from_query(request.query_params)
+    return serialized_matches(
+        matches,
+        request,
+        load_full=lambda ids: _match_queryset(fieldset).filter(id__in=ids),
+        fieldset=fieldset,
+    )
+
+
+def _live_clock_signature(request, stamps):
+    """
+    Minutes courantes des matchs en direct, pour l'ETag de /matches/live/ :
+    la minute avance sans écriture en base. Les horaires de coup d'envoi sont
+    mis en cache par version de "matches" → aucune requête en régime établi.
+    """
+    rows = get_or_build(
+        LIVE, "live-clock", [stamps.get(MATCHES, 0)],
+        lambda: list(
+            Match.objects.filter(status__in=["LIVE", "HT", "PAUSED"])
+            .order_by("id")
+            .values_list("status", "minute", "kickoff_1", "kickoff_2")
+        ),
+        timeout=60 * 10,
+    )
+    return ",".join(
+        str(current_minute_for(SimpleNamespace(status=st, minute=mn, kickoff_1=k1, kickoff_2=k2)))
+        for st, mn, k1, k2 in rows
+    )
+
+
+def _live_lite_rows():
+    qs = (
+        Match.objects
+        .filter(status__in=["LIVE", "HT", "PAUSED"])
+        .select_related("home_club", "away_club")
+        .only(
+            "id",
+            "home_score",
+            "away_score",
+            "minute",
+            "status",
+            "home_club__name",
+            "away_club__name",
+        )
+        .order_by("-datetime", "-id")
+    )
+    return [
+        {
+            "id": m.id,
+            "home_name": m.home_club.name,
+            "away_name": m.away_club.name,
+            "home_score": m.home_score,
+            "away_score": m.away_score,
+            "minute": m.minute,
+            "status": m.status,
         }
+        for m in qs
+    ]
 
-    # HT / FT / SCHEDULED ... => pas d'horloge animée
-    return {
-        "live_phase_start": None,
-        "live_phase_offset": None,
-    }
 
+# taille des lots lus en base pour l'export streamé
+STREAM_BATCH = 200
 
-def _augment_matches_with_clock(matches, request):
+
+def _stream_matches(qs, request):
     """
-    Sérialise chaque match + injecte live_phase_start/live_phase_offset.
-    Important: on passe request dans le serializer context
-    pour avoir des URLs absolues.
+    Export JSON complet (tableau) envoyé au fil de l'eau : lecture par lots
+    keyset de STREAM_BATCH matchs → mémoire constante quel que soit le volume.
     """
-    out = []
-    for m in matches:
-        base = MatchSerializer(m, context={"request": request}).data
-        clock_info = _clock_payload_for_match(m)
-        base["live_phase_start"] = clock_info["live_phase_start"]
-        base["live_phase_offset"] = clock_info["live_phase_offset"]
-        out.append(base)
-    return out
+    desc = descending(request)
+
+    def chunks():
+        yield "["
+        first, last = True, None
+        while True:
+            batch_qs = keyset_order(qs, desc)
+            if last is not None:
+                batch_qs = keyset_after(batch_qs, last.datetime, last.pk, desc=desc)
+            batch = list(batch_qs[:STREAM_BATCH])
+            if not batch:
+                break
+            for item in _augment_matches_with_clock(batch, request):
+                yield ("" if first else ",") + json.dumps(item, cls=DjangoJSONEncoder)
+                first = False
+            if len(batch) < STREAM_BATCH:
+                break
+            last = batch[-1]
+        yield "]"
+
+    return StreamingHttpResponse(chunks(), content_type="application/json")
+
+
+def _match_queryset(fieldset=None):
+    """
+    Queryset Match avec ce que lit MatchSerializer préchargé, selon le fieldset
+    (défaut : tout, compos comprises) : buts (+ buteur, club, passeur), cartons,
+    infos d'équipe, compos. Une expansion non demandée = un prefetch en moins.
+    Le nombre de requêtes reste fixe quel que soit le nombre de matchs.
+    """
+    if fieldset is None:
+        fieldset = MatchFieldset(expand=EXPANSIONS.keys())
+    expand = fieldset.expand
+
+    prefetches = []
+    if "goals" in expand:
+        qs_goals = (
+            Goal.objects.select_related("player", "club", "assist_player")
+            .order_by("minute", "id")
+        )
+        prefetches.append(Prefetch(GOALS_REL_NAME, queryset=qs_goals))
+    if "cards" in expand:
+        qs_cards = Card.objects.select_related("player", "club").order_by("minute", "id")
+        prefetches.append(Prefetch(CARDS_REL_NAME, queryset=qs_cards))
+    if "team_info" in expand:
+        prefetches.append(Prefetch(TEAM_INFOS_REL_NAME, queryset=TeamInfoPerMatch.objects.all()))
+    if "lineups" in expand:
+        # prefer seq ordering when available (seq nullable)
+        qs_lineups = (
+            Lineup.objects.select_related("player", "club")
+            .order_by("club_id", "-is_starting", "seq", "id")
+        )
+        prefetches.append(Prefetch("lineups", queryset=qs_lineups))
+
+    # JOINs seulement si un champ les lit
+    related = []
+    if any(fieldset.allows(f) for f in ("home_club_name", "home_club_logo")):
+        related.append("home_club")
+    if any(fieldset.allows(f) for f in ("away_club_name", "away_club_logo")):
+        related.append("away_club")
+    if any(fieldset.allows(f) for f in ("round_name", "round_number")):
+        related.append("round")
+
+    return Match.objects.select_related(*related).prefetch_related(*prefetches)
 
 
 class MatchViewSet(viewsets.ModelViewSet):
@@ -116,24 +237,10 @@ class MatchViewSet(viewsets.ModelViewSet):
     search_fields = ["home_club__name", "away_club__name", "venue"]
     ordering_fields = ["datetime", "minute", "id"]
     ordering = ["-datetime", "-id"]
+    pagination_class = MatchKeysetPagination
 
     def get_queryset(self):
-        qs_goals = Goal.objects.select_related("player", "club").order_by("minute", "id")
-        qs_cards = Card.objects.select_related("player", "club").order_by("minute", "id")
-        # prefer seq ordering when available (seq nullable)
-        qs_lineups = (
-            Lineup.objects.select_related("player", "club")
-            .order_by("club_id", "-is_starting", "seq", "id")
-        )
-
-        qs = (
-            Match.objects.select_related("home_club", "away_club", "round")
-            .prefetch_related(
-                Prefetch(GOALS_REL_NAME, queryset=qs_goals),
-                Prefetch(CARDS_REL_NAME, queryset=qs_cards),
-                Prefetch("lineups", queryset=qs_lineups),
-            )
-        )
+        qs = _match_queryset()
 
         qp = self.request.query_params
 
@@ -179,12 +286,23 @@ class MatchViewSet(viewsets.ModelViewSet):
 
     # list / retrieve / actions custom => on ajoute live_phase_* et on garde request
     def list(self, request, *args, **kwargs):
-        qs = self.filter_queryset(self.get_queryset())
-        data = _augment_matches_with_clock(qs, request)
-        return Response(data)
+        """
+        - par défaut                 : pagination keyset {"next", "results"}
+                                       (DEFAULT_PAGE_SIZE matchs, ?page_size=N, ?cursor=...)
+        - ?stream=1                  : export complet streamé (tableau JSON), sur demande
+        """
+        qs = _clock_only(self.filter_queryset(self.get_queryset()))
+
+        if str(request.query_params.get("stream", "")).lower() in {"1", "true", "yes", "on"}:
+            return _stream_matches(qs, request)
+
+        page = self.paginate_queryset(qs)
+        return self.get_paginated_response(_augment_matches_with_clock(page, request))
 
     def retrieve(self, request, *args, **kwargs):
-        m = self.get_object()
+        qs = _clock_only(self.filter_queryset(self.get_queryset()))
+        m = get_object_or_404(qs, pk=kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+        self.check_object_permissions(request, m)
         data = _augment_matches_with_clock([m], request)[0]
         return Response(data)
 
@@ -196,7 +314,7 @@ class MatchViewSet(viewsets.ModelViewSet):
             or 10
         )
         qs = (
-            self.get_queryset()
+            _clock_only(self.get_queryset())
             .filter(status__in=["FT", "FINISHED"])
             .order_by("-datetime", "-id")[:limit]
         )
@@ -212,65 +330,39 @@ class MatchViewSet(viewsets.ModelViewSet):
         )
         now = timezone.now()
         qs = (
-            self.get_queryset()
+            _clock_only(self.get_queryset())
             .filter(status="SCHEDULED", datetime__gte=now)
             .order_by("datetime", "id")[:limit]
         )
         data = _augment_matches_with_clock(qs, request)
         return Response(data)
 
-    @method_decorator(cache_page(5))
+    # plus de cache_page(5) : il resservait un ETag périmé ; le 304 coûte 1 requête
+    @method_decorator(conditional_view(MATCHES, EVENTS, CLUBS, extra=_live_clock_signature))
     @action(detail=False, methods=["get"])
     def live(self, request):
-        qs_goals = Goal.objects.select_related("player", "club").order_by("minute", "id")
-        qs_cards = Card.objects.select_related("player", "club").order_by("minute", "id")
+        fieldset = MatchFieldset.from_query(request.query_params)
 
-        qs = (
-        Match.objects
-        .select_related("home_club", "away_club", "round")
-        .prefetch_related(
-            Prefetch(GOALS_REL_NAME, queryset=qs_goals),
-            Prefetch(CARDS_REL_NAME, queryset=qs_cards),
-        )
-        .filter(status__in=["LIVE", "HT", "PAUSED"])
-        .order_by("-datetime", "-id")
-    )
+        def build():
+            qs = (
+                _clock_only(Match.objects.all())
+                .filter(status__in=["LIVE", "HT", "PAUSED"])
+                .order_by("-datetime", "-id")
+            )
+            return snapshot_pairs(
+                qs, request,
+                load_full=lambda ids: _match_queryset(fieldset).filter(id__in=ids),
+                fieldset=fieldset,
+            )
 
-        data = _augment_matches_with_clock(qs, request)
-        return Response(data)
-    @method_decorator(cache_page(5))
+        # horloge recalculée à chaque réponse, même sur une valeur partagée
+        return Response(with_clock(flight_value(LIVE_FLIGHT, request, build), fieldset))
+
+    @method_decorator(conditional_view(MATCHES, CLUBS))
     @action(detail=False, methods=["get"], url_path="live-lite")
     def live_lite(self, request):
-        qs = (
-            Match.objects
-            .filter(status__in=["LIVE", "HT", "PAUSED"])
-            .select_related("home_club", "away_club")
-            .only(
-                "id",
-                "home_score",
-                "away_score",
-                "minute",
-                "status",
-                "home_club__name",
-                "away_club__name",
-            )
-            .order_by("-datetime", "-id")
-        )
-
-        data = [
-            {
-                "id": m.id,
-                "home_name": m.home_club.name,
-                "away_name": m.away_club.name,
-                "home_score": m.home_score,
-                "away_score": m.away_score,
-                "minute": m.minute,
-                "status": m.status,
-            }
-            for m in qs
-        ]
+        return Response(flight_value(LIVE_LITE_FLIGHT, request, _live_lite_rows))
 
-        return Response(data)
     @action(
         detail=True,
         methods=["get"],
@@ -317,13 +409,52 @@ class MatchViewSet(viewsets.ModelViewSet):
             ti.save()
             out[side] = TeamInfoSerializer(ti).data
         return Response(out, status=status.HTTP_200_OK)
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="events/sync",
+        permission_classes=[IsAdminUser],
+    )
+    def action_sync_events(self, request, pk=None):
+        """
+        POST {"goals": [...], "cards": [...], "dry_run": bool}
+        Liste COMPLÈTE voulue des buts et/ou cartons du match (un type absent
+        n'est pas touché). Chaque élément : "id"? (serveur), "client_id"?,
+        "club", "minute", "player" | "player_name", "type"
+        (+ "assist_player" | "assist_name" pour les buts).
+        Seules les différences sont écrites ; sans différence, aucune écriture
+        et aucune invalidation (caches, stats).
+        """
+        match = get_object_or_404(Match, pk=pk)
+        data = request.data or {}
+        goals_in, cards_in = data.get("goals"), data.get("cards")
+        if not all(x is None or isinstance(x, list) for x in (goals_in, cards_in)):
+            return Response({"ok": False, "detail": "Paramètres invalides."}, status=400)
+        dry_run = str(data.get("dry_run", "")).lower() in ("1", "true", "yes", "on")
+
+        payload = EventPayload(match).read(goals_in=goals_in, cards_in=cards_in)
+        try:
+            payload.check()
+        except UnknownPlayers as e:
+            return Response(
+                {"ok": False, "detail": "Joueur(s) introuvable(s).", "players": e.ids},
+                status=404,
+            )
+
+        with transaction.atomic():
+            Match.objects.select_for_update().filter(pk=match.pk).first()
+            # en simulation, aucun joueur n'est créé (noms inconnus -> joueur vide)
+            goals, cards = payload.resolve(auto_create=not dry_run)
+            report = sync_events(match, goals=goals, cards=cards, dry_run=dry_run)
+        return Response({"ok": True, "dry_run": dry_run, **report})
+
     @action(
         detail=True,
         methods=["post"],
         url_path="admin/lineups/replace",
         permission_classes=[IsAdminUser],
     )
-    
     def action_replace_lineups(self, request, pk=None):
         """
         Replace the lineups for a match (admin bulk replace).
@@ -404,11 +535,8 @@ class MatchViewSet(viewsets.ModelViewSet):
             # if club provided as id, convert to model if desired, but Lineup model FK accepts id so it's okay
             to_create.append(Lineup(**validated))
 
-        # persist in transaction: delete existing for this match then bulk_create
-        with transaction.atomic():
-            Lineup.objects.filter(match=match).delete()
-            if to_create:
-                Lineup.objects.bulk_create(to_create)
+        # persist: lock match once, delete existing then a single bulk_create
+        import_lineups(match, to_create, replace=True)
 
         qs = (
             Lineup.objects.filter(match=match)
@@ -423,7 +551,7 @@ class GoalViewSet(viewsets.ModelViewSet):
     authentication_classes = [SessionAuthentication, JWTAuthentication]
     permission_classes = [ReadOnlyOrAdmin]
 
-    queryset = Goal.objects.select_related("match", "player", "club")
+    queryset = Goal.objects.select_related("match", "player", "club", "assist_player")
     serializer_class = GoalSerializer
 
     @action(
@@ -438,7 +566,7 @@ class GoalViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Paramètre 'match' requis."}, status=400)
         qs = (
             Goal.objects.filter(match_id=mid)
-            .select_related("player", "club")
+            .select_related("player", "club", "assist_player")
             .order_by("minute", "id")
         )
         return Response(
@@ -452,6 +580,18 @@ class GoalViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAdminUser],
     )
     def bulk(self, request):
+        """
+        POST {"match": id, "replace": bool, "goals": [{
+            "club", "minute", "player" | "player_name",
+            "assist_player" | "assist_name", "type",
+            "client_id"   # optionnel : identifiant stable côté client
+        }]}
+        Clubs / joueurs résolus en amont (1 requête par nature, pas par but).
+        Un but dont le client_id existe déjà pour ce match est mis à jour :
+        renvoyer le même lot après une coupure réseau ne crée pas de doublon.
+        Un nom qui désigne plusieurs joueurs du club n'est ni rattaché ni
+        recréé : il est renvoyé dans "ambiguous".
+        """
         match_id = request.data.get("match")
         goals_in = request.data.get("goals", [])
         replace = bool(request.data.get("replace"))
@@ -462,94 +602,74 @@ class GoalViewSet(viewsets.ModelViewSet):
             )
 
         match = get_object_or_404(Match, pk=match_id)
-        allowed_clubs = {match.home_club_id, match.away_club_id}
 
-        with transaction.atomic():
-            if replace:
-                Goal.objects.filter(match=match).delete()
+        # lecture du lot (aucune requête) + ids joueurs (une requête)
+        payload = EventPayload(match).read(goals_in=goals_in)
+        try:
+            payload.check()
+        except UnknownPlayers as e:
+            return Response(
+                {"ok": False, "detail": "Joueur(s) introuvable(s).", "players": e.ids},
+                status=404,
+            )
 
-            to_create = []
-            for g in goals_in:
-                club_id = g.get("club")
-                try:
-                    club_id = int(club_id)
-                except (TypeError, ValueError):
-                    continue
-                if club_id not in allowed_clubs:
-                    continue
-                club = get_object_or_404(Club, pk=club_id)
-
-                minute = g.get("minute") or 0
-                try:
-                    minute = int(minute)
-                except Exception:
-                    minute = 0
-
-                player = None
-                player_id = g.get("player")
-                player_name = (g.get("player_name") or "").strip()
-                if player_id:
-                    player = get_object_or_404(Player, pk=player_id)
-                elif player_name:
-                    if hasattr(Player, "club"):
-                        player = Player.objects.filter(
-                            name__iexact=player_name, club=club
-                        ).first()
-                        if not player:
-                            player, _ = Player.objects.get_or_create(
-                                name=player_name, defaults={"club": club}
-                            )
-                        elif getattr(player, "club_id", None) is None:
-                            player.club = club
-                            player.save(update_fields=["club"])
-                    else:
-                        player, _ = Player.objects.get_or_create(name=player_name)
-
-                assist_player = None
-                assist_name = (
-                    g.get("assist_name") or g.get("assist_player_name") or ""
-                ).strip()
-                assist_id = g.get("assist_player")
-                if assist_id:
-                    assist_player = get_object_or_404(Player, pk=assist_id)
-                elif assist_name:
-                    if hasattr(Player, "club"):
-                        assist_player = Player.objects.filter(
-                            name__iexact=assist_name, club=club
-                        ).first()
-                        if not assist_player:
-                            assist_player, _ = Player.objects.get_or_create(
-                                name=assist_name, defaults={"club": club}
-                            )
-                        elif getattr(assist_player, "club_id", None) is None:
-                            assist_player.club = club
-                            assist_player.save(update_fields=["club"])
-                    else:
-                        assist_player = None
-
-                to_create.append(
-                    Goal(
-                        match=match,
-                        club=club,
-                        player=player,
-                        minute=minute,
-                        assist_player=assist_player if assist_player else None,
-                        assist_name=("" if assist_player else assist_name),
-                    )
-                )
-
-            if to_create:
-                Goal.objects.bulk_create(to_create)
+        with transaction.atomic(), coalesce_match_changes():
+            # verrou par match : deux envois concurrents du même lot ne se doublent pas
+            Match.objects.select_for_update().filter(pk=match.pk).first()
+            # joueurs par nom : index d'alias, une requête ; manquants créés en un bulk
+            goals, _ = payload.resolve()
+
+            if replace:
+                # liste complète : seules les différences sont écrites
+                report = sync_events(match, goals=goals)["goals"]
+                inserted, updated = report["inserted"], report["updated"]
+            else:
+                inserted, updated = _upsert_goals(match, goals)
 
         qs = (
             Goal.objects.filter(match=match)
-            .select_related("player", "club")
+            .select_related("player", "club", "assist_player")
             .order_by("minute", "id")
         )
         data = GoalSerializer(
             qs, many=True, context={"request": request}
         ).data
-        return Response({"ok": True, "created": data})
+        return Response({
+            "ok": True,
+            "created": data,
+            "inserted": inserted,
+            "updated": updated,
+            "ambiguous": payload.ambiguous,
+        })
+
+
+def _upsert_goals(match, goals):
+    """Ajout de buts ; un client_id déjà connu pour ce match met à jour le but existant."""
+    client_ids = [g["client_event_id"] for g in goals if g["client_event_id"]]
+    existing = {
+        g.client_event_id: g
+        for g in Goal.objects.filter(match=match, client_event_id__in=client_ids)
+    } if client_ids else {}
+
+    to_create, to_update = [], []
+    for values in goals:
+        values = {k: v for k, v in values.items() if k != "id"}
+        goal = existing.get(values["client_event_id"])
+        if goal:
+            for k, v in values.items():
+                setattr(goal, k, v)
+            to_update.append(goal)
+        else:
+            to_create.append(Goal(match=match, **values))
+
+    if to_update:
+        Goal.objects.bulk_update(to_update, list(GOAL_FIELDS))
+    if to_create:
+        Goal.objects.bulk_create(to_create)
+    if to_update or to_create:
+        # bulk_create / bulk_update n'émettent pas post_save
+        notify_match_changed(match.id, sender=Goal)
+    return len(to_create), len(to_update)
 
 
 class CardViewSet(viewsets.ModelViewSet):
@@ -605,16 +725,13 @@ class LineupViewSet(
         match = validated.get("match") or None
         club = validated.get("club") or None
 
-        seq_provided = "seq" in validated and validated.get("seq") is not None
-
-        with transaction.atomic():
-            if not seq_provided and match and club:
-                agg = Lineup.objects.filter(match=match, club=club).aggregate(max_seq=Max("seq"))
-                max_seq = agg.get("max_seq") or 0
-                new_seq = int(max_seq) + 1
-                instance = serializer.save(seq=new_seq)
-            else:
-                instance = serializer.save()
+        if match and club:
+            # même chemin que les imports en lot : verrou du match + seq en mémoire
+            data = {k: v for k, v in validated.items() if k != "note"}
+            instance = import_lineups(match, [Lineup(**data)])[0]
+            serializer.instance = instance
+        else:
+            instance = serializer.save()
 
         headers = self.get_success_headers(serializer.data)
         out = LineupSerializer(instance, context={"request": request}).data
@@ -846,6 +963,7 @@ def suspendre_match(request):
     return JsonResponse({"ok": True, "status": m.status})
 
 
+@conditional_view(STANDINGS, CLUBS)
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
 def standings_view(request):
@@ -856,109 +974,65 @@ def standings_view(request):
         "1", "true", "yes", "on"
     }
 
-    finished = ("FT", "FINISHED")
-    liveish = ("LIVE", "HT", "PAUSED")
-
     def _abs_logo(club):
         """
         URL absolue du logo club (ou None).
         """
         if not club or not getattr(club, "logo", None):
             return None
-        try:
-            raw = club.logo.url
-        except Exception:
-            raw = str(getattr(club, "logo", "")).strip()
-            if not raw:
-                return None
+        raw = media_url(club.logo)
+        if not raw:
+            return None
         if raw.startswith("http://") or raw.startswith("https://"):
             return raw
         return request.build_absolute_uri(raw) if request else raw
 
-    # tableau init
-    rows = {}
-    for c in Club.objects.all().order_by("name"):
-        rows[c.id] = {
-            "club_id": c.id,
-            "club_name": c.name,
-            "club_logo": _abs_logo(c),
-            "played": 0,
-            "wins": 0,
-            "draws": 0,
-            "losses": 0,
-            "goals_for": 0,
-            "goals_against": 0,
-            "goal_diff": 0,
-            "points": 0,
-        }
-
-    statuses = finished + (liveish if include_live else ())
-    qs = (
-        Match.objects.filter(status__in=statuses)
-        .select_related("home_club", "away_club")
-        .order_by("datetime", "id")
-    )
-
-    # fallback si pas de matches terminés (ex: début de saison) ET include_live=0
-    if not qs.exists() and not include_live:
-        statuses = finished + liveish
-        qs = (
-            Match.objects.filter(status__in=statuses)
-            .select_related("home_club", "away_club")
-            .order_by("datetime", "id")
-        )
-
-    counted = 0
-    for m in qs:
-        if not m.home_club_id or not m.away_club_id:
-            continue
-        h, a = m.home_club_id, m.away_club_id
-        hs, as_ = int(m.home_score or 0), int(m.away_score or 0)
-
-        rows[h]["played"] += 1
-        rows[a]["played"] += 1
-
-        rows[h]["goals_for"] += hs
-        rows[h]["goals_against"] += as_
-        rows[a]["goals_for"] += as_
-        rows[a]["goals_against"] += hs
-
-        if hs > as_:
-            rows[h]["wins"] += 1
-            rows[a]["losses"] += 1
-            rows[h]["points"] += 3
-        elif hs < as_:
-            rows[a]["wins"] += 1
-            rows[h]["losses"] += 1
-            rows[a]["points"] += 3
+    # ?as_of_matchday=N : classement après la journée N (snapshot précalculé)
+    as_of = request.query_params.get("as_of_matchday")
+    if as_of is not None:
+        try:
+            as_of = int(as_of)
+        except (TypeError, ValueError):
+            return Response({"detail": "as_of_matchday doit être un entier."}, status=400)
+
+    def build():
+        as_of_round, live_counted = None, 0
+        if as_of is not None:
+            as_of_round, rows = snapshot_rows(as_of)
         else:
-            rows[h]["draws"] += 1
-            rows[a]["draws"] += 1
-            rows[h]["points"] += 1
-            rows[a]["points"] += 1
-
-        counted += 1
-
-    out = []
-    for r in rows.values():
-        r["goal_diff"] = r["goals_for"] - r["goals_against"]
-        out.append(r)
-
-    out.sort(
-        key=lambda x: (
-            -x["points"],
-            -x["goal_diff"],
-            -x["goals_for"],
-            x["club_name"].lower(),
+            # classement stocké (matchs terminés) + direct superposé à la volée
+            rows, live_counted = standings_rows(include_live=include_live, live_fallback=True)
+
+        out = []
+        for r in rows:
+            club = r.pop("club")
+            out.append({
+                "club_id": club.id,
+                "club_name": club.name,
+                "club_logo": _abs_logo(club),
+                **{k: r[k] for k in ("played", "wins", "draws", "losses",
+                                     "goals_for", "goals_against", "goal_diff", "points")},
+            })
+
+        out.sort(
+            key=lambda x: (
+                -x["points"],
+                -x["goal_diff"],
+                -x["goals_for"],
+                x["club_name"].lower(),
+            )
         )
-    )
+        return out, as_of_round, live_counted
+
+    out, as_of_round, live_counted = flight_value(STANDINGS_FLIGHT, request, build)
 
     if debug_flag:
         return Response(
             {
                 "debug": {
-                    "statuses_used": list(statuses),
-                    "matches_counted": counted,
+                    "source": "matches.RoundStandingSnapshot" if as_of is not None else "matches.StandingRow",
+                    "as_of_matchday": as_of_round,
+                    "live_matches_counted": live_counted,
                     "include_live": include_live,
                 },
                 "table": out,
@@ -967,19 +1041,30 @@ def standings_view(request):
     return Response(out)
 
 
+@conditional_view(STANDINGS, CLUBS)
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+def club_positions(request, club_id: int):
+    """
+    GET /api/clubs/<id>/positions/
+    Évolution du classement du club après chaque journée (snapshots, sans relire les matchs).
+    """
+    history = (
+        RoundStandingSnapshot.objects.filter(club_id=club_id)
+        .order_by("round_number")
+        .values("round_number", "position", "points", "played", "goals_for", "goals_against")
+    )
+    return Response({"club_id": club_id, "history": list(history)})
+
+
 # ---------- utilitaires communs ----------
 def _abs_media(request, file_or_url):
     """
     Renvoyer une URL absolue pour une image (photo joueur, logo club...).
     """
-    if not file_or_url:
+    url = media_url(file_or_url)
+    if not url:
         return None
-    try:
-        url = file_or_url.url
-    except Exception:
-        url = str(file_or_url).strip()
-        if not url:
-            return None
     if url.startswith("http://") or url.startswith("https://"):
         return url
     return request.build_absolute_uri(url) if request else url
@@ -991,19 +1076,13 @@ def _player_fullname(p):
     return f"{getattr(p,'first_name','')} {getattr(p,'last_name','')}".strip()
 
 
-def _is_own_goal(goal):
-    t = (getattr(goal, "type", "") or getattr(goal, "kind", "") or "").upper()
-    return bool(getattr(goal, "own_goal", False)) or t in {
-        "OG",
-        "CSC",
-        "OWN_GOAL",
-        "OWNGOAL",
-    }
-
-
 @api_view(["GET"])
 @permission_classes([permissions.AllowAny])
 def assists_leaders(request):
+    """
+    Meilleurs passeurs, lus depuis stats.PlayerStat (passes en texte libre
+    résolues à l'écriture, jamais créditées au buteur lui-même).
+    """
     include_live = str(request.query_params.get("include_live", "1")).lower() in {
         "1",
         "true",
@@ -1018,88 +1097,35 @@ def assists_leaders(request):
     club_filter = request.query_params.get("club")
     club_id = int(club_filter) if (club_filter and str(club_filter).isdigit()) else None
 
-    finished = ("FT", "FINISHED")
-    liveish = ("LIVE", "HT", "PAUSED")
-    statuses = finished + (liveish if include_live else ())
-
-    matches_qs = Match.objects.filter(status__in=statuses).only("id")
-    goals_qs = (
-        Goal.objects.filter(match__in=matches_qs)
-        .select_related("assist_player", "assist_player__club", "player", "club")
-        .only(
-            "id",
-            "assist_player_id",
-            "assist_name",
-            "player_id",
-            "player_name",
-            "club_id",
-        )
-        .order_by("id")
-    )
-    if club_id:
-        goals_qs = goals_qs.filter(club_id=club_id)
-
-    club_ids = set(goals_qs.values_list("club_id", flat=True))
-    name_index = {}
-    if club_ids:
-        ps = (
-            Player.objects.filter(club_id__in=club_ids)
-            .select_related("club")
-            .only(
-                "id",
-                "name",
-                "first_name",
-                "last_name",
-                "club_id",
-                "photo",
-            )
-        )
-        for p in ps:
-            nm = _player_fullname(p)
-            if nm:
-                name_index[(p.club_id, nm.lower())] = p
-
-    counts = defaultdict(int)
-    meta = {}
-
-    for g in goals_qs:
-        scorer = g.player
-        if not scorer:
-            pname = (getattr(g, "player_name", "") or "").strip().lower()
-            scorer = name_index.get((g.club_id, pname))
-        scorer_id = getattr(scorer, "id", None)
-
-        p = g.assist_player
-        if not p:
-            nm = (g.assist_name or "").strip().lower()
-            if nm:
-                p = name_index.get((g.club_id, nm))
-        if not p:
-            continue
-
-        # pas d'assist créditée au buteur lui-même
-        if scorer_id and getattr(p, "id", None) == scorer_id:
-            continue
+    def build():
+        top = leaders("assists", stat_states(include_live=include_live), club_id=club_id, limit=limit)
+        players = Player.objects.select_related("club").in_bulk([pid for pid, _ in top])
 
-        counts[p.id] += 1
-        if p.id not in meta:
+        rows = []
+        for pid, n in top:
+            p = players.get(pid)
+            if not p:
+                continue
             club = getattr(p, "club", None)
-            meta[p.id] = {
-                "player_id": p.id,
-                "player_name": _player_fullname(p) or f"Joueur #{p.id}",
-                "player_photo": _abs_media(request, getattr(p, "photo", None)),
-                "club_id": getattr(club, "id", None),
-                "club_name": getattr(club, "name", None),
-                "club_logo": _abs_media(
-                    request, getattr(club, "logo", None) if club else None
-                ),
-            }
+            rows.append(
+                {
+                    "player_id": p.id,
+                    "player_name": _player_fullname(p) or f"Joueur #{p.id}",
+                    "player_photo": _abs_media(request, getattr(p, "photo", None)),
+                    "club_id": getattr(club, "id", None),
+                    "club_name": getattr(club, "name", None),
+                    "club_logo": _abs_media(
+                        request, getattr(club, "logo", None) if club else None
+                    ),
+                    "assists": int(n),
+                }
+            )
+        rows.sort(key=lambda x: (-x["assists"], (x.get("player_name") or "").lower()))
+        return rows
 
-    rows = [{**meta[pid], "assists": int(n)} for pid, n in counts.items()]
-    rows.sort(key=lambda x: (-x["assists"], (x.get("player_name") or "").lower()))
-    if limit > 0:
-        rows = rows[:limit]
-    return Response(rows)
+    # PlayerStat suit match_changed (buts / cartons) ; un joueur renommé
+    # apparaît au plus tard à l'expiration (ASSISTS_FLIGHT.timeout)
+    return Response(flight_value(ASSISTS_FLIGHT, request, build, stamps=get_stamps([MATCHES, EVENTS, CLUBS])))
 
 
 @api_view(["GET"])
@@ -1154,71 +1180,22 @@ def search_players(request):
 def club_players_stats(request, club_id: int):
     club = get_object_or_404(Club, pk=club_id)
 
-    m_q = Q(home_club=club) | Q(away_club=club)
-    match_ids = list(Match.objects.filter(m_q).values_list("id", flat=True))
-
     players_rel = getattr(club, "players", None)
     if players_rel and hasattr(players_rel, "all"):
         players = list(players_rel.all())
     else:
         players = list(Player.objects.filter(club=club))
-    id_to_player = {p.id: p for p in players}
-    name_to_id = {}
-    for p in players:
-        full = _player_fullname(p)
-        if full:
-            name_to_id[full.lower()] = p.id
-
-    agg = defaultdict(lambda: {"goals": 0, "assists": 0, "yc": 0, "rc": 0})
 
-    goals = (
-        Goal.objects.filter(match_id__in=match_ids, club=club)
-        .select_related("player", "assist_player")
-        .order_by("minute", "id")
+    # totaux matérialisés (stats.PlayerStat) des événements de ce club, tous matchs
+    totals = player_totals(
+        stat_states(include_live=True, include_other=True),
+        club_id=club.id,
+        player_ids=[p.id for p in players],
     )
-    for g in goals:
-        scorer_pid = None
-        if not _is_own_goal(g):
-            if g.player_id:
-                scorer_pid = g.player_id
-            else:
-                pname = (getattr(g, "player_name", "") or "").strip().lower()
-                if pname and pname in name_to_id:
-                    scorer_pid = name_to_id[pname]
-            if scorer_pid in id_to_player:
-                agg[scorer_pid]["goals"] += 1
-
-        aid = None
-        raw_assist = (getattr(g, "assist_name", "") or "").strip()
-        if getattr(g, "assist_player_id", None):
-            aid = g.assist_player_id
-        elif raw_assist:
-            aname = raw_assist.lower()
-            if aname in name_to_id:
-                aid = name_to_id[aname]
-        if aid and aid != scorer_pid and aid in id_to_player:
-            agg[aid]["assists"] += 1
-
-    cards = (
-        Card.objects.filter(match_id__in=match_ids, club=club)
-        .select_related("player")
-        .order_by("minute", "id")
-    )
-    for c in cards:
-        pid = None
-        if c.player_id:
-            pid = c.player_id
-        else:
-            cname = (getattr(c, "player_name", "") or "").strip().lower()
-            if cname and cname in name_to_id:
-                pid = name_to_id[cname]
-        if pid not in id_to_player:
-            continue
-        color = (getattr(c, "color", "") or getattr(c, "type", "") or "").upper()
-        if color.startswith("R"):
-            agg[pid]["rc"] += 1
-        else:
-            agg[pid]["yc"] += 1
+    agg = {
+        pid: {"goals": t["goals"], "assists": t["assists"], "yc": t["yellows"], "rc": t["reds"]}
+        for pid, t in totals.items()
+    }
 
     rows = []
     for p in players:
@@ -1,3 +1,20 @@
 from django.contrib import admin
-from .models import Player
+from .models import Player, PlayerAlias
 admin.site.register(Player)
+
+
+@admin.register(PlayerAlias)
+class PlayerAliasAdmin(admin.ModelAdmin):
+    # ajouter ici les surnoms (kind="manual") : ils ne sont jamais recalculés
+    list_display = ("normalized", "player", "club", "kind")
+    list_filter = ("kind", "club")
+    search_fields = ("normalized", "player__first_name", "player__last_name")
+    raw_id_fields = ("player",)
+
+    def save_model(self, request, obj, form, change):
+        from .aliases import normalize_name
+        obj.normalized = normalize_name(obj.normalized)
+        obj.kind = "manual"
+        if obj.club_id is None:
+            obj.club_id = obj.player.club_id
+        super().save_model(request, obj, form, change)
@@ -6,6 +6,7 @@ from django.http import JsonResponse, HttpResponseBadRequest
 from django.views.decorators.http import require_GET
 
 from clubs.models import Club
+from .importer import DEFAULT_BATCH_SIZE, PlayerImport, iter_rows
 from .models import Player
 
 
@@ -130,6 +131,57 @@ def quick_add_players_view(request):
     return render(request, "admin/players/quick_add.html", ctx)
 
 
+@staff_member_required
+def import_players_view(request):
+    """
+    Import d'un fichier d'effectifs (CSV / JSON) : joueurs des clubs, ou
+    joueurs d'une compétition si une compétition est choisie.
+    Fichier lu en flux, écrit par lots ; rapport d'erreurs ligne par ligne.
+    """
+    from competitions.models import Competition
+
+    report = None
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        if not upload:
+            messages.error(request, "Aucun fichier envoyé.")
+            return redirect("admin_import_players")
+
+        kwargs = {
+            "dry_run": request.POST.get("dry_run") == "1",
+            "create_clubs": request.POST.get("create_clubs") == "1",
+            "batch_size": DEFAULT_BATCH_SIZE,
+        }
+        comp_id = (request.POST.get("competition") or "").strip()
+        if comp_id.isdigit():
+            from competitions.services.roster_import import CompetitionPlayerImport
+
+            competition = Competition.objects.filter(pk=int(comp_id)).first()
+            if competition is None:
+                messages.error(request, f"Compétition #{comp_id} introuvable.")
+                return redirect("admin_import_players")
+            importer = CompetitionPlayerImport(competition, **kwargs)
+        else:
+            importer = PlayerImport(**kwargs)
+
+        report = importer.run(iter_rows(upload, request.POST.get("format"), upload.name))
+        report["dry_run"] = kwargs["dry_run"]
+        level = messages.warning if report["errors"] else messages.success
+        level(
+            request,
+            f"{'Simulation : ' if kwargs['dry_run'] else ''}{report['rows']} ligne(s), "
+            f"{report['created']} créé(s), {report['updated']} mis à jour, "
+            f"{len(report['errors'])} erreur(s).",
+        )
+
+    ctx = {
+        "report": report,
+        "competitions": Competition.objects.order_by("name").only("id", "name"),
+    }
+    ctx |= admin.site.each_context(request)
+    return render(request, "admin/players/import.html", ctx)
+
+
 # -------------------------------------------------------------------
 #                      🔽  API ADMIN JSON  🔽
 #  - Liste des joueurs d’un club pour remplir les <select> lineups
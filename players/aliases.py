@@ -0,0 +1,280 @@
+# players/aliases.py
+"""
+Résolution « nom saisi en texte libre → joueur » pour tous les chemins
+d'attribution (saisie rapide, buts en masse, stats, backfill).
+
+Chaque joueur a ses alias normalisés dans PlayerAlias, par club :
+  - full     : "prénom nom"
+  - reversed : "nom prénom"
+  - short    : "nom" seul, "prénom" seul
+  - manual   : ajoutés à la main dans l'admin (jamais écrasés)
+
+Un nom ne résout que s'il désigne UN seul joueur du club : les alias
+full/reversed/manual passent avant short, et un nom court partagé par deux
+joueurs (deux "Diallo") ne résout pas.
+
+    resolver = AliasResolver([home_id, away_id])   # 1 requête
+    resolver.resolve(home_id, "Gaoussou Cissé")     # -> player_id | None
+    resolver.is_ambiguous(home_id, "Diallo")         # -> True si plusieurs joueurs
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Player, PlayerAlias
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+_STRONG_KINDS = ("full", "reversed", "manual")
+_MAX_LEN = PlayerAlias._meta.get_field("normalized").max_length
+
+
+def normalize_name(value):
+    """'  Cissé-Gaoussou ' -> 'cisse gaoussou'."""
+    s = unicodedata.normalize("NFKD", str(value or ""))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = _NON_WORD.sub(" ", s.casefold()).replace("_", " ")
+    return " ".join(s.split())[:_MAX_LEN]
+
+
+def split_name(value):
+    """'Gaoussou Cissé' -> ('Gaoussou', 'Cissé') ; 'Diallo' -> ('Diallo', '')."""
+    parts = str(value or "").split()
+    if not parts:
+        return "", ""
+    return parts[0], " ".join(parts[1:])
+
+
+def player_aliases(first_name, last_name):
+    """[(normalized, kind)] générés automatiquement pour un joueur."""
+    first, last = normalize_name(first_name), normalize_name(last_name)
+    out = []
+    if first and last:
+        out += [(f"{first} {last}", "full"), (f"{last} {first}", "reversed"), (last, "short")]
+        if first != last:
+            out.append((first, "short"))
+    elif first or last:
+        out.append((first or last, "full"))
+    return out
+
+
+def build_aliases(players):
+    """Objets PlayerAlias (non sauvegardés) pour des joueurs déjà en base."""
+    objs, seen = [], set()
+    for p in players:
+        for normalized, kind in player_aliases(p.first_name, p.last_name):
+            key = (p.pk, p.club_id, normalized)
+            if key in seen:
+                continue
+            seen.add(key)
+            objs.append(PlayerAlias(player_id=p.pk, club_id=p.club_id, normalized=normalized, kind=kind))
+    return objs
+
+
+def sync_aliases(players):
+    """Réécrit les alias automatiques des joueurs donnés (1 suppression + 1 bulk insert)."""
+    players = [p for p in players if p.pk]
+    if not players:
+        return 0
+    objs = build_aliases(players)
+    with transaction.atomic():
+        PlayerAlias.objects.filter(player_id__in=[p.pk for p in players]).exclude(kind="manual").delete()
+        PlayerAlias.objects.bulk_create(objs, ignore_conflicts=True)
+    return len(objs)
+
+
+def rebuild_aliases(batch_size=1000):
+    """Recalcule tous les alias automatiques. Renvoie le nombre d'alias écrits."""
+    total = 0
+    with transaction.atomic():
+        PlayerAlias.objects.exclude(kind="manual").delete()
+        batch = []
+        for p in Player.objects.only("id", "first_name", "last_name", "club_id").iterator(chunk_size=batch_size):
+            batch.append(p)
+            if len(batch) >= batch_size:
+                objs = build_aliases(batch)
+                PlayerAlias.objects.bulk_create(objs, ignore_conflicts=True)
+                total += len(objs)
+                batch = []
+        if batch:
+            objs = build_aliases(batch)
+            PlayerAlias.objects.bulk_create(objs, ignore_conflicts=True)
+            total += len(objs)
+    return total
+
+
+# =========================
+# Insertion en lot
+# =========================
+def fill_bulk_pks(model, objs, fields):
+    """
+    bulk_create ne renvoie pas les pk sur MySQL : relit les lignes insérées
+    par `fields` (1 requête, filtrée sur le 1er champ) et affecte les pk
+    manquants. À clé égale, les ids les plus récents, dans l'ordre d'insertion.
+    """
+    missing = [o for o in objs if o.pk is None]
+    if not missing:
+        return objs
+    to_python = [model._meta.get_field(f).to_python for f in fields]
+
+    def key(values):
+        return tuple(conv(v) for conv, v in zip(to_python, values))
+
+    groups = defaultdict(list)
+    for o in missing:
+        groups[key(getattr(o, f) for f in fields)].append(o)
+    found = defaultdict(list)
+    qs = model.objects.filter(**{f"{fields[0]}__in": {k[0] for k in groups}})
+    for pk, *values in qs.order_by("-pk").values_list("pk", *fields):
+        k = key(values)
+        if k in groups and len(found[k]) < len(groups[k]):
+            found[k].append(pk)
+    for k, group in groups.items():
+        for o, pk in zip(group, sorted(found[k])):
+            o.pk = pk
+    return objs
+
+
+def bulk_create_players(players):
+    """
+    Player.objects.bulk_create avec pk garantis (cf. fill_bulk_pks) + alias
+    (bulk_create n'émet pas post_save). Renvoie les joueurs.
+    """
+    if not players:
+        return players
+    Player.objects.bulk_create(players)
+    fill_bulk_pks(Player, players, ("club_id", "first_name", "last_name", "number"))
+    PlayerAlias.objects.bulk_create(build_aliases(players), ignore_conflicts=True)
+    return players
+
+
+@receiver(post_save, sender=Player)
+def _player_saved(sender, instance, raw=False, **kwargs):
+    # suppression : les alias partent en cascade
+    if not raw:
+        sync_aliases([instance])
+
+
+# =========================
+# Résolution
+# =========================
+class AliasResolver:
+    """
+    Charge en une requête les alias des clubs donnés (limités aux `names`
+    si fournis), puis résout en mémoire. `register()` ajoute un joueur créé
+    entre-temps (ex. après un bulk_create).
+    """
+
+    def __init__(self, club_ids, names=None):
+        self.club_ids = {cid for cid in club_ids if cid}
+        # {(club_id, normalized): {"strong": {player_ids}, "short": {player_ids}}}
+        self._index = defaultdict(lambda: {"strong": set(), "short": set()})
+        if self.club_ids:
+            qs = PlayerAlias.objects.filter(club_id__in=self.club_ids)
+            if names is not None:
+                qs = qs.filter(normalized__in={normalize_name(n) for n in names} - {""})
+            for club_id, normalized, kind, player_id in qs.values_list(
+                "club_id", "normalized", "kind", "player_id"
+            ):
+                self._add(club_id, normalized, kind, player_id)
+
+    def _add(self, club_id, normalized, kind, player_id):
+        tier = "strong" if kind in _STRONG_KINDS else "short"
+        self._index[(club_id, normalized)][tier].add(player_id)
+
+    def register(self, player):
+        for normalized, kind in player_aliases(player.first_name, player.last_name):
+            self._add(player.club_id, normalized, kind, player.pk)
+
+    def create_missing(self, pairs):
+        """
+        Crée (1 bulk_create + alias) les joueurs des paires (club_id, nom) qui ne
+        résolvent pas ; un nom ambigu (déjà indexé) n'est pas recréé.
+        Renvoie les joueurs créés, déjà enregistrés dans le résolveur.
+        """
+        new = {}
+        for club_id, name in pairs:
+            normalized = normalize_name(name)
+            if not normalized or club_id not in self.club_ids or self.is_known(club_id, name):
+                continue
+            first, last = split_name(name)
+            new.setdefault((club_id, normalized), Player(club_id=club_id, first_name=first, last_name=last))
+        players = bulk_create_players(list(new.values()))
+        for p in players:
+            self.register(p)
+        return players
+
+    def resolve(self, club_id, name):
+        """player_id si le nom désigne un seul joueur du club, sinon None."""
+        normalized = normalize_name(name)
+        if not normalized or club_id not in self.club_ids:
+            return None
+        entry = self._index.get((club_id, normalized))
+        if not entry:
+            return None
+        for tier in ("strong", "short"):
+            ids = entry[tier]
+            if len(ids) == 1:
+                return next(iter(ids))
+            if ids:
+                return None  # ambigu
+        return None
+
+
+    def is_known(self, club_id, name):
+        """True si le nom est un alias d'au moins un joueur du club (résolu ou non)."""
+        return (club_id, normalize_name(name)) in self._index
+
+    def is_ambiguous(self, club_id, name):
+        """True si le nom est connu pour le club mais désigne plusieurs joueurs."""
+        return self.is_known(club_id, name) and self.resolve(club_id, name) is None
+
+
+def resolve_player_name(club_id, name):
+    """Raccourci pour un nom isolé (1 requête)."""
+    if not club_id or not normalize_name(name):
+        return None
+    return AliasResolver([club_id], names=[name]).resolve(club_id, name)
+
+
+class RosterResolver:
+    """
+    Effectifs des clubs chargés une seule fois, puis résolution en mémoire
+    par id, numéro de maillot ou nom (via AliasResolver) :
+
+        roster = RosterResolver([home_id, away_id], names=[...], ids=[...])  # 2-3 requêtes
+        roster.resolve(club_id, "number", 10)                                 # -> Player | None
+
+    Un id hors des clubs chargés est lu en une requête de plus (comme avant :
+    un id désigne le joueur quel que soit son club).
+    """
+
+    def __init__(self, club_ids, names=None, ids=None):
+        self.club_ids = {cid for cid in club_ids if cid}
+        self.by_id = {}
+        self.by_number = {}
+        for p in Player.objects.filter(club_id__in=self.club_ids).order_by("id"):
+            self._index(p)
+        missing = {int(i) for i in (ids or ()) if str(i).isdigit()} - set(self.by_id)
+        if missing:
+            for p in Player.objects.filter(pk__in=missing):
+                self.by_id[p.pk] = p
+        self.names = AliasResolver(self.club_ids, names=list(names or ()))
+
+    def _index(self, player):
+        self.by_id[player.pk] = player
+        if player.number is not None:
+            # même numéro deux fois : le plus ancien gagne (comme .first())
+            self.by_number.setdefault((player.club_id, player.number), player)
+
+    def resolve(self, club_id, kind, value):
+        if kind == "id" and value:
+            return self.by_id.get(int(value)) if str(value).isdigit() else None
+        if kind == "number" and value is not None:
+            return self.by_number.get((club_id, value))
+        if kind == "name" and value:
+            return self.by_id.get(self.names.resolve(club_id, value))
+        return None
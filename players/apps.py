@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class PlayersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'players'
+
+    def ready(self):
+        # index des alias (noms normalisés) tenu à jour à chaque sauvegarde
+        from . import aliases  # noqa: F401
@@ -0,0 +1,480 @@
+# players/importer.py
+"""
+Import en masse d'effectifs (inscriptions d'une fédération) depuis CSV / JSON.
+
+Un fichier est LU EN FLUX (csv.DictReader, tableau JSON lu par morceaux ou
+JSON Lines) et traité par lots de `batch_size` lignes :
+
+  1. clubs chargés une fois (nom normalisé / id) ; manquants créés en un
+     bulk_create si `create_clubs` ;
+  2. effectifs des clubs du lot chargés une fois (1 requête par nouveau lot
+     de clubs) : index par id, (club, nom normalisé) et (club, numéro) ;
+  3. chaque ligne est validée en mémoire : un joueur existant (même id, ou
+     même nom dans le même club) est mis à jour, sinon créé ; un numéro déjà
+     pris dans le club est refusé ;
+  4. écriture du lot : bulk_create + bulk_update (+ alias de noms).
+
+Les lignes invalides ne bloquent pas les autres : le rapport liste
+{"row": n° de ligne, "errors": [...]} pour chacune.
+
+    with open("licences.csv", "rb") as fh:
+        report = PlayerImport(create_clubs=True).run(iter_rows(fh, "csv"))
+
+Colonnes reconnues (casse / accents ignorés) : id, club (nom ou id),
+first_name | prenom, last_name | nom, name | nom_complet, number | numero |
+maillot, position | poste, nationality | nationalite, birthdate | date_naissance.
+"""
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+
+from django.db import transaction
+
+from clubs.models import Club
+from stats.stamps import CLUBS, bump, model_key
+from .aliases import build_aliases, fill_bulk_pks, normalize_name, split_name, sync_aliases
+from .models import Player, PlayerAlias
+
+DEFAULT_BATCH_SIZE = 500
+
+HEADER_ALIASES = {
+    "prenom": "first_name", "firstname": "first_name",
+    "nom": "last_name", "lastname": "last_name", "surname": "last_name",
+    "nom_complet": "name", "full_name": "name", "joueur": "name", "player": "name",
+    "numero": "number", "maillot": "number", "no": "number", "num": "number",
+    "poste": "position", "pos": "position",
+    "nationalite": "nationality",
+    "date_naissance": "birthdate", "naissance": "birthdate", "date_of_birth": "birthdate", "dob": "birthdate",
+    "equipe": "club", "team": "club", "club_id": "club", "club_name": "club",
+    "taille": "height",
+}
+
+
+class RowError(Exception):
+    def __init__(self, *errors):
+        super().__init__("; ".join(errors))
+        self.errors = list(errors)
+
+
+def _key(header):
+    k = normalize_name(header).replace(" ", "_")
+    return HEADER_ALIASES.get(k, k)
+
+
+def normalize_row(raw):
+    """Clés canoniques, valeurs texte nettoyées."""
+    out = {}
+    for k, v in (raw or {}).items():
+        if k is None:
+            continue
+        key = _key(k)
+        if isinstance(v, str):
+            v = v.strip()
+        if key not in out or out[key] in (None, ""):
+            out[key] = v
+    return out
+
+
+# =========================
+# Lecture en flux
+# =========================
+def _text(stream, encoding="utf-8-sig"):
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return codecs.getreader(encoding)(stream, errors="replace")
+
+
+def iter_csv(stream):
+    """(n° de ligne, dict) ; séparateur ',' ou ';' détecté sur l'en-tête."""
+    text = _text(stream)
+    header = text.readline()
+    delimiter = ";" if header.count(";") > header.count(",") else ","
+    fields = next(csv.reader([header], delimiter=delimiter), [])
+    reader = csv.DictReader(text, fieldnames=fields, delimiter=delimiter)
+    for i, row in enumerate(reader, start=2):
+        if any((v or "").strip() for v in row.values() if isinstance(v, str)):
+            yield i, row
+
+
+def iter_json(stream, chunk_size=64 * 1024):
+    """
+    (n° d'objet, dict) depuis un tableau JSON (lu par morceaux, sans tout
+    charger), un objet {"players": [...]} ou du JSON Lines.
+    """
+    text = _text(stream)
+    decoder = json.JSONDecoder()
+    buf, pos, n, eof = "", 0, 0, False
+    in_array = None
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = text.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    while True:
+        # séparateurs entre objets
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            fill()
+        if pos >= len(buf):
+            return
+        ch = buf[pos]
+        if in_array is None and ch == "[":
+            in_array = True
+            pos += 1
+            continue
+        if ch == "]":
+            return
+        if in_array is None and ch == "{" and n == 0:
+            in_array = False
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise RowError("JSON invalide.")
+            fill()
+            continue
+        pos = end
+        if isinstance(obj, dict) and n == 0 and not in_array and any(
+            isinstance(obj.get(k), list) for k in ("players", "rows", "data")
+        ):
+            # enveloppe {"players": [...]} : déjà en mémoire, on la déroule
+            items = next(obj[k] for k in ("players", "rows", "data") if isinstance(obj.get(k), list))
+            for i, item in enumerate(items, start=1):
+                yield i, item
+            return
+        n += 1
+        yield n, obj
+
+
+def iter_rows(stream, fmt=None, name=""):
+    fmt = (fmt or "").lower() or ("json" if str(name).lower().endswith((".json", ".jsonl", ".ndjson")) else "csv")
+    if fmt in ("json", "jsonl", "ndjson"):
+        return iter_json(stream)
+    return iter_csv(stream)
+
+
+def _batches(rows, size):
+    batch = []
+    for item in rows:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# =========================
+# Validation de champs
+# =========================
+def parse_int(value, label, *, required=False, minimum=0):
+    if value in (None, ""):
+        if required:
+            raise RowError(f"{label} manquant.")
+        return None
+    try:
+        n = int(str(value).strip())
+    except (TypeError, ValueError):
+        raise RowError(f"{label} invalide : {value!r}.")
+    if n < minimum:
+        raise RowError(f"{label} doit être >= {minimum}.")
+    return n
+
+
+def parse_date(value):
+    if value in (None, ""):
+        return None
+    s = str(value).strip()
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y"):
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            continue
+    raise RowError(f"Date de naissance invalide : {value!r}.")
+
+
+def clamp(model, field, value):
+    s = "" if value is None else str(value).strip()
+    max_len = model._meta.get_field(field).max_length
+    return s[:max_len] if max_len else s
+
+
+# =========================
+# Moteur
+# =========================
+class RosterImport:
+    """
+    Base commune (joueurs de clubs, joueurs de compétition). Une sous-classe
+    définit le modèle, la lecture des clubs / effectifs et `build()`.
+    """
+
+    model = None
+    club_model = None
+    # champs qui retrouvent un joueur juste inséré (bulk_create sans pk sur MySQL)
+    key_fields = ()
+
+    def __init__(self, *, dry_run=False, batch_size=DEFAULT_BATCH_SIZE, create_clubs=False):
+        self.dry_run = dry_run
+        self.batch_size = max(1, int(batch_size or DEFAULT_BATCH_SIZE))
+        self.create_clubs = create_clubs
+        self.report = {
+            "rows": 0, "created": 0, "updated": 0, "unchanged": 0,
+            "clubs_created": 0, "errors": [],
+        }
+        self.clubs_by_id = {}
+        self.clubs_by_name = {}
+        self.loaded_clubs = set()
+        self.by_id = {}
+        self.by_name = {}    # (club_id, nom normalisé) -> joueur
+        self.by_number = {}  # (club_id, numéro) -> joueur
+        self.touched = set()  # joueurs déjà traités dans ce fichier (id python)
+        self.renamed = []
+
+    # ---------- à fournir ----------
+    def load_clubs(self):
+        raise NotImplementedError
+
+    def new_clubs(self, names):
+        raise NotImplementedError
+
+    def roster_queryset(self, club_ids):
+        raise NotImplementedError
+
+    def player_name(self, player):
+        raise NotImplementedError
+
+    def build(self, values, club, existing):
+        """Renvoie (joueur, champs modifiés | None si création) ou lève RowError."""
+        raise NotImplementedError
+
+    def after_write(self, created, updated):
+        pass
+
+    # ---------- index ----------
+    def index(self, player):
+        if player.pk:
+            self.by_id[player.pk] = player
+        name = normalize_name(self.player_name(player))
+        if name:
+            self.by_name[(player.club_id, name)] = player
+        if player.number:
+            self.by_number[(player.club_id, player.number)] = player
+
+    def club_for(self, raw):
+        ref = raw.get("club")
+        if ref in (None, ""):
+            return None
+        if isinstance(ref, int) or str(ref).isdigit():
+            return self.clubs_by_id.get(int(ref))
+        return self.clubs_by_name.get(normalize_name(ref))
+
+    def _ensure_clubs(self, batch):
+        missing = {}
+        for _, raw in batch:
+            ref = raw.get("club")
+            if ref not in (None, "") and not str(ref).isdigit() and not self.club_for(raw):
+                missing.setdefault(normalize_name(ref), str(ref).strip())
+        if not missing or not self.create_clubs:
+            return
+        if self.dry_run:
+            # simulation : clubs gardés en mémoire (ids négatifs), rien n'est écrit
+            created = []
+            for n, name in enumerate(missing.values(), start=len(self.clubs_by_id) + 1):
+                club = self.club_model(name=name)
+                club.pk = club.id = -n
+                created.append(club)
+        else:
+            created = self.new_clubs(list(missing.values()))
+            bump(model_key(self.club_model))
+        for club in created:
+            self.clubs_by_id[club.pk] = club
+            self.clubs_by_name[normalize_name(club.name)] = club
+            self.loaded_clubs.add(club.pk)  # effectif vide
+        self.report["clubs_created"] += len(created)
+
+    def _load_rosters(self, batch):
+        wanted = set()
+        for _, raw in batch:
+            club = self.club_for(raw)
+            if club and club.pk not in self.loaded_clubs:
+                wanted.add(club.pk)
+        if wanted:
+            for p in self.roster_queryset(wanted):
+                self.index(p)
+            self.loaded_clubs |= wanted
+
+    # ---------- exécution ----------
+    def run(self, rows):
+        self.load_clubs()
+        try:
+            for batch in _batches(((i, normalize_row(r)) for i, r in rows), self.batch_size):
+                self._process(batch)
+        except RowError as e:
+            # fichier illisible au milieu du flux
+            self.report["errors"].append({"row": None, "errors": e.errors})
+        return self.report
+
+    def _process(self, batch):
+        if self.create_clubs:
+            self._ensure_clubs(batch)
+        self._load_rosters(batch)
+
+        to_create, to_update, fields = [], [], set()
+        for line, raw in batch:
+            self.report["rows"] += 1
+            try:
+                club = self.club_for(raw)
+                if club is None:
+                    ref = raw.get("club")
+                    raise RowError(f"Club introuvable : {ref!r}." if ref not in (None, "") else "Club manquant.")
+                existing = self._existing(raw, club)
+                player, changed = self.build(raw, club, existing)
+            except RowError as e:
+                self.report["errors"].append({"row": line, "errors": e.errors})
+                continue
+            self.touched.add(id(player))
+            if changed is None:
+                to_create.append(player)
+                self.index(player)
+            elif changed:
+                to_update.append(player)
+                fields.update(changed)
+            else:
+                self.report["unchanged"] += 1
+
+        self.report["created"] += len(to_create)
+        self.report["updated"] += len(to_update)
+        if self.dry_run or not (to_create or to_update):
+            return
+        with transaction.atomic():
+            if to_create:
+                self.model.objects.bulk_create(to_create)
+                fill_bulk_pks(self.model, to_create, self.key_fields)
+                for p in to_create:
+                    self.index(p)
+            if to_update:
+                self.model.objects.bulk_update(to_update, sorted(fields))
+            self.after_write(to_create, to_update)
+            # bulk_* n'émettent pas post_save : version (ETag) à la main
+            bump(model_key(self.model))
+
+    def _existing(self, raw, club):
+        pid = raw.get("id")
+        if pid not in (None, ""):
+            pid = parse_int(pid, "id")
+            player = self.by_id.get(pid)
+            if player is None or player.club_id != club.pk:
+                raise RowError(f"Joueur #{pid} introuvable dans ce club.")
+        else:
+            name = normalize_name(self._display_name(raw))
+            player = self.by_name.get((club.pk, name)) if name else None
+        if player is not None and id(player) in self.touched:
+            raise RowError("Joueur déjà présent plus haut dans le fichier.")
+        return player
+
+    def _display_name(self, raw):
+        if raw.get("name"):
+            return raw["name"]
+        return f"{raw.get('first_name') or ''} {raw.get('last_name') or ''}".strip()
+
+    def check_number(self, club, number, player):
+        """Numéro libre dans le club (en tenant compte des lignes déjà importées)."""
+        if not number:
+            return
+        holder = self.by_number.get((club.pk, number))
+        if holder is not None and holder is not player:
+            raise RowError(f"Le numéro {number} est déjà utilisé ({self.player_name(holder)}).")
+
+    def claim_number(self, player, old_number=None):
+        if old_number and old_number != player.number:
+            holder = self.by_number.get((player.club_id, old_number))
+            if holder is player:
+                del self.by_number[(player.club_id, old_number)]
+        if player.number:
+            self.by_number[(player.club_id, player.number)] = player
+
+
+class PlayerImport(RosterImport):
+    """Joueurs des clubs (players.Player)."""
+
+    model = Player
+    club_model = Club
+    key_fields = ("club_id", "first_name", "last_name", "number")
+
+    def load_clubs(self):
+        for club in Club.objects.only("id", "name"):
+            self.clubs_by_id[club.pk] = club
+            self.clubs_by_name[normalize_name(club.name)] = club
+
+    def new_clubs(self, names):
+        created = Club.objects.bulk_create([Club(name=clamp(Club, "name", n)) for n in names])
+        # bulk_create ne renvoie pas les pk sur MySQL : relecture par nom
+        fill_bulk_pks(Club, created, ("name",))
+        bump(CLUBS)
+        return created
+
+    def roster_queryset(self, club_ids):
+        return Player.objects.filter(club_id__in=club_ids).order_by("id")
+
+    def player_name(self, player):
+        return f"{player.first_name} {player.last_name or ''}".strip()
+
+    def build(self, raw, club, existing):
+        first, last = raw.get("first_name") or "", raw.get("last_name") or ""
+        if not first and not last and raw.get("name"):
+            first, last = split_name(raw["name"])
+        if not first and not last:
+            raise RowError("Nom du joueur manquant.")
+
+        errors = []
+        values = {"first_name": clamp(Player, "first_name", first), "last_name": clamp(Player, "last_name", last)}
+        for key, fn in (
+            ("number", lambda v: parse_int(v, "Numéro")),
+            ("birthdate", parse_date),
+        ):
+            if key in raw:
+                try:
+                    values[key] = fn(raw[key])
+                except RowError as e:
+                    errors += e.errors
+        if "position" in raw:
+            values["position"] = clamp(Player, "position", raw["position"]) or None
+        if "nationality" in raw:
+            values["nationality"] = clamp(Player, "nationality", raw["nationality"])
+        if errors:
+            raise RowError(*errors)
+        if values.get("number") is None:
+            values.pop("number", None)
+
+        self.check_number(club, values.get("number"), existing)
+
+        if existing is None:
+            player = Player(club_id=club.pk, **values)
+            self.claim_number(player)
+            return player, None
+
+        old_number = existing.number
+        changed = [k for k, v in values.items() if getattr(existing, k) != v]
+        for k in changed:
+            setattr(existing, k, values[k])
+        if {"first_name", "last_name"} & set(changed):
+            self.renamed.append(existing)
+        self.claim_number(existing, old_number)
+        return existing, changed
+
+    def after_write(self, created, updated):
+        # bulk_create / bulk_update n'émettent pas post_save : alias à la main
+        if created:
+            PlayerAlias.objects.bulk_create(build_aliases(created), ignore_conflicts=True)
+        if self.renamed:
+            sync_aliases(self.renamed)
+        self.renamed = []
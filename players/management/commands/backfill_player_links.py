@@ -0,0 +1,86 @@
+# players/management/commands/backfill_player_links.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from matches.models import Goal, Lineup
+from matches.signals import notify_match_changed
+from players.aliases import AliasResolver, rebuild_aliases
+
+BATCH = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Rattache les noms saisis en texte libre à des joueurs (FK) via l'index d'alias : "
+        "Goal.assist_name -> assist_player, Lineup.player_name -> player. "
+        "Seuls les noms qui désignent UN joueur du club sont rattachés."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild-aliases",
+            action="store_true",
+            help="Recalcule d'abord tout l'index d'alias (alias manuels conservés).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Affiche ce qui serait rattaché, sans rien écrire.",
+        )
+
+    def _link(self, model, name_field, fk_field, dry_run):
+        rows = list(
+            model.objects.filter(**{f"{fk_field}__isnull": True})
+            .exclude(**{name_field: ""})
+            .values_list("id", "match_id", "club_id", name_field)
+        )
+        if not rows:
+            return 0, 0, set()
+
+        # une requête pour tous les clubs / noms concernés
+        resolver = AliasResolver({r[2] for r in rows}, names=[r[3] for r in rows])
+        updates, match_ids, unresolved = [], set(), 0
+        for pk, match_id, club_id, name in rows:
+            player_id = resolver.resolve(club_id, name)
+            if not player_id:
+                unresolved += 1
+                continue
+            obj = model(pk=pk)
+            setattr(obj, f"{fk_field}_id", player_id)
+            updates.append(obj)
+            match_ids.add(match_id)
+            if self.verbosity >= 2:
+                self.stdout.write(f"{model.__name__} #{pk}: « {name} » -> joueur #{player_id}")
+
+        if updates and not dry_run:
+            with transaction.atomic():
+                model.objects.bulk_update(updates, [fk_field], batch_size=BATCH)
+        return len(updates), unresolved, match_ids
+
+    def handle(self, *args, **opts):
+        self.verbosity = opts["verbosity"]
+        dry_run = opts["dry_run"]
+
+        if opts["rebuild_aliases"] and not dry_run:
+            n = rebuild_aliases()
+            self.stdout.write(f"Index d'alias reconstruit ({n} alias).")
+
+        touched = set()
+        for model, name_field, fk_field in (
+            (Goal, "assist_name", "assist_player"),
+            (Lineup, "player_name", "player"),
+        ):
+            linked, unresolved, match_ids = self._link(model, name_field, fk_field, dry_run)
+            touched |= {(model, mid) for mid in match_ids}
+            self.stdout.write(
+                f"{model.__name__}.{name_field}: {linked} rattaché(s), {unresolved} non résolu(s)."
+            )
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("Dry-run : rien n'a été écrit."))
+            return
+
+        # bulk_update n'émet pas post_save : caches / stats à rafraîchir
+        for model, match_id in sorted(touched, key=lambda t: (t[0].__name__, t[1])):
+            notify_match_changed(match_id, sender=model)
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(touched)} match(s) mis à jour."))
@@ -0,0 +1,64 @@
+# players/management/commands/import_rosters.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from players.importer import DEFAULT_BATCH_SIZE, PlayerImport, iter_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe des effectifs depuis un fichier CSV / JSON (lu en flux, écrit par lots). "
+        "Joueurs des clubs par défaut, joueurs d'une compétition avec --competition. "
+        "Affiche un résumé JSON ; les lignes invalides sont listées sans bloquer les autres."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Fichier .csv, .json, .jsonl (ou '-' pour stdin).")
+        parser.add_argument("--format", choices=["csv", "json"], help="Défaut : d'après l'extension.")
+        parser.add_argument("--competition", type=int, help="Id de compétition (competitions.Player).")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--create-clubs", action="store_true", help="Crée les clubs / équipes inconnus.")
+        parser.add_argument("--dry-run", action="store_true", help="Valide tout, n'écrit rien.")
+        parser.add_argument("--report", help="Écrit le rapport complet (erreurs comprises) dans ce fichier JSON.")
+
+    def handle(self, *args, **opts):
+        kwargs = {
+            "dry_run": opts["dry_run"],
+            "batch_size": opts["batch_size"],
+            "create_clubs": opts["create_clubs"],
+        }
+        if opts["competition"]:
+            from competitions.models import Competition
+            from competitions.services.roster_import import CompetitionPlayerImport
+
+            competition = Competition.objects.filter(pk=opts["competition"]).first()
+            if competition is None:
+                raise CommandError(f"Compétition #{opts['competition']} introuvable.")
+            importer = CompetitionPlayerImport(competition, **kwargs)
+        else:
+            importer = PlayerImport(**kwargs)
+
+        path = opts["path"]
+        try:
+            if path == "-":
+                import sys
+                report = importer.run(iter_rows(sys.stdin.buffer, opts["format"]))
+            else:
+                with open(path, "rb") as fh:
+                    report = importer.run(iter_rows(fh, opts["format"], path))
+        except OSError as e:
+            raise CommandError(str(e))
+
+        if opts["report"]:
+            with open(opts["report"], "w", encoding="utf-8") as fh:
+                json.dump(report, fh, ensure_ascii=False, indent=2)
+
+        summary = {k: v for k, v in report.items() if k != "errors"}
+        summary["errors"] = len(report["errors"])
+        summary["dry_run"] = opts["dry_run"]
+        self.stdout.write(json.dumps(summary, ensure_ascii=False))
+        for err in report["errors"][:20]:
+            self.stderr.write(f"ligne {err['row']}: {' ; '.join(err['errors'])}")
+        if len(report["errors"]) > 20:
+            self.stderr.write(f"... {len(report['errors']) - 20} autres erreurs (voir --report)")
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_aliases(apps, schema_editor):
+    """Indexe les noms des joueurs existants (modèles historiques)."""
+    # fonctions de texte pures : aucun accès aux modèles courants
+    from players.aliases import player_aliases
+
+    Player = apps.get_model("players", "Player")
+    PlayerAlias = apps.get_model("players", "PlayerAlias")
+    batch = []
+    for pid, club_id, first, last in Player.objects.values_list("id", "club_id", "first_name", "last_name").iterator():
+        seen = set()
+        for normalized, kind in player_aliases(first, last):
+            if normalized in seen:
+                continue
+            seen.add(normalized)
+            batch.append(PlayerAlias(player_id=pid, club_id=club_id, normalized=normalized, kind=kind))
+        if len(batch) >= 1000:
+            PlayerAlias.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        PlayerAlias.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0003_alter_club_logo_alter_staffmember_photo'),
+        ('players', '0003_alter_player_last_name_alter_player_photo_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('normalized', models.CharField(max_length=170)),
+                ('kind', models.CharField(choices=[('full', 'Prénom Nom'), ('reversed', 'Nom Prénom'), ('short', 'Nom ou prénom seul'), ('manual', 'Saisi à la main')], default='full', max_length=8)),
+                ('club', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='player_aliases', to='clubs.club')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='players.player')),
+            ],
+            options={
+                'verbose_name': 'Alias joueur',
+                'verbose_name_plural': 'Alias joueurs',
+                'indexes': [models.Index(fields=['club', 'normalized'], name='players_pla_club_id_25483c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('player', 'club', 'normalized'), name='uniq_player_alias')],
+            },
+        ),
+        migrations.RunPython(fill_aliases, migrations.RunPython.noop),
+    ]
@@ -43,3 +43,36 @@ class Player(models.Model):
         
         full = f"{self.first_name} {self.last_name or ''}".strip()
         return full
+
+
+ALIAS_KINDS = [
+    ("full", "Prénom Nom"),
+    ("reversed", "Nom Prénom"),
+    ("short", "Nom ou prénom seul"),
+    ("manual", "Saisi à la main"),
+]
+
+
+class PlayerAlias(models.Model):
+    """
+    Index des noms d'un joueur dans son club, normalisés (sans accents, casse
+    repliée, ponctuation → espaces) : sert à rattacher les événements saisis en
+    texte libre. Tenu à jour par players/aliases.py (sauf kind="manual").
+    """
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="aliases")
+    club = models.ForeignKey(Club, on_delete=models.CASCADE, null=True, blank=True, related_name="player_aliases")
+    normalized = models.CharField(max_length=170)
+    kind = models.CharField(max_length=8, choices=ALIAS_KINDS, default="full")
+
+    class Meta:
+        verbose_name = "Alias joueur"
+        verbose_name_plural = "Alias joueurs"
+        constraints = [
+            models.UniqueConstraint(fields=["player", "club", "normalized"], name="uniq_player_alias"),
+        ]
+        indexes = [
+            models.Index(fields=["club", "normalized"]),
+        ]
+
+    def __str__(self):
+        return f"{self.normalized} → {self.player}"
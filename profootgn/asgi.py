@@ -1,4 +1,14 @@
+"""
+Point d'entrée ASGI.
 
+Nécessaire pour le flux SSE des matchs en direct (/api/matches/live/stream/) :
+une connexion ouverte n'occupe alors ni thread ni worker.
+
+    # local
+    uvicorn profootgn.asgi:application --reload
+    # production (gunicorn + workers uvicorn)
+    gunicorn profootgn.asgi:application -k uvicorn.workers.UvicornWorker
+"""
 import os
 from django.core.asgi import get_asgi_application
 
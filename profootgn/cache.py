@@ -0,0 +1,260 @@
+# profootgn/cache.py
+"""
+Accès partagé aux caches (configurés dans settings.CACHES, cf. CACHE_URL).
+
+Alias :
+  - LIVE       : payloads chauds (snapshots de matchs, horloge de /live/)
+  - AGGREGATES : calculs coûteux (classements, stats)
+  - MEDIA      : URLs d'images (FieldFile.url, souvent calculée par le storage)
+
+Clés : "<namespace>:g<génération>:<parts...>". La génération d'un namespace
+est stockée dans le cache lui-même : invalidate(namespace) l'incrémente et
+rend toutes ses clés inatteignables, dans tous les workers, sans rien lister.
+Les parts portent en général une version de données (stats.stamps), ce qui
+suffit pour l'invalidation fine.
+
+    data = get_or_build(AGGREGATES, "comp-standings", [comp.id, version],
+                        lambda: compute(...), timeout=3600)
+
+Agrégats très demandés (classements, leaders, direct) : SingleFlight, voir plus bas.
+"""
+import hashlib
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+
+from stats.metrics import cache_counts, count_cache
+
+LIVE = "live"
+AGGREGATES = "aggregates"
+MEDIA = "media"
+
+
+def get_cache(alias=DEFAULT_CACHE_ALIAS):
+    """Cache de l'alias, ou `default` si l'alias n'est pas configuré (settings surchargés)."""
+    if alias not in settings.CACHES:
+        alias = DEFAULT_CACHE_ALIAS
+    return caches[alias]
+
+
+# =========================
+# Clés versionnées
+# =========================
+def _gen_key(namespace):
+    return f"ns-gen:{namespace}"
+
+
+def namespace_generation(namespace, alias=DEFAULT_CACHE_ALIAS):
+    c = get_cache(alias)
+    gen = c.get(_gen_key(namespace))
+    if gen is None:
+        # sans expiration : une génération perdue ferait relire de vieilles clés
+        c.add(_gen_key(namespace), 1, None)
+        gen = c.get(_gen_key(namespace), 1)
+    return gen
+
+
+def make_key(namespace, *parts, alias=DEFAULT_CACHE_ALIAS):
+    gen = namespace_generation(namespace, alias)
+    return ":".join([namespace, f"g{gen}", *(str(p) for p in parts)])
+
+
+def invalidate(namespace, alias=DEFAULT_CACHE_ALIAS):
+    """Rend toutes les clés du namespace inatteignables (les entrées expirent seules)."""
+    c = get_cache(alias)
+    try:
+        c.incr(_gen_key(namespace))
+    except ValueError:
+        # génération absente : la prochaine lecture en posera une neuve
+        c.add(_gen_key(namespace), 2, None)
+
+
+# =========================
+# Lecture / construction
+# =========================
+def get_or_build(alias, namespace, parts, build, timeout=DEFAULT_TIMEOUT):
+    """
+    Valeur en cache, sinon build() puis mise en cache (TTL de l'alias par défaut).
+    build() ne doit pas renvoyer None (indiscernable d'un miss).
+    """
+    c = get_cache(alias)
+    key = make_key(namespace, *parts, alias=alias)
+    value = c.get(key)
+    count_cache(namespace, "miss" if value is None else "hit")
+    if value is None:
+        value = build()
+        c.set(key, value, timeout)
+    return value
+
+
+def clear_all():
+    """Vide tous les alias (tests, commande de maintenance)."""
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+# =========================
+# URLs de médias
+# =========================
+def media_url(value):
+    """
+    URL (relative ou absolue) d'un FieldFile / d'une chaîne, None si vide.
+    FieldFile.url est mémorisée par nom de fichier : avec un storage distant
+    (Cloudinary) elle est construite une fois, pas à chaque sérialisation.
+    """
+    if not value:
+        return None
+    name = getattr(value, "name", None)
+    if name is None or not hasattr(value, "storage"):
+        return str(value).strip() or None
+
+    c = get_cache(MEDIA)
+    key = f"media-url:{type(value.storage).__name__}:{name}"
+    url = c.get(key)
+    if url is None:
+        try:
+            url = value.url
+        except Exception:
+            return str(value).strip() or None
+        c.set(key, url)
+    return url
+
+
+# =========================
+# Single-flight / stale-while-revalidate
+# =========================
+# Verrou de recalcul : il doit être atomique entre workers.
+#   - Redis / Memcached / base (DatabaseCache) : cache.add() l'est ;
+#   - fichiers (défaut, FileBasedCache) : add() = has_key + set, NON atomique ;
+#     on crée donc un fichier verrou avec O_CREAT | O_EXCL dans le dossier du
+#     cache (atomique sur un disque local, workers d'une même machine) ;
+#   - locmem : verrou par process seulement (dev / tests), au mieux.
+def _lock_path(c, lock_key):
+    return os.path.join(c._dir, hashlib.md5(lock_key.encode("utf-8")).hexdigest() + ".lock")
+
+
+def _acquire(c, lock_key, token, ttl):
+    if not isinstance(c, FileBasedCache):
+        return c.add(lock_key, token, ttl)
+    path = _lock_path(c, lock_key)
+    os.makedirs(c._dir, exist_ok=True)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < ttl:
+                    return False
+                os.remove(path)  # verrou abandonné (worker tué) : on le reprend
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, "w") as fh:
+            fh.write(token)
+        return True
+    return False
+
+
+def _release(c, lock_key, token):
+    if not isinstance(c, FileBasedCache):
+        if c.get(lock_key) == token:
+            c.delete(lock_key)
+        return
+    path = _lock_path(c, lock_key)
+    try:
+        with open(path) as fh:
+            mine = fh.read() == token
+        if mine:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# États comptés par flight (cache_requests_total{cache=<flight>}, stats/metrics.py :
+# cumul en mémoire par process, envoyé par lots, aucune écriture par requête) :
+#   hit      : valeur à jour déjà en cache
+#   rebuilt  : ce worker a recalculé (verrou obtenu)
+#   stale    : recalcul en cours ailleurs -> ancienne valeur servie (recalcul évité)
+#   waited   : recalcul en cours ailleurs, pas d'ancienne valeur -> attente du résultat
+#   fallback : attente trop longue -> recalcul sans verrou
+FLIGHT_STATES = ("hit", "rebuilt", "stale", "waited", "fallback")
+FLIGHTS = {}
+
+
+class SingleFlight:
+    """
+    Une valeur par `parts`, marquée de la version des données qui l'a produite.
+
+    Version changée (but marqué...) : le premier worker prend un verrou court
+    et recalcule ; pendant ce temps les autres servent la valeur précédente
+    (stale) au lieu de recalculer tous en même temps. Sans valeur précédente,
+    ils attendent le résultat jusqu'à `wait` secondes.
+
+        STANDINGS = SingleFlight("standings", alias=AGGREGATES)
+        rows, state = STANDINGS.get([include_live], version, build)
+    """
+
+    def __init__(self, name, *, alias=DEFAULT_CACHE_ALIAS, timeout=DEFAULT_TIMEOUT,
+                 lock_ttl=10, wait=2.0, poll=0.05):
+        self.name = name
+        self.alias = alias
+        self.timeout = timeout
+        self.lock_ttl = lock_ttl
+        self.wait = wait
+        self.poll = poll
+        FLIGHTS[name] = self
+
+    def get(self, parts, version, build):
+        """
+        (valeur, état). version : tout objet comparable par == (ex. versions
+        stats.stamps) ; None = pas de cache (build() directement).
+        """
+        if version is None:
+            return build(), "fallback"
+        c = get_cache(self.alias)
+        key = make_key(f"flight:{self.name}", *parts, alias=self.alias)
+
+        entry = c.get(key)
+        if entry is not None and entry[0] == version:
+            return self._count(entry[1], "hit")
+
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        if _acquire(c, lock_key, token, self.lock_ttl):
+            try:
+                value = build()
+                c.set(key, (version, value), self.timeout)
+            finally:
+                _release(c, lock_key, token)
+            return self._count(value, "rebuilt")
+
+        if entry is not None:
+            return self._count(entry[1], "stale")
+
+        deadline = time.monotonic() + self.wait
+        while time.monotonic() < deadline:
+            time.sleep(self.poll)
+            entry = c.get(key)
+            if entry is not None and entry[0] == version:
+                return self._count(entry[1], "waited")
+        return self._count(build(), "fallback")
+
+    def _count(self, value, state):
+        count_cache(self.name, state)
+        return value, state
+
+
+def flight_metrics():
+    """{flight: {état: compteur, "collapsed": stale + waited}} de tous les workers."""
+    found = cache_counts()
+    out = {}
+    for name in FLIGHTS:
+        counts = {st: int(found.get(name, {}).get(st, 0)) for st in FLIGHT_STATES}
+        counts["collapsed"] = counts["stale"] + counts["waited"]
+        out[name] = counts
+    return out
@@ -0,0 +1,115 @@
+# profootgn/db_router.py
+"""
+Lectures sur réplica(s), écritures sur `default`.
+
+- db_for_read : un réplica au hasard (settings.DATABASE_REPLICAS), SAUF si
+  la lecture doit voir une écriture récente (« épinglé » sur la principale) :
+    * une écriture a déjà eu lieu dans la requête / le contexte courant ;
+    * une transaction est ouverte sur la principale ;
+    * le client a écrit il y a moins de REPLICA_STICKY_SECONDS (cookie posé
+      par ReplicaStickyMiddleware : l'admin qui vient de saisir un but relit
+      sa saisie, pas un réplica en retard).
+- db_for_write : toujours `default` ; épingle la suite du contexte.
+- Migrations : uniquement sur `default` (les réplicas suivent par réplication).
+
+Sans réplica configuré, tout va sur `default` (aucun changement de comportement).
+
+Essai local avec deux SQLite :
+    cp db.sqlite3 replica.sqlite3
+    DATABASE_URL=sqlite:///db.sqlite3 DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3 \\
+        python manage.py runserver
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = "db_primary_until"
+
+# True : lectures sur la principale pour le reste du contexte (requête, commande)
+_pinned = ContextVar("db_pinned", default=False)
+# une écriture a eu lieu dans la requête courante (-> cookie)
+_wrote = ContextVar("db_wrote", default=False)
+
+
+def replicas():
+    return [a for a in getattr(settings, "DATABASE_REPLICAS", ()) if a in settings.DATABASES]
+
+
+def pin_primary():
+    _pinned.set(True)
+
+
+@contextmanager
+def use_primary():
+    """Lectures sur la principale dans le bloc (ex. relire juste après une écriture)."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        pool = replicas()
+        if not pool or _pinned.get():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(pool)
+
+    def db_for_write(self, model, **hints):
+        _pinned.set(True)
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # mêmes données partout : objets lus sur un réplica liables entre eux
+        dbs = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in dbs and obj2._state.db in dbs:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
+
+
+class ReplicaStickyMiddleware:
+    """
+    Épingle la requête sur la principale si elle modifie (méthode non sûre)
+    ou si le client a écrit récemment ; pose le cookie après une écriture.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replicas():
+            return self.get_response(request)
+
+        pinned = request.method not in ("GET", "HEAD", "OPTIONS")
+        try:
+            pinned = pinned or float(request.COOKIES.get(STICKY_COOKIE) or 0) > time.time()
+        except ValueError:
+            pass
+        pin_token = _pinned.set(pinned)
+        wrote_token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get():
+                ttl = getattr(settings, "REPLICA_STICKY_SECONDS", 10)
+                response.set_cookie(
+                    STICKY_COOKIE, str(int(time.time() + ttl)),
+                    max_age=ttl, httponly=True, samesite="Lax",
+                    secure=request.is_secure(),
+                )
+            return response
+        finally:
+            _pinned.reset(pin_token)
+            _wrote.reset(wrote_token)
@@ -67,8 +67,12 @@ if USE_CLOUDINARY:
 # Middleware
 # =========================
 MIDDLEWARE = [
+    # durée / SQL / taille par route -> /api/metrics/ (stats/metrics.py)
+    "stats.middleware.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",  # ← le plus haut possible
     "django.middleware.security.SecurityMiddleware",
+    # lectures sur réplica, sauf juste après une écriture (profootgn/db_router.py)
+    "profootgn.db_router.ReplicaStickyMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -76,8 +80,21 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # ETag / Last-Modified / Cache-Control des API publiques (stats/middleware.py)
+    "stats.middleware.ChangeStampMiddleware",
+    # X-Cache-Stale: 1 si un agrégat périmé est servi pendant son recalcul
+    "stats.middleware.FlightStateMiddleware",
 ]
 
+# Métriques de requêtes : fichier SQLite local partagé par les workers
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").strip().lower() in {"1", "true", "yes", "on"}
+METRICS_DB = os.getenv("METRICS_DB", "")  # défaut : <tmp>/kanousport-metrics.sqlite3
+METRICS_FLUSH_SECONDS = int(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+# Cache-Control des réponses publiques (CDN / clients), en secondes
+PUBLIC_CACHE_MAX_AGE = int(os.getenv("PUBLIC_CACHE_MAX_AGE", "60"))
+PUBLIC_CACHE_STALE = int(os.getenv("PUBLIC_CACHE_STALE", "300"))
+
 ROOT_URLCONF = "profootgn.urls"
 
 # =========================
@@ -102,17 +119,25 @@ TEMPLATES = [
 WSGI_APPLICATION = "profootgn.wsgi.application"
 
 # =========================
-## =========================
 # Database
 # =========================
+# DATABASE_URL             : base principale (écritures + lectures « fraîches »)
+# DATABASE_REPLICA_URLS    : réplicas en lecture, séparés par des virgules
+#                            (alias replica1, replica2...), cf. profootgn/db_router.py
+# DB_SSL_REQUIRE=0         : désactive sslmode=require (jamais appliqué à SQLite)
+# REPLICA_STICKY_SECONDS   : lectures forcées sur la principale après une écriture
+def _db_from_url(url):
+    ssl = os.getenv("DB_SSL_REQUIRE", "1").strip().lower() in {"1", "true", "yes", "on"}
+    return dj_database_url.parse(
+        url,
+        conn_max_age=600,
+        # SQLite n'accepte pas l'option sslmode
+        ssl_require=ssl and not url.lower().startswith("sqlite"),
+    )
+
+
 if os.getenv("DATABASE_URL"):
-    DATABASES = {
-        "default": dj_database_url.parse(
-            os.environ["DATABASE_URL"],
-            conn_max_age=600,
-            ssl_require=True,
-        )
-    }
+    DATABASES = {"default": _db_from_url(os.environ["DATABASE_URL"])}
 else:
     DATABASES = {
         "default": {
@@ -126,6 +151,20 @@ else:
         }
     }
 
+DATABASE_REPLICAS = []
+for _i, _url in enumerate(
+    [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()], start=1
+):
+    DATABASES[f"replica{_i}"] = {
+        **_db_from_url(_url),
+        # tests : le réplica est la base de test principale
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{_i}")
+
+DATABASE_ROUTERS = ["profootgn.db_router.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+
 
 # =========================
 # Auth / Locale
@@ -368,9 +407,61 @@ LOGGING = {
         "cloudinary": {"handlers": ["console"], "level": "INFO", "propagate": False},
     },
 }
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "kanousport-cache",
-    }
+
+# =========================
+# Caches (partagés entre workers)
+# =========================
+# Un cache par process (locmem) = un miss par worker gunicorn. Ici :
+#   CACHE_URL=redis://host:6379/0  -> Redis (si le paquet `redis` est installé)
+#   CACHE_URL=file:///var/cache/kanousport (défaut : dossier temporaire)
+#   CACHE_URL=db://kanousport_cache  (tables <nom>_<alias> : `manage.py createcachetable`)
+#   CACHE_URL=locmem://              (dev / tests mono-process)
+# REDIS_URL seul suffit aussi. Alias : default, live (payloads chauds,
+# /matches/live/), aggregates (classements, stats), media (URLs d'images).
+# CACHE_VERSION : à incrémenter pour invalider toutes les clés d'un coup.
+def _cache_backend(url, alias):
+    scheme, _, rest = url.partition("://")
+    scheme = scheme.lower()
+    if scheme in ("redis", "rediss"):
+        try:
+            import redis  # noqa: F401
+        except ImportError:
+            scheme, rest = "file", ""
+        else:
+            return {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": url}
+    if scheme == "db":
+        # une table par alias (clear() vide toute la table)
+        return {"BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": f"{rest or 'kanousport_cache'}_{alias}"}
+    if scheme == "locmem":
+        return {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": f"kanousport-{alias}"}
+    if scheme == "dummy":
+        return {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    # fichiers : un dossier par alias (clear() vide tout le dossier)
+    import tempfile
+    root = Path(rest) if rest else Path(tempfile.gettempdir()) / "kanousport-cache"
+    return {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(root / alias)}
+
+
+_CACHE_URL = (os.getenv("CACHE_URL") or os.getenv("REDIS_URL") or "file://").strip()
+_CACHE_PREFIX = os.getenv("CACHE_KEY_PREFIX", "kanousport")
+_CACHE_VERSION = int(os.getenv("CACHE_VERSION", "1"))
+_CACHE_ALIASES = {
+    # alias: (TTL par défaut, nombre max d'entrées pour fichiers / db / locmem)
+    "default": (int(os.getenv("CACHE_DEFAULT_TTL", "300")), 5000),
+    "live": (int(os.getenv("CACHE_LIVE_TTL", "3600")), 20000),
+    "aggregates": (int(os.getenv("CACHE_AGGREGATES_TTL", "3600")), 5000),
+    "media": (int(os.getenv("CACHE_MEDIA_TTL", str(24 * 3600))), 20000),
 }
+CACHES = {}
+for _alias, (_ttl, _max) in _CACHE_ALIASES.items():
+    CACHES[_alias] = {
+        **_cache_backend(_CACHE_URL, _alias),
+        "TIMEOUT": _ttl,
+        "KEY_PREFIX": f"{_CACHE_PREFIX}:{_alias}",
+        "VERSION": _CACHE_VERSION,
+    }
+    if "redis" not in CACHES[_alias]["BACKEND"]:
+        CACHES[_alias]["OPTIONS"] = {"MAX_ENTRIES": _max}
@@ -0,0 +1,381 @@
+# profootgn/synthetic.py
+"""
+Ligue synthétique pour mesurer l'API à l'échelle (commande generate_league,
+puis bench_endpoints).
+
+Tout est écrit en bulk_create / bulk_update (quelques dizaines de requêtes
+pour une saison complète), donc SANS signaux : les tables dérivées sont
+reconstruites à la fin (classement, snapshots par journée, stats joueurs,
+classements de compétition), les versions (stats.stamps) incrémentées et les
+caches vidés.
+
+Calendrier : le moteur de matches/scheduling.py (aller / retour). Les saisons
+se suivent ; par défaut la dernière est jouée aux 2/3, avec quelques matchs
+en direct, le reste à venir.
+
+Les objets générés portent le préfixe `prefix` (clubs, compétitions, pubs) :
+delete_synthetic(prefix) les retire.
+"""
+import random
+from collections import defaultdict
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from ads.models import Ad, AdStat
+from clubs.models import Club, StaffMember
+from competitions.models import (
+    Card as CompetitionCard,
+    Competition,
+    CompetitionMatch,
+    CompetitionTeam,
+    Goal as CompetitionGoal,
+    Player as CompetitionPlayer,
+)
+from competitions.services.scheduling import plan_competition, write_competition_schedule
+from competitions.services.standings_history import refresh_snapshots
+from matches.models import Card, Goal, Lineup, Match, Round, TeamInfoPerMatch
+from matches.scheduling import berger_rounds, club_venues, next_round_number, plan_schedule, write_league_schedule
+from matches.signals import coalesce_match_changes
+from matches.standings import rebuild_standings
+from players.models import Player
+from profootgn.cache import clear_all
+from stats.player_stats import rebuild_player_stats
+from stats.stamps import CLUBS, EVENTS, MATCHES, PUBLIC_MODELS, STANDINGS, bump, competition_key, model_key
+
+DEFAULT_PREFIX = "SYN"
+
+FIRST_NAMES = [
+    "Mamadou", "Ibrahima", "Alseny", "Ousmane", "Sékou", "Naby", "Amadou", "Abdoulaye",
+    "Mohamed", "Facinet", "Lansana", "Moussa", "Kandia", "Souleymane", "Aboubacar", "Fodé",
+]
+LAST_NAMES = [
+    "Camara", "Diallo", "Bah", "Sylla", "Keïta", "Touré", "Condé", "Soumah",
+    "Bangoura", "Cissé", "Kouyaté", "Sow", "Barry", "Traoré", "Kaba", "Fofana",
+]
+CITIES = ["Conakry", "Kindia", "Kankan", "Labé", "Nzérékoré", "Boké", "Mamou", "Faranah", "Siguiri", "Kamsar"]
+
+# effectif type : 3 gardiens, 8 défenseurs, 8 milieux, le reste en attaque
+SQUAD_POSITIONS = ["GK"] * 3 + ["DF"] * 8 + ["MF"] * 8
+# onze de départ (4-3-3) puis 7 remplaçants
+STARTING_SLOTS = [
+    ("GK", "GK"), ("DF", "RB"), ("DF", "CB"), ("DF", "CB"), ("DF", "LB"),
+    ("MF", "DM"), ("MF", "CM"), ("MF", "CM"), ("FW", "RW"), ("FW", "ST"), ("FW", "LW"),
+]
+BENCH_SLOTS = [("GK", "GK"), ("DF", "CB"), ("DF", "LB"), ("MF", "CM"), ("MF", "AM"), ("FW", "ST"), ("FW", "RW")]
+COMPETITION_POSITIONS = {"GK": "GK", "DF": "DEF", "MF": "MID", "FW": "ATT"}
+
+GOALS_WEIGHTS = [26, 33, 23, 11, 5, 2]  # 0..5 buts par équipe
+KICKOFFS = [time(15, 0), time(17, 30)]
+BATCH = 2000
+
+
+def _squad_positions(size):
+    return (SQUAD_POSITIONS + ["FW"] * size)[:size]
+
+
+def _pick(rng, squad, position):
+    """Joueur du poste (sinon n'importe lequel) ; squad = [(id, poste, ...)]."""
+    pool = [p for p in squad if p[1] == position] or squad
+    return rng.choice(pool)
+
+
+def _scorer(rng, squad):
+    return _pick(rng, squad, rng.choices(["FW", "MF", "DF"], weights=[60, 30, 10])[0])
+
+
+def _minutes(rng, n, high=90):
+    return sorted(rng.randint(1, high) for _ in range(n))
+
+
+# =========================
+# Championnat (Club / Player / Match)
+# =========================
+def _create_clubs(rng, prefix, n_clubs, squad_size):
+    clubs = Club.objects.bulk_create([
+        Club(
+            name=f"{prefix} {CITIES[i % len(CITIES)]} {i + 1:02d}",
+            short_name=f"{prefix[:3]}{i + 1:02d}",
+            city=CITIES[i % len(CITIES)],
+            stadium=f"Stade {CITIES[i % len(CITIES)]} {i // len(CITIES) + 1}",
+            president=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            coach=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        )
+        for i in range(n_clubs)
+    ])
+    # bulk_create ne renvoie pas toujours les pk (MySQL) : relecture par nom
+    clubs = list(Club.objects.filter(name__in=[c.name for c in clubs]).order_by("name"))
+    club_ids = [c.pk for c in clubs]
+
+    Player.objects.bulk_create([
+        Player(
+            first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+            club_id=cid, number=n + 1, position=pos, nationality="Guinée",
+        )
+        for cid in club_ids
+        for n, pos in enumerate(_squad_positions(squad_size))
+    ], batch_size=BATCH)
+    StaffMember.objects.bulk_create([
+        StaffMember(club_id=cid, full_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", role=role)
+        for cid in club_ids for role in ("COACH", "ASSIST_COACH", "PHYSIO")
+    ])
+    squads = defaultdict(list)
+    for pid, cid, pos, number in (
+        Player.objects.filter(club_id__in=club_ids).values_list("id", "club_id", "position", "number")
+    ):
+        squads[cid].append((pid, pos, number))
+    return club_ids, squads
+
+
+def _season_dates(n_clubs, seasons, played, spacing_days):
+    """Date de départ de chaque saison : la dernière est jouée à `played`."""
+    n_rounds = 2 * (n_clubs - 1 + n_clubs % 2)
+    length = n_rounds * spacing_days
+    today = timezone.localdate()
+    last_start = today - timedelta(days=int(length * played))
+    gap = length + 42  # intersaison
+    return [last_start - timedelta(days=gap * (seasons - 1 - s)) for s in range(seasons)]
+
+
+def _lineups_for(rng, match_id, club_id, squad, played):
+    by_pos = defaultdict(list)
+    for entry in rng.sample(squad, len(squad)):
+        by_pos[entry[1]].append(entry)
+    rows = []
+    for seq, (pos, label) in enumerate(STARTING_SLOTS + BENCH_SLOTS, start=1):
+        pool = by_pos[pos] or next((v for v in by_pos.values() if v), [])
+        if not pool:
+            break
+        pid, _, number = pool.pop()
+        starting = seq <= len(STARTING_SLOTS)
+        rows.append(Lineup(
+            match_id=match_id, club_id=club_id, player_id=pid, number=number, position=label,
+            is_starting=starting, is_captain=seq == 1, seq=seq,
+            minutes_played=(90 if starting else rng.choice([0, 0, 15, 30])) if played else 0,
+            rating=Decimal(str(round(rng.uniform(5.0, 9.0), 1))) if played else None,
+        ))
+    return rows
+
+
+def _play_league_matches(rng, squads, match_rows, live_count):
+    """Résultats, buts, cartons, compos et infos d'équipe des matchs du championnat."""
+    now = timezone.now()
+    past = [m for m in match_rows if m["datetime"] <= now]
+    upcoming = [m for m in match_rows if m["datetime"] > now]
+    live = upcoming[:live_count]
+
+    updates, goals, cards, lineups, infos = [], [], [], [], []
+    for m in past + live:
+        is_live = m in live
+        home, away = m["home_club_id"], m["away_club_id"]
+        minute_cap = rng.randint(20, 85) if is_live else 90
+        scores = {}
+        for club_id in (home, away):
+            n = rng.choices(range(len(GOALS_WEIGHTS)), weights=GOALS_WEIGHTS)[0]
+            minutes = [mn for mn in _minutes(rng, n) if mn <= minute_cap]
+            scores[club_id] = len(minutes)
+            for mn in minutes:
+                scorer = _scorer(rng, squads[club_id])
+                assist = _pick(rng, squads[club_id], "MF") if rng.random() < 0.7 else None
+                if assist and assist[0] == scorer[0]:
+                    assist = None
+                goals.append(Goal(
+                    match_id=m["id"], club_id=club_id, player_id=scorer[0],
+                    assist_player_id=assist[0] if assist else None, minute=mn,
+                    type="PEN" if rng.random() < 0.08 else "",
+                ))
+            for mn in _minutes(rng, rng.choices([0, 1, 2, 3, 4], weights=[10, 25, 30, 22, 13])[0], minute_cap):
+                cards.append(Card(
+                    match_id=m["id"], club_id=club_id, player_id=_pick(rng, squads[club_id], "DF")[0],
+                    minute=mn, type="R" if rng.random() < 0.05 else "Y",
+                ))
+            lineups += _lineups_for(rng, m["id"], club_id, squads[club_id], played=not is_live)
+            infos.append(TeamInfoPerMatch(
+                match_id=m["id"], club_id=club_id, formation="4-3-3",
+                coach_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            ))
+
+        obj = Match(id=m["id"], home_score=scores[home], away_score=scores[away])
+        if is_live:
+            obj.status, obj.minute = "LIVE", minute_cap
+            obj.datetime = obj.kickoff_1 = now - timedelta(minutes=minute_cap)
+        else:
+            obj.status, obj.minute, obj.datetime = "FT", 90, m["datetime"]
+        updates.append(obj)
+
+    Match.objects.bulk_update(
+        updates, ["home_score", "away_score", "status", "minute", "datetime", "kickoff_1"], batch_size=BATCH
+    )
+    Goal.objects.bulk_create(goals, batch_size=BATCH)
+    Card.objects.bulk_create(cards, batch_size=BATCH)
+    Lineup.objects.bulk_create(lineups, batch_size=BATCH)
+    TeamInfoPerMatch.objects.bulk_create(infos, batch_size=BATCH)
+    return {
+        "played": len(past), "live": len(live), "scheduled": len(upcoming) - len(live),
+        "goals": len(goals), "cards": len(cards), "lineups": len(lineups),
+    }
+
+
+def _generate_league(rng, prefix, n_clubs, squad_size, seasons, played, live, spacing_days):
+    club_ids, squads = _create_clubs(rng, prefix, n_clubs, squad_size)
+    first_round = next_round_number()
+    for start in _season_dates(n_clubs, seasons, played, spacing_days):
+        plan = plan_schedule(
+            berger_rounds(club_ids, double=True), start_date=start, kickoffs=KICKOFFS,
+            spacing_days=spacing_days, venues=club_venues(club_ids),
+        )
+        write_league_schedule(plan)
+
+    match_rows = list(
+        Match.objects.filter(round__number__gte=first_round, home_club_id__in=club_ids)
+        .order_by("datetime", "id").values("id", "home_club_id", "away_club_id", "datetime")
+    )
+    counts = _play_league_matches(rng, squads, match_rows, live)
+    counts.update(clubs=len(club_ids), players=sum(len(s) for s in squads.values()),
+                  rounds=Round.objects.filter(number__gte=first_round).count(), matches=len(match_rows))
+    return counts
+
+
+# =========================
+# Compétitions (CompetitionTeam / CompetitionMatch)
+# =========================
+def _generate_competition(rng, prefix, index, n_teams, squad_size, played, spacing_days):
+    season = timezone.localdate().year
+    comp = Competition.objects.create(
+        name=f"{prefix} Coupe {index + 1}", short_name=f"{prefix[:3]}C{index + 1}",
+        slug=f"{prefix.lower()}-coupe-{index + 1}", type="league", category="masculin",
+        season=f"{season}-{season + 1}", priority=index + 1,
+    )
+    CompetitionTeam.objects.bulk_create([
+        CompetitionTeam(competition=comp, name=f"{prefix} Équipe {index + 1}-{t + 1:02d}",
+                        short_name=f"E{t + 1:02d}", city=CITIES[t % len(CITIES)])
+        for t in range(n_teams)
+    ])
+    team_ids = list(CompetitionTeam.objects.filter(competition=comp).values_list("id", flat=True))
+    CompetitionPlayer.objects.bulk_create([
+        CompetitionPlayer(club_id=tid, name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                          number=n + 1, position=COMPETITION_POSITIONS[pos], age=rng.randint(17, 35))
+        for tid in team_ids for n, pos in enumerate(_squad_positions(squad_size))
+    ], batch_size=BATCH)
+    squads = defaultdict(list)
+    positions = {v: k for k, v in COMPETITION_POSITIONS.items()}
+    for pid, tid, pos in (
+        CompetitionPlayer.objects.filter(club__competition=comp).values_list("id", "club_id", "position")
+    ):
+        squads[tid].append((pid, positions[pos]))
+
+    start = _season_dates(n_teams, 1, played, spacing_days)[0]
+    plan = plan_competition(comp, start_date=start, kickoffs=KICKOFFS, spacing_days=spacing_days, replace=True)
+    write_competition_schedule(comp, plan)
+
+    now = timezone.now()
+    updates, goals, cards = [], [], []
+    totals = defaultdict(lambda: defaultdict(int))
+    for mid, home, away in (
+        CompetitionMatch.objects.filter(competition=comp, datetime__lte=now)
+        .values_list("id", "home_team_id", "away_team_id")
+    ):
+        scores = {}
+        for tid in (home, away):
+            minutes = _minutes(rng, rng.choices(range(len(GOALS_WEIGHTS)), weights=GOALS_WEIGHTS)[0])
+            scores[tid] = len(minutes)
+            for pid, _ in squads[tid][:11]:
+                totals[pid]["matches_played"] += 1
+            for mn in minutes:
+                scorer = _scorer(rng, squads[tid])
+                assist = _pick(rng, squads[tid], "MF") if rng.random() < 0.6 else None
+                if assist and assist[0] == scorer[0]:
+                    assist = None
+                goals.append(CompetitionGoal(match_id=mid, team_id=tid, player_id=scorer[0],
+                                             assist_player_id=assist[0] if assist else None, minute=mn))
+                totals[scorer[0]]["goals"] += 1
+                if assist:
+                    totals[assist[0]]["assists"] += 1
+            for mn in _minutes(rng, rng.randint(0, 3)):
+                pid = _pick(rng, squads[tid], "DF")[0]
+                color = "red" if rng.random() < 0.05 else "yellow"
+                cards.append(CompetitionCard(match_id=mid, team_id=tid, player_id=pid, color=color, minute=mn))
+                totals[pid]["red_cards" if color == "red" else "yellow_cards"] += 1
+        updates.append(CompetitionMatch(id=mid, home_score=scores[home], away_score=scores[away], status="FT"))
+
+    CompetitionMatch.objects.bulk_update(updates, ["home_score", "away_score", "status"], batch_size=BATCH)
+    CompetitionGoal.objects.bulk_create(goals, batch_size=BATCH)
+    CompetitionCard.objects.bulk_create(cards, batch_size=BATCH)
+    counters = ["matches_played", "goals", "assists", "yellow_cards", "red_cards"]
+    CompetitionPlayer.objects.bulk_update(
+        [CompetitionPlayer(id=pid, **{k: t[k] for k in counters}) for pid, t in totals.items()],
+        counters, batch_size=BATCH,
+    )
+    refresh_snapshots(comp.pk)
+    return comp.pk, {"teams": len(team_ids), "matches": len(plan["fixtures"]), "played": len(updates),
+                     "goals": len(goals), "cards": len(cards)}
+
+
+# =========================
+# Publicités
+# =========================
+def _generate_ads(rng, prefix, n_ads, events_per_ad):
+    ads = Ad.objects.bulk_create([
+        Ad(ad_id=f"{prefix.lower()}-ad-{i + 1}", title=f"Annonce {i + 1}",
+           image=f"https://example.com/ads/{i + 1}.jpg", link="https://example.com")
+        for i in range(n_ads)
+    ])
+    ad_ids = list(Ad.objects.filter(ad_id__in=[a.ad_id for a in ads]).values_list("id", flat=True))
+    AdStat.objects.bulk_create([
+        AdStat(ad_id=aid, event="click" if rng.random() < 0.04 else "impression",
+               ip=f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}", user_agent="synthetic")
+        for aid in ad_ids for _ in range(events_per_ad)
+    ], batch_size=BATCH)
+    return {"ads": len(ad_ids), "events": len(ad_ids) * events_per_ad}
+
+
+# =========================
+# Point d'entrée
+# =========================
+def generate(*, clubs=16, squad_size=25, seasons=1, played=2 / 3, live=2, competitions=1,
+             competition_teams=12, ads=5, ad_events=200, spacing_days=7, prefix=DEFAULT_PREFIX, seed=None):
+    """Génère la ligue ; renvoie un résumé {section: {compteur: n}}."""
+    if clubs < 2 or competition_teams < 2:
+        raise ValueError("Il faut au moins 2 clubs / équipes.")
+    if squad_size < len(STARTING_SLOTS) + len(BENCH_SLOTS):
+        minimum = len(STARTING_SLOTS) + len(BENCH_SLOTS)
+        raise ValueError(f"Effectif trop court pour une feuille de match ({minimum} minimum).")
+    rng = random.Random(seed)
+
+    with transaction.atomic():
+        summary = {"league": _generate_league(rng, prefix, clubs, squad_size, seasons, played, live, spacing_days)}
+        comp_ids = []
+        for i in range(competitions):
+            comp_id, summary[f"competition_{i + 1}"] = _generate_competition(
+                rng, prefix, i, competition_teams, squad_size, played, spacing_days,
+            )
+            comp_ids.append(comp_id)
+        summary["ads"] = _generate_ads(rng, prefix, ads, ad_events)
+        _refresh_derived(comp_ids)
+    return summary
+
+
+def _refresh_derived(competition_ids=()):
+    """Tables dérivées + versions + caches après des écritures en masse."""
+    rebuild_standings()
+    rebuild_player_stats()
+    bump(MATCHES, EVENTS, STANDINGS, CLUBS, *(model_key(m) for m in PUBLIC_MODELS),
+         *(competition_key(cid) for cid in competition_ids))
+    transaction.on_commit(clear_all)
+
+
+def delete_synthetic(prefix=DEFAULT_PREFIX):
+    """Retire les objets générés avec ce préfixe ; renvoie le nombre de lignes supprimées."""
+    with transaction.atomic():
+        clubs = Club.objects.filter(name__startswith=f"{prefix} ")
+        round_ids = set(Match.objects.filter(home_club__in=clubs).values_list("round_id", flat=True))
+        with coalesce_match_changes():
+            deleted = clubs.delete()[0]
+        deleted += Competition.objects.filter(name__startswith=f"{prefix} ").delete()[0]
+        deleted += Ad.objects.filter(ad_id__startswith=f"{prefix.lower()}-ad-").delete()[0]
+        # journées du calendrier généré restées sans match (Match.round : SET_NULL)
+        deleted += Round.objects.filter(id__in=round_ids, matches__isnull=True).delete()[0]
+        _refresh_derived()
+    return deleted
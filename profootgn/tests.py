@@ -0,0 +1,513 @@
+# profootgn/tests.py
+"""
+Budget de requêtes SQL et de taille de réponse pour chaque endpoint public.
+
+Jeu de données : fixtures/sample_data.json + une saison réaliste (clubs,
+effectifs, journées, buts, cartons, compos de 18 notées, direct, compétition,
+pubs). Chaque endpoint est appelé cache vide : le nombre de requêtes ne doit
+pas dépasser BUDGETS, sinon l'échec liste les requêtes SQL répétées (N+1).
+
+Nouvel endpoint public -> l'ajouter à BUDGETS (ou à UNBUDGETED avec la
+raison) : test_every_public_route_has_a_budget échoue sinon.
+"""
+import contextvars
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter
+from contextlib import ExitStack
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ads.models import Ad, AdStat
+from clubs.models import Club, StaffMember
+from competitions.models import (
+    Card as CompetitionCard,
+    Competition,
+    CompetitionMatch,
+    CompetitionTeam,
+    Goal as CompetitionGoal,
+    Player as CompetitionPlayer,
+)
+from matches.models import Card, Goal, Lineup, Match, Round, TeamInfoPerMatch
+from matches.standings import verify_standings
+from news.models import NewsItem
+from players.models import Player
+from profootgn.db_router import STICKY_COOKIE, ReplicaRouter, use_primary
+from profootgn.cache import SingleFlight, _acquire, _lock_path, _release, clear_all, get_cache, make_key
+from stats.middleware import FlightStateMiddleware
+from stats.player_stats import verify_player_stats
+from stats.stamps import mark_flight_state
+
+FIXTURE = str(Path(settings.BASE_DIR) / "fixtures" / "sample_data.json")
+
+KB = 1024
+
+# nom de route -> (chemin, requêtes SQL max, taille max de la réponse)
+# Budgets = mesure actuelle ; une requête de plus est une régression à
+# expliquer (ou à corriger). Chemins : {ids} renvoyés par _seed.
+BUDGETS = {
+    # --- profootgn/urls.py
+    "root": ("/", 0, 1 * KB),
+    "api/health/": ("/api/health/", 0, 1 * KB),
+    # --- matches/urls.py
+    "matches:match-list": ("/api/matches/", 5, 59 * KB),
+    "matches:match-live": ("/api/matches/live/", 7, 4 * KB),
+    "matches:match-live-lite": ("/api/matches/live-lite/", 2, 1 * KB),
+    "matches:match-recent": ("/api/matches/recent/", 5, 26 * KB),
+    "matches:match-upcoming": ("/api/matches/upcoming/", 5, 3 * KB),
+    "matches:match-detail": ("/api/matches/{match}/", 5, 3 * KB),
+    "matches:match-action-lineups": ("/api/matches/{match}/lineups/", 1, 13 * KB),
+    "matches:match-action-team-info": ("/api/matches/{match}/team-info/", 2, 1 * KB),
+    "matches:match_lineups": ("/api/matches/{match}/lineups/", 1, 13 * KB),
+    "matches:match_team_info": ("/api/matches/{match}/team-info/", 2, 1 * KB),
+    "matches:goal-list": ("/api/goals/", 2, 33 * KB),
+    "matches:goal-by-match": ("/api/goals/by-match/?match={match}", 1, 2 * KB),
+    "matches:goal-detail": ("/api/goals/{goal}/", 1, 1 * KB),
+    "matches:card-list": ("/api/cards/", 2, 7 * KB),
+    "matches:card-detail": ("/api/cards/{card}/", 1, 1 * KB),
+    "matches:round-list": ("/api/rounds/", 3, 1 * KB),
+    "matches:round-detail": ("/api/rounds/{round}/", 2, 1 * KB),
+    "matches:lineup-list": ("/api/lineups/?match={match}", 3, 13 * KB),
+    "matches:lineup-detail": ("/api/lineups/{lineup}/", 1, 1 * KB),
+    "matches:api-root": ("/api/", 0, 1 * KB),
+    "matches:assists_leaders": ("/api/stats/assists-leaders/", 3, 1 * KB),
+    "matches:club_players_stats": ("/api/clubs/{club}/players-stats/", 3, 4 * KB),
+    "matches:club_positions": ("/api/clubs/{club}/positions/", 2, 1 * KB),
+    # --- stats/urls.py
+    "stats-standings": ("/api/stats/standings/", 2, 3 * KB),
+    "stats-topscorers": ("/api/stats/topscorers/", 3, 3 * KB),
+    "player_totals": ("/api/stats/player-totals/?club={club}", 2, 3 * KB),
+    # --- competitions/urls.py
+    "competitions:api_competitions_list": ("/api/competitions/", 2, 1 * KB),
+    "competitions:api_competition_matches": ("/api/competitions/{competition}/matches/", 2, 4 * KB),
+    "competitions:api_competition_match_detail": (
+        "/api/competitions/{competition}/matches/{cmatch}/", 4, 1 * KB,
+    ),
+    "competitions:api_competition_standings": (
+        "/api/competitions/{competition}/standings/", 5, 2 * KB,
+    ),
+    "competitions:api_competition_clubs": ("/api/competitions/{competition}/clubs/", 2, 1 * KB),
+    "competitions:api_competition_club_detail": (
+        "/api/competitions/{competition}/clubs/{team}/", 6, 1 * KB,
+    ),
+    "competitions:api_competition_club_positions": (
+        "/api/competitions/{competition}/clubs/{team}/positions/", 3, 1 * KB,
+    ),
+    "competitions:api_competition_club_matches": (
+        "/api/competitions/{competition}/clubs/{team}/matches/", 3, 2 * KB,
+    ),
+    "competitions:api_competition_club_players": (
+        "/api/competitions/{competition}/clubs/{team}/players/", 3, 4 * KB,
+    ),
+    "competitions:api_competition_player_detail": (
+        "/api/competitions/{competition}/clubs/{team}/players/{cplayer}/", 3, 1 * KB,
+    ),
+    # --- clubs / players / news / ads (inclus par profootgn/urls.py)
+    "club-list": ("/api/clubs/", 3, 3 * KB),
+    "club-detail": ("/api/clubs/{club}/", 2, 1 * KB),
+    "staff-list": ("/api/staff/", 3, 6 * KB),
+    "staff-detail": ("/api/staff/{staff}/", 2, 1 * KB),
+    "player-list": ("/api/players/", 3, 24 * KB),
+    "player-detail": ("/api/players/{player}/", 2, 1 * KB),
+    "news-list": ("/api/news/", 3, 7 * KB),
+    "news-detail": ("/api/news/{news}/", 2, 1 * KB),
+    "ads-list": ("/api/ads/", 1, 1 * KB),
+    "ad-stats": ("/api/ads/stats/?ad_id={ad}&group_by=day", 3, 1 * KB),
+}
+
+# Routes publiques hors budget, avec la raison
+UNBUDGETED = {
+    "matches:matches_live_stream": "flux SSE sans fin",
+    "matches:match-action-replace-lineups": "écriture (admin)",
+    "matches:match-action-sync-events": "écriture (admin)",
+    "matches:goal-bulk": "écriture (admin)",
+    "matches:ajouter_match": "écriture",
+    "matches:modifier_match": "écriture",
+    "matches:supprimer_match": "écriture",
+    "matches:suspendre_match": "écriture",
+    "matches:standings": "masquée par stats-standings (même chemin)",
+    "api-root": "racines DRF sans requête (matches:api-root suffit)",
+    "matches:players_search": "masquée par player-detail (players/<pk>/ déclaré avant)",
+    "competitions:competition_matches": "page staff",
+    "metrics": "staff uniquement",
+    "token_obtain_pair": "auth",
+    "token_refresh": "auth",
+    "ad-impression": "écriture",
+    "ad-click": "écriture",
+    "ad-create": "écriture (admin)",
+    "api/debug/storage/": "debug",
+    "api/debug/db/logo-col/": "debug",
+    "api/debug/cloudinary-upload/": "debug",
+    "recruiter-list": "données privées (recrutement)",
+    "recruiter-detail": "données privées (recrutement)",
+    "trialrequest-list": "données privées (recrutement)",
+    "trialrequest-detail": "données privées (recrutement)",
+    "profile-list": "profils utilisateurs",
+    "profile-detail": "profils utilisateurs",
+}
+
+
+def _public_routes(patterns=None, prefix="", namespace=None):
+    """(nom de route ou chemin, chemin) de toutes les routes hors admin."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for p in patterns:
+        route = prefix + str(p.pattern)
+        if "admin/" in route or route.startswith("^media"):
+            continue
+        if isinstance(p, URLResolver):
+            ns = p.namespace or namespace
+            if p.namespace and namespace:
+                ns = f"{namespace}:{p.namespace}"
+            yield from _public_routes(p.url_patterns, route, ns)
+        elif isinstance(p, URLPattern):
+            name = f"{namespace}:{p.name}" if namespace and p.name else p.name
+            yield name or route, route
+
+
+def _normalize(sql):
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    return re.sub(r"\((?:\?,\s*)+\?\)", "(...)", sql)
+
+
+def _report(name, url, queries, budget):
+    """Message d'échec : requêtes répétées d'abord (N+1), puis la liste complète."""
+    lines = [f"{name} {url} : {len(queries)} requêtes SQL (budget {budget})"]
+    repeated = [(n, sql) for sql, n in Counter(map(_normalize, queries)).most_common() if n > 1]
+    if repeated:
+        lines.append("Requêtes répétées :")
+        lines += [f"  {n} x {sql[:300]}" for n, sql in repeated]
+    lines.append("Toutes les requêtes :")
+    lines += [f"  {i:>3}. {sql[:300]}" for i, sql in enumerate(queries, 1)]
+    return "\n".join(lines)
+
+
+def _seed():
+    """Une saison réaliste au-dessus de fixtures/sample_data.json ; renvoie les ids des chemins."""
+    now = timezone.now()
+    clubs = list(Club.objects.all()) + [
+        Club.objects.create(name=f"Club {i}", short_name=f"C{i}", city="Conakry", stadium=f"Stade {i}")
+        for i in range(8)
+    ]
+    Player.objects.bulk_create([
+        Player(first_name=f"Joueur{n}", last_name=f"{club.short_name or club.id}", club=club,
+               number=n, position=("GK", "DF", "MF", "FW")[n % 4])
+        for club in clubs for n in range(1, 21)
+    ])
+    squads = {c.id: list(Player.objects.filter(club=c).order_by("id")) for c in clubs}
+    StaffMember.objects.bulk_create([
+        StaffMember(club=c, full_name=f"Staff {c.id}-{r}", role=r)
+        for c in clubs for r in ("COACH", "PHYSIO")
+    ])
+    NewsItem.objects.bulk_create([
+        NewsItem(title=f"Actu {i}", slug=f"actu-{i}", content="Texte " * 40, club=clubs[i % len(clubs)])
+        for i in range(12)
+    ])
+
+    rounds = [Round.objects.create(name=f"Journée {n}", number=n) for n in range(2, 6)]
+    pairs = [(clubs[i], clubs[-1 - i]) for i in range(len(clubs) // 2)]
+    played = []
+    for r_idx, rnd in enumerate(rounds):
+        for home, away in pairs:
+            played.append(Match.objects.create(
+                round=rnd, datetime=now - timedelta(days=7 * (len(rounds) - r_idx)),
+                home_club=home, away_club=away, home_score=2, away_score=1, status="FT",
+            ))
+    # journée en cours : 2 matchs en direct, les autres à venir
+    current = Round.objects.create(name="Journée 6", number=6)
+    live = [
+        Match.objects.create(
+            round=current, datetime=now - timedelta(minutes=40), home_club=home, away_club=away,
+            home_score=1, status="LIVE", kickoff_1=now - timedelta(minutes=40),
+        )
+        for home, away in pairs[:2]
+    ]
+    for home, away in pairs[2:]:
+        Match.objects.create(round=current, datetime=now + timedelta(days=3), home_club=home, away_club=away)
+
+    lineups = []
+    for m in played + live:
+        hp, ap = squads[m.home_club_id], squads[m.away_club_id]
+        Goal.objects.create(match=m, club=m.home_club, player=hp[9], assist_player=hp[10], minute=12)
+        if m.status == "FT":
+            Goal.objects.create(match=m, club=m.home_club, player=hp[10], minute=55, type="PEN")
+            Goal.objects.create(match=m, club=m.away_club, player=ap[9], assist_name="Libre", minute=80)
+        Card.objects.create(match=m, club=m.away_club, player=ap[3], minute=33, type="Y")
+        for club, squad, formation in ((m.home_club, hp, "4-3-3"), (m.away_club, ap, "4-4-2")):
+            TeamInfoPerMatch.objects.create(match=m, club=club, formation=formation, coach_name="Coach")
+            lineups += [
+                Lineup(match=m, club=club, player=p, number=p.number, position=p.position,
+                       is_starting=i < 11, is_captain=i == 0, seq=i + 1, minutes_played=90 if i < 11 else 0,
+                       rating=Decimal("6.5") + Decimal(i % 3))
+                for i, p in enumerate(squad[:18])
+            ]
+    Lineup.objects.bulk_create(lineups)
+
+    comp = Competition.objects.create(name="Ligue 1 Test", short_name="L1", type="league",
+                                      category="masculin", season="2025-2026")
+    teams = [CompetitionTeam.objects.create(competition=comp, name=f"Équipe {i}") for i in range(6)]
+    CompetitionPlayer.objects.bulk_create([
+        CompetitionPlayer(club=t, name=f"Joueur {t.id}-{n}", number=n,
+                          position=("GK", "DEF", "MID", "ATT")[n % 4])
+        for t in teams for n in range(1, 15)
+    ])
+    cplayers = {t.id: list(CompetitionPlayer.objects.filter(club=t).order_by("id")) for t in teams}
+    cmatches = []
+    for day in range(1, 4):
+        for i in range(3):
+            home, away = teams[(i + day) % 6], teams[(5 - i + day) % 6]
+            cm = CompetitionMatch.objects.create(
+                competition=comp, home_team=home, away_team=away, matchday=day,
+                datetime=now - timedelta(days=10 - day), home_score=1, away_score=1, status="FT",
+            )
+            CompetitionGoal.objects.create(match=cm, team=home, player=cplayers[home.id][8], minute=20)
+            CompetitionGoal.objects.create(match=cm, team=away, player=cplayers[away.id][8],
+                                           assist_player=cplayers[away.id][7], minute=70)
+            CompetitionCard.objects.create(match=cm, team=home, player=cplayers[home.id][3],
+                                           color="yellow", minute=40)
+            cmatches.append(cm)
+
+    ad = Ad.objects.create(ad_id="home-1", title="Pub", link="https://example.com")
+    AdStat.objects.bulk_create([AdStat(ad=ad, event=("impression", "click")[i % 2]) for i in range(20)])
+
+    match = played[0]
+    team = cmatches[0].home_team
+    return {
+        "match": match.id, "live": live[0].id, "club": match.home_club_id,
+        "player": squads[match.home_club_id][9].id, "round": rounds[0].id,
+        "goal": match.goals.first().id, "card": match.cards.first().id,
+        "lineup": match.lineups.first().id,
+        "news": NewsItem.objects.first().id, "staff": StaffMember.objects.first().id,
+        "competition": comp.id, "team": team.id, "cplayer": cplayers[team.id][8].id,
+        "cmatch": cmatches[0].id, "ad": ad.ad_id,
+    }
+
+
+class PublicEndpointBudgetTests(TestCase):
+    fixtures = [FIXTURE]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ids = _seed()
+
+    def setUp(self):
+        clear_all()
+
+    def _get(self, url):
+        """(réponse, requêtes SQL) pour un GET anonyme, toutes bases confondues."""
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for alias in settings.DATABASES:
+                stack.enter_context(connections[alias].execute_wrapper(capture))
+            response = APIClient().get(url)
+        return response, queries
+
+    def test_every_public_route_has_a_budget(self):
+        known = set(BUDGETS) | set(UNBUDGETED)
+        missing = sorted({name for name, _ in _public_routes()} - known)
+        self.assertEqual(missing, [], "routes publiques sans budget (BUDGETS ou UNBUDGETED)")
+
+    def test_query_and_size_budgets(self):
+        for name, (path, max_queries, max_bytes) in BUDGETS.items():
+            url = path.format(**self.ids)
+            with self.subTest(route=name, url=url):
+                clear_all()
+                response, queries = self._get(url)
+                self.assertEqual(response.status_code, 200, f"{name} {url}")
+                self.assertLessEqual(len(queries), max_queries, _report(name, url, queries, max_queries))
+                size = len(response.content)
+                self.assertLessEqual(size, max_bytes, f"{name} {url} : {size} octets (budget {max_bytes})")
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        cache_settings = {
+            alias: {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": self.dir}
+            for alias in settings.CACHES
+        }
+        override = override_settings(CACHES=cache_settings)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_file_lock_is_exclusive(self):
+        c = get_cache()
+        self.assertTrue(_acquire(c, "k:lock", "a", 10))
+        self.assertFalse(_acquire(c, "k:lock", "b", 10))
+        _release(c, "k:lock", "b")  # pas le propriétaire : verrou conservé
+        self.assertFalse(_acquire(c, "k:lock", "b", 10))
+        _release(c, "k:lock", "a")
+        self.assertTrue(_acquire(c, "k:lock", "b", 10))
+
+        # verrou abandonné (plus vieux que son TTL) : repris
+        past = time.time() - 60
+        os.utime(_lock_path(c, "k:lock"), (past, past))
+        self.assertTrue(_acquire(c, "k:lock", "c", 10))
+
+    def test_stale_value_served_and_marked_while_locked(self):
+        flight = SingleFlight("test-flight")
+        self.assertEqual(flight.get(["x"], 1, lambda: "v1"), ("v1", "rebuilt"))
+        self.assertEqual(flight.get(["x"], 1, lambda: "v1"), ("v1", "hit"))
+
+        # un autre worker recalcule la version 2
+        lock_key = make_key("flight:test-flight", "x") + ":lock"
+        self.assertTrue(_acquire(get_cache(), lock_key, "other", 10))
+        self.assertEqual(flight.get(["x"], 2, lambda: "v2"), ("v1", "stale"))
+
+        request = RequestFactory().get("/")
+
+        def view(req):
+            mark_flight_state(req, flight.get(["x"], 2, lambda: "v2")[1])
+            return HttpResponse()
+
+        self.assertEqual(FlightStateMiddleware(view)(request)["X-Cache-Stale"], "1")
+        self.assertNotIn("X-Cache-Stale", FlightStateMiddleware(lambda req: HttpResponse())(RequestFactory().get("/")))
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class ReplicaRouterTests(TransactionTestCase):
+    """
+    Réplica déclaré comme dans settings (TEST: MIRROR -> default) : même base
+    de test, mais une connexion distincte dont on compte les requêtes.
+    """
+
+    # alias ajouté au démarrage de la classe : "__all__" l'inclut sans que le runner le cherche avant
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        connections.settings["replica1"] = {
+            **connections["default"].settings_dict,
+            "TEST": {**connections["default"].settings_dict["TEST"], "MIRROR": "default"},
+        }
+        connections["replica1"].creation.set_as_test_mirror(connections["default"].settings_dict)
+        cls.addClassCleanup(cls._drop_replica)
+        super().setUpClass()
+
+    @classmethod
+    def _drop_replica(cls):
+        connections["replica1"].close()
+        del connections["replica1"]
+        del connections.settings["replica1"]
+
+    def setUp(self):
+        clear_all()
+        Round.objects.create(name="J1", number=1)
+        self.admin = get_user_model().objects.create_user("admin", password="x", is_staff=True)
+
+    def _get(self, client, url):
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections["replica1"]) as replica:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.response = response
+        return len(primary.captured_queries), len(replica.captured_queries)
+
+    def test_router_pins_primary_after_write(self):
+        router = ReplicaRouter()
+
+        def scenario():
+            reads = [router.db_for_read(Round)]
+            with use_primary():
+                reads.append(router.db_for_read(Round))
+            reads.append(router.db_for_read(Round))
+            router.db_for_write(Round)
+            reads.append(router.db_for_read(Round))
+            return reads
+
+        # contexte neuf : le setUp a déjà écrit (et donc épinglé) dans le contexte du test
+        self.assertEqual(contextvars.Context().run(scenario), ["replica1", "default", "replica1", "default"])
+        self.assertFalse(router.allow_migrate("replica1", "matches"))
+
+    def test_get_reads_from_replica(self):
+        primary, replica = self._get(self.client, "/api/rounds/")
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        # le miroir lit bien la base de test
+        self.assertIn("J1", self.response.content.decode())
+
+    def test_write_pins_primary_and_cookie_pins_follow_up_reads(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with CaptureQueriesContext(connections["replica1"]) as replica:
+            response = client.post("/api/rounds/", {"name": "J2", "number": 2}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(replica.captured_queries), 0)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        # lecture suivante du même client : principale (cookie encore valide)
+        primary, replica = self._get(client, "/api/rounds/")
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        # cookie expiré : retour au réplica
+        client.cookies[STICKY_COOKIE] = str(int(time.time()) - 1)
+        primary, replica = self._get(client, "/api/rounds/")
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+
+class SyntheticLeagueTests(TestCase):
+    """generate_league (écritures en masse, sans signaux) puis bench_endpoints sur le résultat."""
+
+    def _command(self, name, *args):
+        out = io.StringIO()
+        call_command(name, *args, stdout=out)
+        return json.loads(out.getvalue())
+
+    def test_generate_bench_and_delete(self):
+        summary = self._command(
+            "generate_league", "--clubs", "4", "--squad-size", "18", "--competitions", "1",
+            "--competition-teams", "3", "--ads", "1", "--ad-events", "5", "--seed", "7", "--prefix", "TST",
+        )
+        league = summary["league"]
+        # aller / retour : n * (n - 1) matchs
+        self.assertEqual((league["clubs"], league["players"], league["matches"]), (4, 72, 12))
+        self.assertEqual(Club.objects.filter(name__startswith="TST ").count(), 4)
+        self.assertEqual(Match.objects.filter(home_club__name__startswith="TST ").count(), 12)
+        self.assertTrue(Match.objects.filter(status="FT").exists())
+        # tables dérivées reconstruites : identiques à un recalcul complet
+        self.assertEqual(verify_standings(), [])
+        self.assertEqual(verify_player_stats(), [])
+
+        report = self._command(
+            "bench_endpoints", "--repeat", "2", "--warmup", "0", "--only", "standings", "--only", "clubs",
+        )
+        self.assertEqual(report["config"]["repeat"], 2)
+        self.assertIn("competition-standings", report["endpoints"])
+        for name, row in report["endpoints"].items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(row["status"], [200])
+                self.assertLessEqual(row["p50_ms"], row["p95_ms"])
+                self.assertGreater(row["bytes"], 0)
+                self.assertGreaterEqual(row["queries_max"], row["queries_p50"])
+
+        self.assertGreater(self._command("generate_league", "--delete", "--prefix", "TST")["deleted"], 0)
+        self.assertFalse(Club.objects.filter(name__startswith="TST ").exists())
+        self.assertEqual(verify_standings(), [])
+
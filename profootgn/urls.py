@@ -21,6 +21,7 @@ from matches.admin_views import (
 # ===== Admin rapides (players) =====
 from players.admin_views import (
     quick_add_players_view,
+    import_players_view,    # import CSV / JSON d'effectifs
     admin_players_by_club,  # JSON: joueurs d'un club (utilisé par la page compos)
 )
 
@@ -32,6 +33,7 @@ from clubs.admin_views import (
 )
 
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from stats.views import MetricsView
 
 
 def root_ping(request):
@@ -122,6 +124,8 @@ urlpatterns = [
 
     # ✅ Health check simple pour Render et monitoring
     path("api/health/", lambda r: JsonResponse({"status": "ok"})),
+    # 📈 Métriques Prometheus (staff) : durée / SQL / taille par route, caches
+    path("api/metrics/", MetricsView.as_view(), name="metrics"),
 
     # 🔎 Debug (à supprimer après test)
     path("api/debug/storage/", debug_storage),
@@ -131,6 +135,7 @@ urlpatterns = [
     # ===== Admin custom (pages rapides) =====
     path("admin/matches/quick/",  admin.site.admin_view(quick_add_match_view),  name="admin_quick_match"),
     path("admin/players/quick/",  admin.site.admin_view(quick_add_players_view), name="admin_quick_players"),
+    path("admin/players/import/", admin.site.admin_view(import_players_view),   name="admin_import_players"),
 
     path("admin/events/quick/",   admin.site.admin_view(quick_events),          name="admin_quick_events"),
     path("admin/events/api/",     admin.site.admin_view(quick_events_api),      name="admin_quick_events_api"),
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 class StatsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stats'
+
+    def ready(self):
+        # versions de données (ETag) incrémentées par signaux,
+        # stats joueurs matérialisées tenues à jour sur match_changed
+        from . import stamps, player_stats  # noqa: F401
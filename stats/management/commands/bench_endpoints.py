@@ -0,0 +1,175 @@
+# stats/management/commands/bench_endpoints.py
+import json
+import math
+import statistics
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from clubs.models import Club
+from competitions.models import Competition, CompetitionMatch, CompetitionTeam
+from matches.models import Match
+from profootgn.cache import clear_all
+
+# (nom, chemin) ; {ids} résolus sur la base courante (voir _ids)
+ENDPOINTS = [
+    ("matches", "/api/matches/"),
+    ("matches-live", "/api/matches/live/"),
+    ("matches-live-lite", "/api/matches/live-lite/"),
+    ("matches-recent", "/api/matches/recent/"),
+    ("matches-upcoming", "/api/matches/upcoming/"),
+    ("match-detail", "/api/matches/{match}/"),
+    ("match-lineups", "/api/matches/{match}/lineups/"),
+    ("goals-by-match", "/api/goals/by-match/?match={match}"),
+    ("rounds", "/api/rounds/"),
+    ("standings", "/api/stats/standings/"),
+    ("topscorers", "/api/stats/topscorers/"),
+    ("assists-leaders", "/api/stats/assists-leaders/"),
+    ("player-totals", "/api/stats/player-totals/?club={club}"),
+    ("club-players-stats", "/api/clubs/{club}/players-stats/"),
+    ("club-positions", "/api/clubs/{club}/positions/"),
+    ("clubs", "/api/clubs/"),
+    ("players", "/api/players/"),
+    ("competitions", "/api/competitions/"),
+    ("competition-matches", "/api/competitions/{competition}/matches/"),
+    ("competition-match", "/api/competitions/{competition}/matches/{cmatch}/"),
+    ("competition-standings", "/api/competitions/{competition}/standings/"),
+    ("competition-club", "/api/competitions/{competition}/clubs/{team}/"),
+    ("competition-club-players", "/api/competitions/{competition}/clubs/{team}/players/"),
+    ("ads-stats", "/api/ads/stats/?ad_id={ad}&group_by=day"),
+]
+
+
+def _ids():
+    """Ids d'exemple pris dans la base (match terminé, club, compétition...)."""
+    from ads.models import Ad
+
+    ids = {}
+    match = Match.objects.filter(status__in=["FT", "FINISHED"]).order_by("-datetime").first()
+    if match:
+        ids["match"] = match.pk
+    club = Club.objects.order_by("id").first()
+    if club:
+        ids["club"] = club.pk
+    comp = Competition.objects.filter(is_active=True).order_by("priority", "id").first()
+    if comp:
+        ids["competition"] = comp.pk
+        team = CompetitionTeam.objects.filter(competition=comp).order_by("id").first()
+        cmatch = CompetitionMatch.objects.filter(competition=comp).order_by("id").first()
+        if team:
+            ids["team"] = team.pk
+        if cmatch:
+            ids["cmatch"] = cmatch.pk
+    ad = Ad.objects.order_by("id").first()
+    if ad:
+        ids["ad"] = ad.ad_id
+    return ids
+
+
+def _percentile(values, q):
+    """Rang le plus proche (valeurs triées)."""
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure les principaux endpoints via le client de test Django (sans réseau) : "
+        "latence p50/p95/p99, requêtes SQL et octets par endpoint, en JSON. "
+        "Lancer avant / après un changement (ex. après generate_league) et comparer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=30, help="Requêtes mesurées par endpoint (défaut: 30).")
+        parser.add_argument("--warmup", type=int, default=2, help="Requêtes non mesurées avant (défaut: 2).")
+        parser.add_argument(
+            "--cold", action="store_true",
+            help="Vide les caches avant chaque requête (pire cas) ; défaut : caches chauds.",
+        )
+        parser.add_argument(
+            "--only", action="append", default=[],
+            help="Ne mesure que les endpoints dont le nom contient ce texte (répétable).",
+        )
+        parser.add_argument("--output", help="Écrit aussi le JSON dans ce fichier.")
+
+    def handle(self, *args, **opts):
+        if opts["repeat"] < 1:
+            raise CommandError("--repeat attend au moins 1.")
+        ids = _ids()
+        endpoints = [
+            (name, path) for name, path in ENDPOINTS
+            if not opts["only"] or any(part in name for part in opts["only"])
+        ]
+        if not endpoints:
+            raise CommandError("Aucun endpoint ne correspond à --only.")
+
+        results, skipped = {}, []
+        # métriques de requêtes coupées : le benchmark ne doit pas polluer /api/metrics/
+        with override_settings(ALLOWED_HOSTS=["*"], METRICS_ENABLED=False):
+            client = Client()
+            for name, path in endpoints:
+                try:
+                    url = path.format(**ids)
+                except KeyError as e:
+                    skipped.append({"endpoint": name, "missing": e.args[0]})
+                    continue
+                results[name] = self._measure(client, url, opts)
+
+        report = {
+            "config": {
+                "repeat": opts["repeat"], "warmup": opts["warmup"], "cold": opts["cold"],
+                "database": connections["default"].vendor,
+                "cache": settings.CACHES["default"]["BACKEND"].rsplit(".", 1)[-1],
+            },
+            "endpoints": results,
+        }
+        if skipped:
+            report["skipped"] = skipped
+        out = json.dumps(report, ensure_ascii=False, indent=2)
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8") as fh:
+                fh.write(out + "\n")
+        self.stdout.write(out)
+
+    def _measure(self, client, url, opts):
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        timings, query_counts, sizes, statuses = [], [], [], set()
+        for i in range(opts["warmup"] + opts["repeat"]):
+            if opts["cold"]:
+                clear_all()
+            queries[0] = 0
+            with ExitStack() as stack:
+                for alias in settings.DATABASES:
+                    stack.enter_context(connections[alias].execute_wrapper(count))
+                t0 = time.perf_counter()
+                response = client.get(url)
+                body = b"".join(response.streaming_content) if response.streaming else response.content
+                elapsed = time.perf_counter() - t0
+            if i < opts["warmup"]:
+                continue
+            timings.append(elapsed * 1000)
+            query_counts.append(queries[0])
+            sizes.append(len(body))
+            statuses.add(response.status_code)
+
+        timings.sort()
+        return {
+            "url": url,
+            "status": sorted(statuses),
+            "p50_ms": round(_percentile(timings, 0.50), 2),
+            "p95_ms": round(_percentile(timings, 0.95), 2),
+            "p99_ms": round(_percentile(timings, 0.99), 2),
+            "mean_ms": round(statistics.fmean(timings), 2),
+            "queries_p50": int(statistics.median_low(query_counts)),
+            "queries_max": max(query_counts),
+            "bytes": int(statistics.median_low(sizes)),
+        }
@@ -0,0 +1,20 @@
+# stats/management/commands/cache_metrics.py
+import json
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Compteurs des recalculs single-flight (classements, leaders, direct), "
+        "tous workers confondus : hit, rebuilt, stale, waited, fallback, collapsed."
+    )
+
+    def handle(self, *args, **opts):
+        # enregistre les flights déclarés au niveau des modules de vues
+        import competitions.services.standings  # noqa: F401
+        import matches.views  # noqa: F401
+        import stats.views  # noqa: F401
+        from profootgn.cache import flight_metrics
+
+        self.stdout.write(json.dumps(flight_metrics(), indent=2))
@@ -0,0 +1,37 @@
+# stats/management/commands/rebuild_player_stats.py
+from django.core.management.base import BaseCommand, CommandError
+
+from stats.player_stats import rebuild_player_stats, verify_player_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit les stats joueurs matérialisées (stats.PlayerStat) depuis les buts "
+        "et cartons. --verify : compare seulement, sans rien écrire (code retour ≠ 0 si écart)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Vérifie les totaux stockés contre un recalcul complet, sans les écrire.",
+        )
+
+    def handle(self, *args, **opts):
+        if opts["verify"]:
+            diffs = verify_player_stats()
+            if not diffs:
+                self.stdout.write(self.style.SUCCESS("✅ Stats joueurs conformes."))
+                return
+            for (player_id, club_id, state), field, have, expected in diffs:
+                self.stdout.write(
+                    f"joueur #{player_id} club #{club_id} [{state}] {field}: "
+                    f"stocké={have} attendu={expected}"
+                )
+            raise CommandError(f"{len(diffs)} écart(s) — lancer rebuild_player_stats sans --verify.")
+
+        n = rebuild_player_stats()
+        self.stdout.write(self.style.SUCCESS(f"✅ Stats joueurs reconstruites ({n} lignes)."))
+        diffs = verify_player_stats()
+        if diffs:
+            raise CommandError(f"{len(diffs)} écart(s) après reconstruction.")
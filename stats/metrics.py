@@ -0,0 +1,219 @@
+# stats/metrics.py
+"""
+Métriques de requêtes (format d'exposition Prometheus), partagées entre les
+workers gunicorn d'une même machine.
+
+Chaque process cumule ses compteurs en mémoire (verrou, pas d'E/S par
+requête) et les ajoute toutes les METRICS_FLUSH_SECONDS à un fichier SQLite
+local (METRICS_DB) : « valeur = valeur + delta », une transaction par envoi.
+/api/metrics/ envoie d'abord les deltas de son propre process puis lit le
+fichier : le total couvre tous les workers.
+
+Séries :
+  http_requests_total{route, method, status}
+  http_request_duration_seconds{route, method}      (histogramme)
+  http_request_db_queries_total{route, method}      (requêtes SQL cumulées)
+  http_request_db_seconds_total{route, method}      (temps SQL cumulé)
+  http_response_size_bytes_total{route, method}
+  cache_requests_total{cache, result}               (hit / miss / stale...)
+"""
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_LABEL_RE = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "http_requests_total": ("counter", "Requêtes HTTP traitées."),
+    "http_request_duration_seconds": ("histogram", "Durée des requêtes HTTP (secondes)."),
+    "http_request_db_queries_total": ("counter", "Requêtes SQL exécutées pendant les requêtes HTTP."),
+    "http_request_db_seconds_total": ("counter", "Temps passé en SQL pendant les requêtes HTTP (secondes)."),
+    "http_response_size_bytes_total": ("counter", "Octets de réponse envoyés (hors flux)."),
+    "cache_requests_total": ("counter", "Lectures de cache par résultat."),
+}
+
+
+def enabled():
+    return getattr(settings, "METRICS_ENABLED", True)
+
+
+def _store_path():
+    return getattr(settings, "METRICS_DB", None) or os.path.join(
+        tempfile.gettempdir(), "kanousport-metrics.sqlite3"
+    )
+
+
+def _labels(labels):
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{k}="{esc(v)}"' for k, v in sorted(labels.items()))
+
+
+# =========================
+# Stockage partagé (SQLite local)
+# =========================
+class MetricsStore:
+    def __init__(self, path):
+        self.path = path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS metrics ("
+            " name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL,"
+            " PRIMARY KEY (name, labels))"
+        )
+        return conn
+
+    def add(self, deltas):
+        if not deltas:
+            return
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO metrics (name, labels, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value",
+                [(name, labels, value) for (name, labels), value in deltas.items()],
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def read(self):
+        conn = self._connect()
+        try:
+            return {(n, l): v for n, l, v in conn.execute("SELECT name, labels, value FROM metrics")}
+        finally:
+            conn.close()
+
+    def reset(self):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM metrics")
+        finally:
+            conn.close()
+
+
+# =========================
+# Cumul par process
+# =========================
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deltas = defaultdict(float)
+        self._last_flush = time.monotonic()
+
+    def inc(self, name, labels, value=1):
+        if not enabled():
+            return
+        with self._lock:
+            self._deltas[(name, _labels(labels))] += value
+        self.maybe_flush()
+
+    def observe_request(self, route, method, status, seconds, queries, db_seconds, size):
+        if not enabled():
+            return
+        base = _labels({"route": route, "method": method})
+        with self._lock:
+            d = self._deltas
+            d[("http_requests_total", _labels({"route": route, "method": method, "status": status}))] += 1
+            for le in BUCKETS:
+                # toutes les bornes sont écrites (0 compris) : histogramme complet à l'export
+                d[("http_request_duration_seconds_bucket", f'{base},le="{le}"')] += seconds <= le
+            d[("http_request_duration_seconds_bucket", f'{base},le="+Inf"')] += 1
+            d[("http_request_duration_seconds_sum", base)] += seconds
+            d[("http_request_duration_seconds_count", base)] += 1
+            d[("http_request_db_queries_total", base)] += queries
+            d[("http_request_db_seconds_total", base)] += db_seconds
+            if size is not None:
+                d[("http_response_size_bytes_total", base)] += size
+        self.maybe_flush()
+
+    def maybe_flush(self, force=False):
+        interval = getattr(settings, "METRICS_FLUSH_SECONDS", 5)
+        if not force and time.monotonic() - self._last_flush < interval:
+            return
+        with self._lock:
+            deltas, self._deltas = self._deltas, defaultdict(float)
+            self._last_flush = time.monotonic()
+        try:
+            MetricsStore(_store_path()).add(deltas)
+        except Exception:
+            # jamais d'erreur de requête à cause des métriques : on regarde au prochain envoi
+            logger.exception("metrics: envoi impossible vers %s", _store_path())
+            with self._lock:
+                for k, v in deltas.items():
+                    self._deltas[k] += v
+
+
+recorder = Recorder()
+
+
+def count_cache(cache, result, n=1):
+    """Résultat d'une lecture de cache (hit, miss, stale, waited...)."""
+    if n:
+        recorder.inc("cache_requests_total", {"cache": cache, "result": result}, n)
+
+
+def cache_counts():
+    """{cache: {résultat: total}} de cache_requests_total, tous workers confondus."""
+    recorder.maybe_flush(force=True)
+    out = defaultdict(dict)
+    for (name, labels), value in MetricsStore(_store_path()).read().items():
+        if name == "cache_requests_total":
+            d = dict(_LABEL_RE.findall(labels))
+            out[d.get("cache")][d.get("result")] = value
+    return out
+
+
+# =========================
+# Exposition
+# =========================
+def _family(series_name):
+    for suffix in ("_bucket", "_sum", "_count"):
+        if series_name.endswith(suffix) and series_name[: -len(suffix)] in HELP:
+            return series_name[: -len(suffix)]
+    return series_name
+
+
+def _fmt(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render():
+    """Texte au format d'exposition Prometheus 0.0.4 (tous workers confondus)."""
+    recorder.maybe_flush(force=True)
+    rows = MetricsStore(_store_path()).read()
+
+    by_family = defaultdict(list)
+    for (name, labels), value in rows.items():
+        by_family[_family(name)].append((name, labels, value))
+
+    lines = []
+    for family in sorted(by_family):
+        kind, help_text = HELP.get(family, ("untyped", family))
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {kind}")
+
+        def order(row):
+            name, labels, _ = row
+            le = labels.rsplit('le="', 1)[-1].rstrip('"') if 'le="' in labels else ""
+            base = labels.rsplit(',le="', 1)[0] if le else labels
+            return (base, name, float("inf") if le == "+Inf" else float(le or 0))
+
+        for name, labels, value in sorted(by_family[family], key=order):
+            lines.append(f"{name}{{{labels}}} {_fmt(value)}" if labels else f"{name} {_fmt(value)}")
+    return "\n".join(lines) + "\n"
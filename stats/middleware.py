@@ -0,0 +1,181 @@
+# stats/middleware.py
+"""
+- ChangeStampMiddleware : GET conditionnel pour les API publiques peu
+  changeantes (clubs, staff, joueurs, actus, journées, liste des compétitions) ;
+- FlightStateMiddleware : `X-Cache-Stale: 1` sur une valeur SingleFlight périmée ;
+- MetricsMiddleware : durée / SQL / taille par route (stats/metrics.py).
+
+Chaque route est associée aux modèles qu'elle sert (PUBLIC_ROUTES). Avant la
+vue, le middleware lit leurs versions dans ChangeStamp (1 requête, aucune
+table métier) :
+  - If-None-Match connu, ou If-Modified-Since >= dernière écriture -> 304 ;
+  - sinon la vue répond et reçoit ETag, Last-Modified, Cache-Control.
+
+Les versions sont tenues par les signaux de stats/stamps.py (PUBLIC_MODELS) ;
+une écriture en masse (bulk_create / update) doit appeler bump(model_key(...)).
+"""
+import hashlib
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+from clubs.models import Club, StaffMember
+from competitions.models import Competition
+from matches.models import Round
+from news.models import NewsItem
+from players.models import Player
+from . import metrics
+from .stamps import get_stamps_with_dates, model_key
+
+_DETAIL = r"(?:\d+/)?"
+
+# (motif du chemin, modèles dont dépend la réponse)
+PUBLIC_ROUTES = [
+    (rf"^/api/clubs/{_DETAIL}$", (Club,)),
+    (rf"^/api/staff/{_DETAIL}$", (StaffMember, Club)),
+    (rf"^/api/players/{_DETAIL}$", (Player,)),
+    (rf"^/api/news/{_DETAIL}$", (NewsItem, Club)),
+    (rf"^/api/rounds/{_DETAIL}$", (Round,)),
+    (r"^/(?:api/)?api/competitions/$", (Competition,)),
+]
+_ROUTES = [(re.compile(pattern), [model_key(m) for m in models]) for pattern, models in PUBLIC_ROUTES]
+
+
+def _keys_for(path):
+    for pattern, keys in _ROUTES:
+        if pattern.match(path):
+            return keys
+    return None
+
+
+def _etag(request, stamps):
+    parts = [request.get_host(), request.get_full_path(), request.META.get("HTTP_ACCEPT", "")]
+    parts += [f"{k}={v}" for k, v in sorted(stamps.items())]
+    return quote_etag(hashlib.md5("|".join(parts).encode("utf-8")).hexdigest())
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match:
+        # If-None-Match prime sur If-Modified-Since (RFC 9110)
+        etags = parse_etags(if_none_match)
+        return etag in etags or "*" in etags
+    since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    return bool(since and last_modified and int(last_modified.timestamp()) <= since)
+
+
+class ChangeStampMiddleware:
+    """
+    max-age / stale-while-revalidate : settings.PUBLIC_CACHE_MAX_AGE /
+    PUBLIC_CACHE_STALE (secondes). Requêtes authentifiées : `private, no-cache`
+    (revalidation à chaque fois, jamais stockées par le CDN).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.max_age = getattr(settings, "PUBLIC_CACHE_MAX_AGE", 60)
+        self.stale = getattr(settings, "PUBLIC_CACHE_STALE", 300)
+
+    def __call__(self, request):
+        if request.method not in ("GET", "HEAD"):
+            return self.get_response(request)
+        keys = _keys_for(request.path_info)
+        if keys is None:
+            return self.get_response(request)
+
+        try:
+            stamps, last_modified = get_stamps_with_dates(keys)
+            etag = _etag(request, stamps)
+        except Exception:
+            # table absente (migrations) ou base indisponible : réponse normale
+            return self.get_response(request)
+
+        if _not_modified(request, etag, last_modified):
+            response = HttpResponseNotModified()
+        else:
+            response = self.get_response(request)
+            if response.status_code != 200 or response.has_header("ETag"):
+                return response
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified.timestamp())
+        self._cache_headers(request, response)
+        return response
+
+    def _cache_headers(self, request, response):
+        patch_vary_headers(response, ("Accept",))
+        private = "HTTP_AUTHORIZATION" in request.META or settings.SESSION_COOKIE_NAME in request.COOKIES
+        if private:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(
+                response, public=True, max_age=self.max_age,
+                stale_while_revalidate=self.stale,
+            )
+
+
+class FlightStateMiddleware:
+    """
+    `X-Cache-Stale: 1` quand la vue a servi la valeur précédente d'un
+    SingleFlight pendant qu'un autre worker la recalcule (stats.stamps.mark_flight_state).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if getattr(request, "flight_stale", False):
+            response["X-Cache-Stale"] = "1"
+        return response
+
+
+# =========================
+# Métriques de requêtes
+# =========================
+class MetricsMiddleware:
+    """
+    Durée, nombre de requêtes SQL, temps SQL et taille de réponse par route
+    (nom de vue) -> stats.metrics. À placer en tête de MIDDLEWARE pour
+    compter aussi les 304 et redirections. Réponses en flux : durée jusqu'au
+    premier octet, taille non comptée.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not metrics.enabled():
+            return self.get_response(request)
+
+        sql = {"queries": 0, "seconds": 0.0}
+
+        def timed(execute, sql_text, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql_text, params, many, context)
+            finally:
+                sql["queries"] += 1
+                sql["seconds"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in settings.DATABASES:
+                stack.enter_context(connections[alias].execute_wrapper(timed))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        route = (match.view_name or match.route) if match else "unmatched"
+        size = None if getattr(response, "streaming", False) else len(response.content)
+        metrics.recorder.observe_request(
+            route, request.method, response.status_code, elapsed,
+            sql["queries"], sql["seconds"], size,
+        )
+        return response
@@ -0,0 +1,139 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:55
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+COUNTERS = ("goals", "own_goals", "assists", "yellows", "reds")
+OWN_GOAL_TYPES = {"OG", "CSC", "OWN_GOAL", "OWNGOAL"}
+
+
+def _state(status):
+    s = (status or "").upper()
+    if s in ("FT", "FINISHED"):
+        return "final"
+    if s in ("LIVE", "HT", "PAUSED"):
+        return "live"
+    return "other"
+
+
+def _assist_resolver(PlayerAlias, pairs):
+    """Passes en texte libre -> joueur, comme AliasResolver (nom unique dans le club)."""
+    from players.aliases import normalize_name  # texte pur
+
+    index = defaultdict(lambda: {"strong": set(), "short": set()})
+    names = {normalize_name(n) for _, n in pairs} - {""}
+    if names:
+        for club_id, normalized, kind, player_id in PlayerAlias.objects.filter(
+            club_id__in={cid for cid, _ in pairs}, normalized__in=names,
+        ).values_list("club_id", "normalized", "kind", "player_id"):
+            index[(club_id, normalized)]["short" if kind == "short" else "strong"].add(player_id)
+
+    def resolve(club_id, name):
+        entry = index.get((club_id, normalize_name(name)))
+        for tier in ("strong", "short") if entry else ():
+            if entry[tier]:
+                return next(iter(entry[tier])) if len(entry[tier]) == 1 else None
+        return None
+
+    return resolve
+
+
+def fill_player_stats(apps, schema_editor):
+    """Calcule les stats joueurs à partir des buts et cartons existants (modèles historiques)."""
+    Match = apps.get_model("matches", "Match")
+    Goal = apps.get_model("matches", "Goal")
+    Card = apps.get_model("matches", "Card")
+    PlayerAlias = apps.get_model("players", "PlayerAlias")
+    PlayerMatchStat = apps.get_model("stats", "PlayerMatchStat")
+    PlayerStat = apps.get_model("stats", "PlayerStat")
+
+    states = {mid: _state(st) for mid, st in Match.objects.values_list("id", "status")}
+    goals = list(Goal.objects.values_list(
+        "match_id", "player_id", "club_id", "assist_player_id", "assist_name", "type"
+    ))
+    resolve = _assist_resolver(PlayerAlias, [
+        (cid, aname) for _, _, cid, aid, aname, _ in goals if not aid and (aname or "").strip()
+    ])
+
+    rows = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))  # (match, joueur, club) -> compteurs
+    for mid, pid, cid, aid, aname, gtype in goals:
+        if pid:
+            rows[(mid, pid, cid)]["own_goals" if (gtype or "").upper() in OWN_GOAL_TYPES else "goals"] += 1
+        if not aid and (aname or "").strip():
+            aid = resolve(cid, aname)
+        if aid and aid != pid:
+            rows[(mid, aid, cid)]["assists"] += 1
+    for mid, pid, cid, ctype in Card.objects.values_list("match_id", "player_id", "club_id", "type"):
+        if pid:
+            rows[(mid, pid, cid)]["reds" if (ctype or "").upper().startswith("R") else "yellows"] += 1
+
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    ledger = []
+    for (mid, pid, cid), counters in rows.items():
+        if mid not in states:
+            continue
+        ledger.append(PlayerMatchStat(match_id=mid, player_id=pid, club_id=cid, state=states[mid], **counters))
+        for k, v in counters.items():
+            totals[(pid, cid, states[mid])][k] += v
+    PlayerMatchStat.objects.bulk_create(ledger, batch_size=1000)
+    PlayerStat.objects.bulk_create([
+        PlayerStat(player_id=pid, club_id=cid, state=state, **counters)
+        for (pid, cid, state), counters in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clubs', '0003_alter_club_logo_alter_staffmember_photo'),
+        ('players', '0004_playeralias'),
+        ('matches', '0016_roundstandingsnapshot'),
+        ('stats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerMatchStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_id', models.BigIntegerField(db_index=True)),
+                ('state', models.CharField(choices=[('final', 'Matchs terminés'), ('live', 'Matchs en direct'), ('other', 'Autres (programmés, reportés...)')], max_length=8)),
+                ('goals', models.IntegerField(default=0)),
+                ('own_goals', models.IntegerField(default=0)),
+                ('assists', models.IntegerField(default=0)),
+                ('yellows', models.IntegerField(default=0)),
+                ('reds', models.IntegerField(default=0)),
+                ('club', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='clubs.club')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_stats', to='players.player')),
+            ],
+            options={
+                'verbose_name': 'Stat joueur par match',
+                'verbose_name_plural': 'Stats joueurs par match',
+                'constraints': [models.UniqueConstraint(fields=('match_id', 'player', 'club'), name='uniq_player_match_stat')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlayerStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(choices=[('final', 'Matchs terminés'), ('live', 'Matchs en direct'), ('other', 'Autres (programmés, reportés...)')], max_length=8)),
+                ('goals', models.IntegerField(default=0)),
+                ('own_goals', models.IntegerField(default=0)),
+                ('assists', models.IntegerField(default=0)),
+                ('yellows', models.IntegerField(default=0)),
+                ('reds', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('club', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_stats', to='clubs.club')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='players.player')),
+            ],
+            options={
+                'verbose_name': 'Stat joueur',
+                'verbose_name_plural': 'Stats joueurs (matérialisées)',
+                'indexes': [models.Index(fields=['state', 'goals'], name='stats_playe_state_c87f13_idx'), models.Index(fields=['state', 'assists'], name='stats_playe_state_12673c_idx'), models.Index(fields=['club', 'state'], name='stats_playe_club_id_8cc3fe_idx')],
+                'constraints': [models.UniqueConstraint(fields=('player', 'club', 'state'), name='uniq_player_stat')],
+            },
+        ),
+        migrations.RunPython(fill_player_stats, migrations.RunPython.noop),
+    ]
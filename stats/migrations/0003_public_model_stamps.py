@@ -0,0 +1,34 @@
+from django.db import migrations
+from django.utils import timezone
+
+PUBLIC_MODEL_KEYS = (
+    "model:clubs.club",
+    "model:clubs.staffmember",
+    "model:players.player",
+    "model:news.newsitem",
+    "model:matches.round",
+    "model:competitions.competition",
+    "model:competitions.competitionteam",
+)
+
+
+def create_stamps(apps, schema_editor):
+    """Une ligne par modèle public dès le départ : Last-Modified toujours disponible."""
+    ChangeStamp = apps.get_model("stats", "ChangeStamp")
+    existing = set(ChangeStamp.objects.filter(key__in=PUBLIC_MODEL_KEYS).values_list("key", flat=True))
+    now = timezone.now()
+    ChangeStamp.objects.bulk_create([
+        ChangeStamp(key=key, version=1, updated_at=now)
+        for key in PUBLIC_MODEL_KEYS if key not in existing
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0002_player_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_stamps, migrations.RunPython.noop),
+    ]
@@ -1 +1,92 @@
 from django.db import models
+
+
+class ChangeStamp(models.Model):
+    """
+    Compteur de version par « famille » de ressources (matches, events,
+    standings, clubs, competition:<id>, model:<app>.<modèle>...). Incrémenté
+    à chaque écriture, lu par les vues publiques (et ChangeStampMiddleware)
+    pour répondre 304 sans construire de queryset ; updated_at sert de
+    Last-Modified. Voir stats/stamps.py.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Version de données"
+        verbose_name_plural = "Versions de données"
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+
+# =========================
+# Stats joueurs agrégées
+# =========================
+STAT_STATES = [
+    ("final", "Matchs terminés"),
+    ("live", "Matchs en direct"),
+    ("other", "Autres (programmés, reportés...)"),
+]
+STAT_COUNTERS = ("goals", "own_goals", "assists", "yellows", "reds")
+
+
+class PlayerMatchStat(models.Model):
+    """
+    Contribution d'un joueur (pour un club) à UN match : registre tenu par
+    stats/player_stats.py. Sert à calculer les deltas quand un match change.
+    `match_id` n'est pas une FK : la ligne doit survivre à la suppression du
+    match le temps d'être retirée de PlayerStat.
+    """
+    match_id = models.BigIntegerField(db_index=True)
+    player = models.ForeignKey("players.Player", on_delete=models.CASCADE, related_name="match_stats")
+    club = models.ForeignKey("clubs.Club", on_delete=models.CASCADE, related_name="+")
+    state = models.CharField(max_length=8, choices=STAT_STATES)
+    goals = models.IntegerField(default=0)
+    own_goals = models.IntegerField(default=0)
+    assists = models.IntegerField(default=0)
+    yellows = models.IntegerField(default=0)
+    reds = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Stat joueur par match"
+        verbose_name_plural = "Stats joueurs par match"
+        constraints = [
+            models.UniqueConstraint(fields=["match_id", "player", "club"], name="uniq_player_match_stat"),
+        ]
+
+    def __str__(self):
+        return f"#{self.match_id} • {self.player} • {self.goals} but(s)"
+
+
+class PlayerStat(models.Model):
+    """
+    Totaux par (joueur, club de l'événement, état du match) : lus par les
+    classements buteurs / passeurs / totaux joueurs / stats club.
+    Reconstruction / vérification : `manage.py rebuild_player_stats [--verify]`.
+    """
+    player = models.ForeignKey("players.Player", on_delete=models.CASCADE, related_name="stats")
+    club = models.ForeignKey("clubs.Club", on_delete=models.CASCADE, related_name="player_stats")
+    state = models.CharField(max_length=8, choices=STAT_STATES)
+    goals = models.IntegerField(default=0)
+    own_goals = models.IntegerField(default=0)
+    assists = models.IntegerField(default=0)
+    yellows = models.IntegerField(default=0)
+    reds = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Stat joueur"
+        verbose_name_plural = "Stats joueurs (matérialisées)"
+        constraints = [
+            models.UniqueConstraint(fields=["player", "club", "state"], name="uniq_player_stat"),
+        ]
+        indexes = [
+            models.Index(fields=["state", "goals"]),
+            models.Index(fields=["state", "assists"]),
+            models.Index(fields=["club", "state"]),
+        ]
+
+    def __str__(self):
+        return f"{self.player} • {self.club} • {self.state}"
@@ -0,0 +1,268 @@
+# stats/player_stats.py
+"""
+Stats joueurs matérialisées (buts, CSC, passes, cartons).
+
+- PlayerMatchStat : contribution de chaque joueur à chaque match (registre).
+- PlayerStat      : totaux par (joueur, club de l'événement, état du match).
+
+Chaque `match_changed` (but / carton / match modifié, y compris après un
+bulk_create suivi de notify_match_changed) relit les événements de CE match,
+compare au registre et applique la différence aux totaux. Un match qui passe
+de LIVE à FT déplace simplement ses lignes de l'état "live" vers "final".
+
+Les classements (buteurs, passeurs, totaux joueurs, stats club) deviennent
+des lectures indexées de PlayerStat, sans jointure sur Goal/Card.
+
+⚠️ QuerySet.update() sur Goal/Card/Match sans notify_match_changed :
+lancer ensuite `manage.py rebuild_player_stats`.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.dispatch import receiver
+
+from matches.models import Match, Goal, Card
+from matches.signals import match_changed
+from players.aliases import AliasResolver
+from .models import PlayerMatchStat, PlayerStat, STAT_COUNTERS
+
+FINAL, LIVE, OTHER = "final", "live", "other"
+FINISHED_STATUSES = ("FT", "FINISHED")
+LIVE_STATUSES = ("LIVE", "HT", "PAUSED")
+OWN_GOAL_TYPES = {"OG", "CSC", "OWN_GOAL", "OWNGOAL"}
+
+
+def state_for(status):
+    s = (status or "").upper()
+    if s in FINISHED_STATUSES:
+        return FINAL
+    if s in LIVE_STATUSES:
+        return LIVE
+    return OTHER
+
+
+def states(include_live=False, include_other=False):
+    out = [FINAL]
+    if include_live:
+        out.append(LIVE)
+    if include_other:
+        out.append(OTHER)
+    return out
+
+
+def _empty():
+    return dict.fromkeys(STAT_COUNTERS, 0)
+
+
+# =========================
+# Calcul depuis Goal / Card
+# =========================
+def compute_match_rows(match_states):
+    """
+    match_states : {match_id: état} (None = tous les matchs, état lu en base).
+    Renvoie {match_id: {(player_id, club_id): {compteur: valeur}}}.
+    """
+    goals = Goal.objects.all()
+    cards = Card.objects.all()
+    if match_states is None:
+        match_states = {
+            mid: state_for(st) for mid, st in Match.objects.values_list("id", "status")
+        }
+    else:
+        goals = goals.filter(match_id__in=list(match_states))
+        cards = cards.filter(match_id__in=list(match_states))
+
+    goal_rows = list(goals.values_list(
+        "match_id", "player_id", "club_id", "assist_player_id", "assist_name", "type"
+    ))
+    # passes en texte libre : résolues via l'index d'alias (1 requête)
+    free = [(cid, aname) for _, _, cid, aid, aname, _ in goal_rows if not aid and (aname or "").strip()]
+    resolver = AliasResolver({cid for cid, _ in free}, names=[n for _, n in free]) if free else None
+
+    out = defaultdict(lambda: defaultdict(_empty))
+    for mid, pid, cid, aid, aname, gtype in goal_rows:
+        if pid:
+            key = "own_goals" if (gtype or "").upper() in OWN_GOAL_TYPES else "goals"
+            out[mid][(pid, cid)][key] += 1
+        if not aid and resolver and (aname or "").strip():
+            aid = resolver.resolve(cid, aname)
+        # pas de passe créditée au buteur lui-même
+        if aid and aid != pid:
+            out[mid][(aid, cid)]["assists"] += 1
+
+    for mid, pid, cid, ctype in cards.values_list("match_id", "player_id", "club_id", "type"):
+        if pid:
+            key = "reds" if (ctype or "").upper().startswith("R") else "yellows"
+            out[mid][(pid, cid)][key] += 1
+
+    return {
+        mid: dict(rows) for mid, rows in out.items() if mid in match_states
+    }, match_states
+
+
+# =========================
+# Écriture par deltas
+# =========================
+def _apply_totals(delta):
+    """delta : {(player_id, club_id, état): {compteur: +/-n}} appliqué à PlayerStat."""
+    delta = {k: d for k, d in delta.items() if any(d.values())}
+    if not delta:
+        return
+    existing = set(
+        PlayerStat.objects.filter(
+            player_id__in={k[0] for k in delta}, club_id__in={k[1] for k in delta}
+        ).values_list("player_id", "club_id", "state")
+    )
+    missing = []
+    for (pid, cid, state), d in delta.items():
+        if (pid, cid, state) in existing:
+            PlayerStat.objects.filter(player_id=pid, club_id=cid, state=state).update(
+                **{k: F(k) + v for k, v in d.items() if v}
+            )
+        else:
+            missing.append(PlayerStat(player_id=pid, club_id=cid, state=state, **d))
+    if missing:
+        PlayerStat.objects.bulk_create(missing)
+
+
+def refresh_match_stats(match_id, events_changed=True):
+    """
+    Aligne le registre et les totaux sur les événements actuels du match.
+    events_changed=False (seul le match a changé) : ne relit buts / cartons
+    que si l'état du match (final / live / autre) a changé.
+    """
+    with transaction.atomic():
+        # verrou sur le match : deux rafraîchissements concurrents ne s'additionnent pas
+        status = (
+            Match.objects.select_for_update()
+            .filter(pk=match_id).values_list("status", flat=True).first()
+        )
+        stored = list(
+            PlayerMatchStat.objects.filter(match_id=match_id)
+            .values("player_id", "club_id", "state", *STAT_COUNTERS)
+        )
+        exists = status is not None
+        new_state = state_for(status) if exists else None
+
+        if exists and not events_changed and all(r["state"] == new_state for r in stored):
+            return
+
+        target = {}
+        if exists:
+            computed, _ = compute_match_rows({match_id: new_state})
+            target = computed.get(match_id, {})
+
+        old = {(r["player_id"], r["club_id"], r["state"]): {k: r[k] for k in STAT_COUNTERS} for r in stored}
+        new = {(pid, cid, new_state): counters for (pid, cid), counters in target.items()}
+        if old == new:
+            return
+
+        delta = defaultdict(_empty)
+        for key, counters in old.items():
+            for k, v in counters.items():
+                delta[key][k] -= v
+        for key, counters in new.items():
+            for k, v in counters.items():
+                delta[key][k] += v
+        _apply_totals(delta)
+
+        PlayerMatchStat.objects.filter(match_id=match_id).delete()
+        PlayerMatchStat.objects.bulk_create([
+            PlayerMatchStat(match_id=match_id, player_id=pid, club_id=cid, state=state, **counters)
+            for (pid, cid, state), counters in new.items()
+        ])
+
+
+@receiver(match_changed)
+def _on_match_changed(sender, match_id, **kwargs):
+    if sender is Match:
+        refresh_match_stats(match_id, events_changed=False)
+    elif sender in (Goal, Card):
+        refresh_match_stats(match_id)
+
+
+# =========================
+# Lecture
+# =========================
+def player_totals(state_list, club_id=None, player_ids=None):
+    """{player_id: {compteur: total}} sommé sur les états (et clubs) demandés. 1 requête."""
+    qs = PlayerStat.objects.filter(state__in=state_list)
+    if club_id is not None:
+        qs = qs.filter(club_id=club_id)
+    if player_ids is not None:
+        qs = qs.filter(player_id__in=list(player_ids))
+    return {
+        r.pop("player_id"): r
+        for r in qs.values("player_id").annotate(**{k: Sum(k) for k in STAT_COUNTERS})
+    }
+
+
+def leaders(counter, state_list, club_id=None, limit=50):
+    """
+    [(player_id, total)] triés par total décroissant (puis id). 1 requête.
+    counter : un compteur, ou un tuple de compteurs additionnés ("goals", "own_goals").
+    """
+    names = (counter,) if isinstance(counter, str) else tuple(counter)
+    nonzero = Q()
+    for name in names:
+        nonzero |= Q(**{f"{name}__gt": 0})
+    qs = PlayerStat.objects.filter(nonzero, state__in=state_list)
+    if club_id is not None:
+        qs = qs.filter(club_id=club_id)
+    qs = (
+        qs.values("player_id")
+        .annotate(total=Sum(sum((F(n) for n in names[1:]), F(names[0]))))
+        .order_by("-total", "player_id")
+    )
+    if limit and limit > 0:
+        qs = qs[:limit]
+    return [(r["player_id"], r["total"]) for r in qs]
+
+
+# =========================
+# Reconstruction / vérification
+# =========================
+def _expected_totals():
+    computed, match_states = compute_match_rows(None)
+    totals = defaultdict(_empty)
+    for mid, rows in computed.items():
+        for (pid, cid), counters in rows.items():
+            for k, v in counters.items():
+                totals[(pid, cid, match_states[mid])][k] += v
+    return computed, match_states, totals
+
+
+def rebuild_player_stats():
+    """Réécrit le registre et les totaux depuis zéro. Renvoie le nombre de lignes de totaux."""
+    computed, match_states, totals = _expected_totals()
+    with transaction.atomic():
+        PlayerMatchStat.objects.all().delete()
+        PlayerStat.objects.all().delete()
+        PlayerMatchStat.objects.bulk_create([
+            PlayerMatchStat(match_id=mid, player_id=pid, club_id=cid, state=match_states[mid], **counters)
+            for mid, rows in computed.items()
+            for (pid, cid), counters in rows.items()
+        ], batch_size=1000)
+        PlayerStat.objects.bulk_create([
+            PlayerStat(player_id=pid, club_id=cid, state=state, **counters)
+            for (pid, cid, state), counters in totals.items()
+        ], batch_size=1000)
+    return len(totals)
+
+
+def verify_player_stats():
+    """Liste des écarts [((player_id, club_id, état), compteur, stocké, attendu)] (vide = OK)."""
+    _, _, expected = _expected_totals()
+    stored = {
+        (r["player_id"], r["club_id"], r["state"]): r
+        for r in PlayerStat.objects.values("player_id", "club_id", "state", *STAT_COUNTERS)
+    }
+    diffs = []
+    for key in set(expected) | set(stored):
+        have = stored.get(key) or _empty()
+        want = expected.get(key) or _empty()
+        for k in STAT_COUNTERS:
+            if have[k] != want[k]:
+                diffs.append((key, k, have[k], want[k]))
+    return sorted(diffs)
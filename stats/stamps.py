@@ -0,0 +1,220 @@
+# stats/stamps.py
+"""
+Versions de données par famille de ressources + GET conditionnel (ETag / 304).
+
+Familles :
+  - "matches"          : lignes Match (score, statut, horaires...)
+  - "events"           : buts, cartons, compositions, infos d'équipe
+  - "standings"        : tout ce qui change le classement du championnat
+  - "clubs"            : noms / logos des clubs (présents dans les payloads)
+  - "competition:<id>" : matchs, équipes, pénalités d'une compétition
+  - "model:<app>.<modèle>" : une famille par modèle public (PUBLIC_MODELS),
+                         lue par stats.middleware.ChangeStampMiddleware
+
+Chaque écriture incrémente la (les) famille(s) concernée(s) via les signaux
+ci-dessous. Les vues décorées par `conditional_view(...)` lisent ces versions
+(1 requête sur une petite table), calculent l'ETag et répondent 304 si le
+client l'a déjà — AVANT de construire le moindre queryset.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.http import HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+
+from clubs.models import Club, StaffMember
+from competitions.models import Competition, CompetitionTeam, CompetitionMatch, CompetitionPenalty
+from matches.models import Match, Round
+from matches.signals import match_changed
+from news.models import NewsItem
+from players.models import Player
+from .models import ChangeStamp
+
+MATCHES = "matches"
+EVENTS = "events"
+STANDINGS = "standings"
+CLUBS = "clubs"
+
+
+def competition_key(competition_id):
+    return f"competition:{competition_id}"
+
+
+def model_key(model):
+    """Famille d'un modèle public : "model:clubs.club"."""
+    return f"model:{model._meta.label_lower}"
+
+
+# modèles lus par les API publiques peu changeantes (une version chacun)
+PUBLIC_MODELS = (Club, StaffMember, Player, NewsItem, Round, Competition, CompetitionTeam)
+
+
+# =========================
+# Lecture / écriture
+# =========================
+def bump(*keys):
+    """Incrémente les familles données (crée la ligne au premier passage)."""
+    keys = [k for k in dict.fromkeys(keys) if k]
+    if not keys:
+        return
+    updated = ChangeStamp.objects.filter(key__in=keys).update(
+        version=F("version") + 1, updated_at=timezone.now()
+    )
+    if updated < len(keys):
+        existing = set(ChangeStamp.objects.filter(key__in=keys).values_list("key", flat=True))
+        for key in keys:
+            if key in existing:
+                continue
+            obj, created = ChangeStamp.objects.get_or_create(key=key, defaults={"version": 1})
+            if not created:
+                # créée entre-temps par une autre écriture
+                ChangeStamp.objects.filter(pk=obj.pk).update(version=F("version") + 1)
+
+
+def get_stamps(keys):
+    """{clé: version} en une requête (0 si la famille n'a jamais été écrite)."""
+    keys = list(dict.fromkeys(keys))
+    found = dict(ChangeStamp.objects.filter(key__in=keys).values_list("key", "version"))
+    return {k: found.get(k, 0) for k in keys}
+
+
+def get_stamps_with_dates(keys):
+    """({clé: version}, date de la dernière écriture | None) en une requête."""
+    keys = list(dict.fromkeys(keys))
+    found = {
+        key: (version, updated_at)
+        for key, version, updated_at in ChangeStamp.objects.filter(key__in=keys)
+        .values_list("key", "version", "updated_at")
+    }
+    dates = [d for _, d in found.values() if d]
+    return {k: found.get(k, (0, None))[0] for k in keys}, (max(dates) if dates else None)
+
+
+# =========================
+# Signaux -> versions
+# =========================
+@receiver(match_changed)
+def _bump_on_match_changed(sender, match_id, **kwargs):
+    if sender is Match:
+        bump(MATCHES, STANDINGS)
+    else:
+        bump(EVENTS)
+
+
+@receiver([post_save, post_delete], sender=Club)
+def _bump_on_club(sender, instance, **kwargs):
+    bump(CLUBS)
+
+
+@receiver([post_save, post_delete], sender=Round)
+def _bump_on_round(sender, instance, **kwargs):
+    # numéros de journée : classements par journée
+    bump(STANDINGS)
+
+
+@receiver([post_save, post_delete], sender=Competition)
+def _bump_on_competition(sender, instance, **kwargs):
+    bump(competition_key(instance.pk))
+
+
+def _bump_on_public_model(sender, instance, **kwargs):
+    bump(model_key(sender))
+
+
+for _model in PUBLIC_MODELS:
+    post_save.connect(_bump_on_public_model, sender=_model, dispatch_uid=f"stamp-{model_key(_model)}")
+    post_delete.connect(_bump_on_public_model, sender=_model, dispatch_uid=f"stamp-del-{model_key(_model)}")
+
+
+@receiver([post_save, post_delete], sender=CompetitionTeam)
+@receiver([post_save, post_delete], sender=CompetitionMatch)
+@receiver([post_save, post_delete], sender=CompetitionPenalty)
+def _bump_on_competition_child(sender, instance, **kwargs):
+    bump(competition_key(instance.competition_id))
+
+
+# =========================
+# GET conditionnel
+# =========================
+def _compute_etag(request, stamps, extra=None):
+    parts = [
+        request.get_host(),
+        request.get_full_path(),
+        request.META.get("HTTP_ACCEPT", ""),  # JSON vs API navigable
+    ]
+    parts += [f"{k}={v}" for k, v in sorted(stamps.items())]
+    if extra is not None:
+        parts.append(str(extra(request, stamps)))
+    digest = hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
+    return quote_etag(digest)
+
+
+def conditional_view(*families, extra=None):
+    """
+    Décorateur de vue (fonction, ou méthode via method_decorator).
+
+    families : clés fixes, ou callables(request, *args, **kwargs) -> clé
+               (ex. lambda r, competition_id: competition_key(competition_id))
+    extra    : callable(request, stamps) -> str, mélangé à l'ETag pour ce qui
+               évolue sans écriture (ex. la minute des matchs en direct)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            try:
+                keys = [f(request, *args, **kwargs) if callable(f) else f for f in families]
+                stamps = get_stamps(keys)
+                etag = _compute_etag(request, stamps, extra)
+                # réutilisables par la vue (ex. clé de cache par version)
+                request.change_stamps = stamps
+            except Exception:
+                # table absente (migrations) ou base indisponible : pas de 304
+                return view(request, *args, **kwargs)
+
+            client_etags = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+            if etag in client_etags or "*" in client_etags:
+                resp = HttpResponseNotModified()
+                resp["ETag"] = etag
+                return resp
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.has_header("ETag"):
+                response["ETag"] = etag
+            return response
+        return wrapped
+    return decorator
+
+
+def mark_flight_state(request, state):
+    """
+    Note l'état SingleFlight sur la requête Django : une valeur périmée
+    servie pendant un recalcul ailleurs ("stale") ajoute `X-Cache-Stale: 1`
+    à la réponse (FlightStateMiddleware).
+    """
+    if request is not None and state == "stale":
+        getattr(request, "_request", request).flight_stale = True
+
+
+def flight_value(flight, request, build, stamps=None, extra=()):
+    """
+    Valeur d'une vue via un SingleFlight (profootgn.cache), clé = hôte + URL
+    complète (+ extra), version = versions des familles (request.change_stamps
+    posé par conditional_view, ou `stamps`). Sans versions : build() direct.
+    Valeur périmée servie : réponse marquée (cf. mark_flight_state).
+    """
+    stamps = stamps if stamps is not None else getattr(request, "change_stamps", None)
+    if stamps is None:
+        return build()
+    where = hashlib.md5(
+        f"{request.get_host()}|{request.get_full_path()}".encode("utf-8")
+    ).hexdigest()
+    value, state = flight.get([where, *extra], tuple(sorted(stamps.items())), build)
+    mark_flight_state(request, state)
+    return value
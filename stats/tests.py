@@ -0,0 +1,221 @@
+import os
+import re
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from clubs.models import Club
+from matches.models import Match, Goal, Card
+from matches.signals import notify_match_changed
+from players.models import Player
+from profootgn.cache import clear_all
+from . import metrics
+from .models import PlayerMatchStat, PlayerStat, STAT_COUNTERS
+from .player_stats import FINAL, LIVE, leaders, rebuild_player_stats, verify_player_stats
+
+
+class PlayerStatsDeltaTests(TestCase):
+    """Les totaux tenus par deltas doivent toujours égaler une reconstruction complète."""
+
+    def setUp(self):
+        self.home = Club.objects.create(name="Home")
+        self.away = Club.objects.create(name="Away")
+        self.cisse = Player.objects.create(first_name="Gaoussou", last_name="Cissé", club=self.home)
+        self.bah = Player.objects.create(first_name="Mamadou", last_name="Bah", club=self.home)
+        self.sylla = Player.objects.create(first_name="Ibrahima", last_name="Sylla", club=self.away)
+        self.match = Match.objects.create(
+            datetime=timezone.now(), home_club=self.home, away_club=self.away, status="LIVE",
+        )
+
+    def _state(self):
+        ledger = sorted(PlayerMatchStat.objects.values_list("match_id", "player_id", "club_id", "state", *STAT_COUNTERS))
+        # une ligne de totaux remise à zéro par delta reste en base ; la reconstruction ne l'écrit pas
+        totals = sorted(
+            PlayerStat.objects.exclude(**{k: 0 for k in STAT_COUNTERS})
+            .values_list("player_id", "club_id", "state", *STAT_COUNTERS)
+        )
+        return ledger, totals
+
+    def assertMatchesRebuild(self):
+        self.assertEqual(verify_player_stats(), [])
+        incremental = self._state()
+        rebuild_player_stats()
+        self.assertEqual(incremental, self._state())
+
+    def test_events_and_status_changes(self):
+        m = self.match
+        g1 = Goal.objects.create(match=m, club=self.home, player=self.cisse, assist_player=self.bah, minute=10)
+        # passe en texte libre, résolue par alias
+        Goal.objects.create(match=m, club=self.home, player=self.bah, assist_name="Cisse", minute=40)
+        Goal.objects.create(match=m, club=self.away, player=self.sylla, type="OG", minute=55)
+        Card.objects.create(match=m, club=self.away, player=self.sylla, minute=60, type="R")
+        self.assertMatchesRebuild()
+        self.assertEqual(leaders("assists", [LIVE]), [(self.cisse.id, 1), (self.bah.id, 1)])
+        self.assertEqual(leaders("goals", [FINAL]), [])
+
+        # fin du match : les lignes passent de "live" à "final"
+        m.status = "FT"
+        m.save()
+        self.assertMatchesRebuild()
+        self.assertEqual(leaders("goals", [FINAL]), [(self.cisse.id, 1), (self.bah.id, 1)])
+        self.assertEqual(leaders("goals", [LIVE]), [])
+
+        # but corrigé puis supprimé
+        g1.player = self.bah
+        g1.save()
+        self.assertMatchesRebuild()
+        self.assertEqual(leaders("goals", [FINAL]), [(self.bah.id, 2)])
+        g1.delete()
+        self.assertMatchesRebuild()
+
+        # écriture en lot : pas de post_save, notification à la main
+        Card.objects.bulk_create([Card(match=m, club=self.home, player=self.cisse, minute=80, type="Y")])
+        notify_match_changed(m.id, sender=Card)
+        self.assertMatchesRebuild()
+        self.assertEqual(leaders("yellows", [FINAL]), [(self.cisse.id, 1)])
+
+        m.delete()
+        self.assertMatchesRebuild()
+        self.assertFalse(PlayerStat.objects.exclude(**{k: 0 for k in STAT_COUNTERS}).exists())
+
+
+class TopScorersTests(TestCase):
+    def setUp(self):
+        clear_all()
+        self.home = Club.objects.create(name="Home")
+        self.away = Club.objects.create(name="Away")
+        self.cisse = Player.objects.create(first_name="Gaoussou", last_name="Cissé", club=self.home)
+        self.sylla = Player.objects.create(first_name="Ibrahima", last_name="Sylla", club=self.away)
+        match = Match.objects.create(
+            datetime=timezone.now(), home_club=self.home, away_club=self.away, status="FT",
+        )
+        Goal.objects.create(match=match, club=self.home, player=self.cisse, minute=10)
+        Goal.objects.create(match=match, club=self.away, player=self.sylla, type="OG", minute=20)
+        Goal.objects.create(match=match, club=self.away, player=self.sylla, type="OG", minute=30)
+
+    def test_own_goals_count_for_their_scorer(self):
+        rows = APIClient().get("/api/stats/topscorers/").json()
+        self.assertEqual([(r["player"]["id"], r["goals"]) for r in rows], [(self.sylla.id, 2), (self.cisse.id, 1)])
+
+
+class ConditionalGetTests(TestCase):
+    """ETag tiré des versions (stats.stamps) : 304 avant tout queryset, nouvel ETag après une écriture."""
+
+    def setUp(self):
+        clear_all()
+        self.home = Club.objects.create(name="Home")
+        self.away = Club.objects.create(name="Away")
+        self.match = Match.objects.create(
+            datetime=timezone.now(), home_club=self.home, away_club=self.away, status="SCHEDULED",
+        )
+        self.client = APIClient()
+
+    def _get(self, url, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, **headers)
+        return resp, len(ctx.captured_queries)
+
+    def test_not_modified_until_a_write(self):
+        for url in ("/api/stats/standings/", "/api/matches/live-lite/"):
+            first, _ = self._get(url)
+            self.assertEqual(first.status_code, 200, url)
+            etag = first["ETag"]
+
+            again, queries = self._get(url, etag)
+            self.assertEqual(again.status_code, 304, url)
+            self.assertEqual(again["ETag"], etag)
+            self.assertEqual(queries, 1, url)  # lecture des versions seulement
+
+            self.match.status, self.match.home_score = "FT", self.match.home_score + 1
+            self.match.save()
+            changed, _ = self._get(url, etag)
+            self.assertEqual(changed.status_code, 200, url)
+            self.assertNotEqual(changed["ETag"], etag)
+
+
+class ChangeStampMiddlewareTests(TestCase):
+    """Routes publiques : validateurs et Cache-Control tirés des versions de modèles."""
+
+    def setUp(self):
+        clear_all()
+        self.club = Club.objects.create(name="Horoya")
+        self.client = APIClient()
+
+    def test_public_list_revalidated_from_stamps(self):
+        first = self.client.get("/api/clubs/")
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("public", first["Cache-Control"])
+        self.assertTrue(first.has_header("Last-Modified"))
+
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.client.get("/api/clubs/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn("clubs_club", ctx.captured_queries[0]["sql"])  # versions seulement
+        since = self.client.get("/api/clubs/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(since.status_code, 304)
+
+        self.club.name = "Horoya AC"
+        self.club.save()
+        changed = self.client.get("/api/clubs/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+        # requête authentifiée : jamais en cache partagé
+        self.client.force_login(get_user_model().objects.create_user("editeur", password="x"))
+        private = self.client.get("/api/clubs/")
+        self.assertEqual(private.status_code, 200)
+        self.assertIn("private", private["Cache-Control"])
+        self.assertIn("no-cache", private["Cache-Control"])
+
+
+class MetricsTests(TestCase):
+    """MetricsMiddleware -> stats.metrics -> /api/metrics/ (staff uniquement)."""
+
+    def setUp(self):
+        # deltas laissés par les autres tests : vers le fichier par défaut, pas celui du test
+        metrics.recorder.maybe_flush(force=True)
+        fd, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        self.enterContext(override_settings(METRICS_DB=path, METRICS_ENABLED=True))
+        self.client = APIClient()
+
+    def test_staff_only_exposition(self):
+        self.assertIn(self.client.get("/api/metrics/").status_code, (401, 403))
+        user = get_user_model().objects.create_user("lecteur", password="x")
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+
+        Club.objects.create(name="Horoya")
+        self.client.get("/api/clubs/")
+        user.is_staff = True
+        self.client.force_authenticate(user)
+        resp = self.client.get("/api/metrics/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp["Content-Type"].startswith("text/plain; version=0.0.4"))
+
+        body = resp.content.decode()
+        series = {}
+        for line in body.splitlines():
+            if line and not line.startswith("#"):
+                name, value = line.rsplit(" ", 1)
+                series[name] = float(value)
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        clubs = [n for n in series if n.startswith("http_requests_total{") and 'status="200"' in n and "club" in n]
+        self.assertEqual(len(clubs), 1, clubs)
+        route = re.search(r'route="([^"]+)"', clubs[0]).group(1)
+        base = f'method="GET",route="{route}"'
+        self.assertEqual(series[clubs[0]], 1)
+        self.assertEqual(series[f'http_request_duration_seconds_bucket{{{base},le="+Inf"}}'], 1)
+        self.assertGreater(series[f"http_request_db_queries_total{{{base}}}"], 0)
+        self.assertGreater(series[f"http_response_size_bytes_total{{{base}}}"], 0)
+        # refus 401/403 comptés aussi
+        self.assertTrue(any('status="403"' in n for n in series))
+